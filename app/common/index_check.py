@@ -0,0 +1,105 @@
+"""
+Checks that the hot query paths of the models are served by indexes.
+
+Each model lists the queries it serves in `__query_patterns__` (see
+app.db_models.QueryPattern). A pattern is supported by a btree index, primary
+key or unique constraint whose leading columns are the pattern's equality
+columns, in any order, followed by its sort columns; or by a primary key or
+unique constraint fully covered by the equality columns (a single row lookup).
+
+`unsupported_query_patterns` checks the declared models, so a model change
+without its index fails `python -m app.manage check-indexes`.
+`missing_database_indexes` compares the declared indexes with a database,
+which catches a migration that was not written or not applied.
+"""
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import Table, UniqueConstraint, inspect
+
+
+def _candidate_indexes(table: Table) -> Iterable[Tuple[str, Tuple[str, ...], bool]]:
+    '''(name, columns, unique) of every btree index and key of a table'''
+    if table.primary_key.columns:
+        yield table.primary_key.name or f'{table.name}_pkey', \
+            tuple(column.name for column in table.primary_key.columns), True
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            yield constraint.name or f'unique({", ".join(constraint.columns.keys())})', \
+                tuple(constraint.columns.keys()), True
+    for index in table.indexes:
+        if (index.dialect_options['postgresql'].get('using') or 'btree') != 'btree':
+            continue
+        # Expression indexes have fewer columns than expressions
+        if len(index.columns) == len(index.expressions):
+            yield index.name, tuple(index.columns.keys()), bool(index.unique)
+
+
+def supporting_index(table: Table, pattern) -> Optional[str]:
+    """
+    The name of an index or key of the table that serves a query pattern.
+
+    Args:
+        table (Table): The model's table.
+        pattern (QueryPattern): The query pattern.
+
+    Returns:
+        Optional[str]: The name of the first supporting index, None if there is none.
+    """
+    equals, order_by = set(pattern.equals), tuple(pattern.order_by)
+    for name, columns, unique in _candidate_indexes(table):
+        if unique and set(columns) <= equals:
+            return name
+        prefix = columns[:len(equals)]
+        if set(prefix) == equals and columns[len(equals):len(equals) + len(order_by)] == order_by:
+            return name
+    return None
+
+
+def unsupported_query_patterns(base) -> List[str]:
+    """
+    The declared query patterns not served by any index of their model.
+
+    Args:
+        base: The declarative base of the models, `app.db_models.Base`.
+
+    Returns:
+        List[str]: One message per unsupported pattern.
+    """
+    problems = []
+    for mapper in sorted(base.registry.mappers, key=lambda mapper: mapper.local_table.name):
+        table = mapper.local_table
+        for pattern in getattr(mapper.class_, '__query_patterns__', ()):
+            unknown = set(pattern.equals) | set(pattern.order_by)
+            unknown -= set(table.columns.keys())
+            if unknown:
+                problems.append(f"{table.name}: query pattern of {pattern.used_by} "
+                                f"uses unknown columns {sorted(unknown)}")
+            elif supporting_index(table, pattern) is None:
+                order_by = f" ORDER BY {', '.join(pattern.order_by)}" if pattern.order_by else ''
+                problems.append(f"{table.name}: no index for WHERE {' AND '.join(pattern.equals)}"
+                                f"{order_by} ({pattern.used_by})")
+    return problems
+
+
+def missing_database_indexes(connection, metadata) -> List[str]:
+    """
+    The indexes declared by the models that a database does not have.
+
+    Args:
+        connection (Connection): A connection to the database to check.
+        metadata (MetaData): The metadata of the mapped models, `Base.metadata`.
+
+    Returns:
+        List[str]: One message per missing table or index.
+    """
+    inspector = inspect(connection)
+    problems = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            problems.append(f"{table.name}: table is missing")
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                problems.append(f"{table.name}: index {index.name} is missing")
+    return problems
+
@@ -0,0 +1,128 @@
+"""
+Live metrics of the SQLAlchemy connection pools.
+
+The engines in app.database are built with the instrumented pool classes
+below, which time every checkout: the wait for an idle connection when the
+pool is exhausted, opening an overflow connection and the pre-ping. The
+numbers are per process; multiply by the number of API replicas (and add the
+sync and async engines) when sizing against Postgres `max_connections`.
+"""
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds of the checkout latency histogram buckets, in milliseconds
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    '''Checkout counters and latency histogram of one pool'''
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.waiting = 0
+            self.checkout_seconds_total = 0.0
+            self.checkout_seconds_max = 0.0
+            self.buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+
+    def start(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.checkout_seconds_total += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+            self.buckets[bisect_left(CHECKOUT_BUCKETS_MS, seconds * 1000)] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            observed = self.checkouts + self.timeouts
+            cumulative, histogram = 0, {}
+            for bound, count in zip((*CHECKOUT_BUCKETS_MS, '+Inf'), self.buckets):
+                cumulative += count
+                histogram[f'le_{bound}ms' if bound != '+Inf' else 'le_inf'] = cumulative
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'waiting': self.waiting,
+                'checkout_ms_avg': round(self.checkout_seconds_total / observed * 1000, 3) if observed else 0.0,
+                'checkout_ms_max': round(self.checkout_seconds_max * 1000, 3),
+                'checkout_ms_total': round(self.checkout_seconds_total * 1000, 3),
+                'checkout_ms_histogram': histogram,
+            }
+
+
+_pool_metrics: Dict[str, PoolMetrics] = {}
+_registry_lock = Lock()
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    '''The metrics of the pool created with `pool_logging_name=name`'''
+    with _registry_lock:
+        return _pool_metrics.setdefault(name, PoolMetrics())
+
+
+class _InstrumentedPool:
+    # Keyed by the logging name, which survives pool.recreate() on dispose
+    def connect(self):
+        metrics = get_pool_metrics(self._orig_logging_name)
+        metrics.start()
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            metrics.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        except BaseException:
+            with metrics._lock:
+                metrics.waiting -= 1
+            raise
+        metrics.observe(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    '''QueuePool recording checkout latency into `get_pool_metrics`'''
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    '''AsyncAdaptedQueuePool recording checkout latency into `get_pool_metrics`'''
+
+
+def pool_stats(engine, name: str) -> dict:
+    """
+    Live state and checkout metrics of an engine's pool.
+
+    Args:
+        engine (Engine): A sync engine, `AsyncEngine.sync_engine` for async ones.
+        name (str): The pool_logging_name the engine was created with.
+
+    Returns:
+        dict: Pool size, checked out, idle and overflow connections (negative
+        while fewer than pool_size connections are open) and the checkout metrics.
+    """
+    pool = engine.pool
+    return {
+        'pool_size': pool.size(),
+        'max_overflow': pool._max_overflow,
+        'timeout': pool.timeout(),
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        'overflow': pool.overflow(),
+        **get_pool_metrics(name).stats(),
+    }
@@ -0,0 +1,183 @@
+"""
+Per-request SQL instrumentation.
+
+`install_sql_instrumentation` hooks the cursor events of every SQLAlchemy
+engine (the async engines run their statements through the same sync engine
+events). While a request is being served, `sql_metrics_middleware` keeps a
+`RequestSqlStats` in a context variable which those events update. The
+middleware then adds the query count, DB time and slowest statement to the
+response headers, and aggregates them per route, with the slowest
+statement seen, for /admin/sql-stats.
+
+Statements are grouped by shape: the SQL text with its bind parameters and
+expanded IN lists collapsed. A shape repeating more than
+SQL_N_PLUS_ONE_THRESHOLD times in one request is logged as a likely N+1.
+Queries run after the headers are sent (streamed responses) are not counted.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Optional
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import SQL_INSTRUMENTATION, SQL_N_PLUS_ONE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+SLOWEST_QUERY_HEADER = "X-DB-Slowest-Ms"
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    '''The statement with its bind parameters and IN lists replaced by `?`'''
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RequestSqlStats:
+    '''The statements run while serving one request'''
+
+    def __init__(self):
+        self._lock = Lock()
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes = Counter()
+
+    def observe(self, statement: str, seconds: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[shape] += 1
+            if seconds >= self.slowest_seconds:
+                self.slowest_seconds = seconds
+                self.slowest_statement = shape
+
+    def repeated_shapes(self, threshold: int) -> Dict[str, int]:
+        with self._lock:
+            return {shape: count for shape, count in self.shapes.items() if count > threshold}
+
+
+_request_sql_stats: ContextVar[Optional[RequestSqlStats]] = ContextVar("request_sql_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_sql_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_sql_stats.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.observe(statement, time.perf_counter() - started.pop())
+
+
+def _handle_error(exception_context):
+    # Failed statements are not timed, drop their start time
+    started = exception_context.connection.info.get("query_started") \
+        if exception_context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def install_sql_instrumentation() -> None:
+    '''Listens to the cursor events of all engines, once'''
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+class RouteSqlStats:
+    '''Totals of the requests served by each route'''
+
+    def __init__(self):
+        self._lock = Lock()
+        self._routes: Dict[str, dict] = {}
+
+    def add(self, route: str, stats: RequestSqlStats, repeated: int) -> None:
+        with self._lock:
+            totals = self._routes.setdefault(route, {
+                "requests": 0, "queries": 0, "db_ms_total": 0.0,
+                "db_ms_max": 0.0, "max_queries": 0, "n_plus_one_warnings": 0,
+                "slowest_statement_ms": 0.0, "slowest_statement": None,
+            })
+            totals["requests"] += 1
+            totals["queries"] += stats.count
+            totals["db_ms_total"] += stats.seconds * 1000
+            totals["db_ms_max"] = max(totals["db_ms_max"], stats.seconds * 1000)
+            totals["max_queries"] = max(totals["max_queries"], stats.count)
+            totals["n_plus_one_warnings"] += repeated
+            if stats.slowest_statement is not None \
+                    and stats.slowest_seconds * 1000 >= totals["slowest_statement_ms"]:
+                totals["slowest_statement_ms"] = stats.slowest_seconds * 1000
+                totals["slowest_statement"] = stats.slowest_statement
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                route: {
+                    **totals,
+                    "db_ms_total": round(totals["db_ms_total"], 3),
+                    "db_ms_max": round(totals["db_ms_max"], 3),
+                    "slowest_statement_ms": round(totals["slowest_statement_ms"], 3),
+                    "queries_avg": round(totals["queries"] / totals["requests"], 2),
+                }
+                for route, totals in self._routes.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_sql_stats = RouteSqlStats()
+
+
+async def sql_metrics_middleware(request: Request, call_next):
+    """
+    Records the statements run while serving a request.
+
+    Args:
+        request (Request): The incoming request.
+        call_next: The rest of the application.
+
+    Returns:
+        Response: The response, with the query count, total DB time and
+        slowest statement time headers.
+    """
+    if not SQL_INSTRUMENTATION:
+        return await call_next(request)
+    stats = RequestSqlStats()
+    token = _request_sql_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_sql_stats.reset(token)
+
+    route = request.scope.get("route")
+    route_name = f"{request.method} {getattr(route, 'path', request.url.path)}"
+    repeated = stats.repeated_shapes(SQL_N_PLUS_ONE_THRESHOLD)
+    for shape, count in repeated.items():
+        logger.warning(
+            "Possible N+1 in %s: statement ran %s times: %.300s", route_name, count, shape)
+    route_sql_stats.add(route_name, stats, len(repeated))
+
+    response.headers[QUERY_COUNT_HEADER] = str(stats.count)
+    response.headers[QUERY_TIME_HEADER] = f"{stats.seconds * 1000:.3f}"
+    response.headers[SLOWEST_QUERY_HEADER] = f"{stats.slowest_seconds * 1000:.3f}"
+    response.headers.append("Server-Timing", f'db;dur={stats.seconds * 1000:.3f};desc="{stats.count} queries"')
+    return response
@@ -1,3 +1,7 @@
+import base64
+import binascii
+import json
+from datetime import datetime
 from dat_core.pydantic_models.base import EnumWithStr
 
 class CustomModel:
@@ -11,3 +15,35 @@ class CustomModel:
             return str(data)
         else:
             return data
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encodes the sort key of the last row of a page into an opaque cursor.
+
+    datetime values are stored as ISO strings and restored by `decode_cursor`.
+    """
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, json.decoder.JSONDecodeError) as exc:
+        raise ValueError(f"Invalid cursor {cursor!r}") from exc
+    if not isinstance(payload, list):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return [
+        datetime.fromisoformat(value["dt"]) if isinstance(value, dict) and "dt" in value else value
+        for value in payload
+    ]
@@ -1,10 +1,29 @@
 from datetime import datetime
 from decimal import Decimal
 import enum
+from typing import NamedTuple, Tuple
+from sqlalchemy import Uuid
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+# Ids are native 16-byte uuids in Postgres and stay str in Python and the API.
+# Run ids come from the workers and are kept as String(36).
+UUIDStr = Uuid(as_uuid=False)
+
+
+class QueryPattern(NamedTuple):
+    '''
+    A hot query on a model: the columns it filters by equality, then sorts by.
+
+    Models list theirs in `__query_patterns__`; `python -m app.manage check-indexes`
+    fails when one is not served by an index, see app.common.index_check.
+    '''
+    equals: Tuple[str, ...]
+    order_by: Tuple[str, ...] = ()
+    # The endpoint or job issuing the query
+    used_by: str = ''
+
 class ModelDict:
     def to_dict(self):
         return {key: value for key, value in self.__dict__.items()
@@ -1,21 +1,21 @@
 from sqlalchemy import (
     Column, String, DateTime,
     ForeignKey, JSON, text,
-    Enum
+    Enum, Index
 )
 from sqlalchemy.sql import func
-from app.db_models import Base, ModelDict
+from app.db_models import Base, ModelDict, QueryPattern, UUIDStr
 from app.db_models.workspaces import Workspace
 
 
 class ActorInstance(Base, ModelDict):
     __tablename__ = 'actor_instances'
 
-    id = Column(String(36), primary_key=True,
+    id = Column(UUIDStr, primary_key=True,
                    nullable=False, server_default=text("uuid_generate_v4()"))
-    workspace_id = Column(String(36), ForeignKey(
+    workspace_id = Column(UUIDStr, ForeignKey(
         Workspace.id), nullable=False)
-    actor_id = Column(String(36), ForeignKey('actors.id'), nullable=False)
+    actor_id = Column(UUIDStr, ForeignKey('actors.id'), nullable=False)
     name = Column(String(255))
     configuration = Column(JSON)
     actor_type = Column(Enum('source', 'destination',
@@ -25,5 +25,15 @@ class ActorInstance(Base, ModelDict):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        Index('ix_actor_instances_workspace_id_actor_type_status_created_at',
+              'workspace_id', 'actor_type', 'status', 'created_at'),
+    )
+    __query_patterns__ = (
+        QueryPattern(('workspace_id', 'actor_type', 'status'), ('created_at',),
+                     'GET /actor_instances/{actor_type}/list'),
+        QueryPattern(('id', 'workspace_id'), used_by='workspace scoped actor instance lookups'),
+    )
+
     def __repr__(self):
         return f"<ActorInstance(id='{self.id}', name='{self.name}', actor_type='{self.actor_type}', status='{self.status}')>"
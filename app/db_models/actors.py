@@ -1,14 +1,14 @@
 from sqlalchemy import Column, String, DateTime, Enum, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from app.db_models import Base, ModelDict
+from app.db_models import Base, ModelDict, UUIDStr
 from app.db_models.actor_instances import ActorInstance
 
 
 class Actor(Base, ModelDict):
     __tablename__ = 'actors'
 
-    id = Column(String(36), primary_key=True,
+    id = Column(UUIDStr, primary_key=True,
                 nullable=False, server_default=text("uuid_generate_v4()"))
     name = Column(String(255), nullable=False)
     module_name = Column(String(255), nullable=False)
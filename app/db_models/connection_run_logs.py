@@ -1,7 +1,12 @@
 import enum
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Enum, DateTime, ForeignKey, text
-from app.db_models import Base
+from sqlalchemy import (
+    Column, Computed, String, Text, Enum, DateTime, Integer,
+    ForeignKey, Index, text
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from app.db_models import Base, QueryPattern, UUIDStr
 
 
 class LogLevel(enum.Enum):
@@ -18,14 +23,19 @@ class MessageType(enum.Enum):
     LOG = 'LOG'
 
 
+# Text search configuration of search_vector; 'simple' keeps error codes and
+# identifiers intact instead of stemming them
+SEARCH_CONFIG = 'simple'
+
+
 class ConnectionRunLogs(Base):
     __tablename__ = 'connection_run_logs'
 
-    id = Column(String(36),
+    id = Column(UUIDStr,
                 primary_key=True,
                 nullable=False,
                 server_default=text("uuid_generate_v4()"))
-    connection_id = Column(String(36), ForeignKey(
+    connection_id = Column(UUIDStr, ForeignKey(
         'connections.id'), nullable=False)
     message = Column(String, nullable=False)
     stack_trace = Column(Text)
@@ -34,6 +44,32 @@ class ConnectionRunLogs(Base):
                         onupdate=datetime.utcnow)
     run_id = Column(String(36), nullable=False)
     message_type = Column(Enum(MessageType), nullable=False)
+    # Extracted from `message` once at ingest so sorting and sums run in SQL
+    emitted_at = Column(DateTime)
+    level = Column(Enum(LogLevel, name='connection_run_logs_level_enum'))
+    stream = Column(String(255))
+    n_docs_processed = Column(Integer)
+    n_docs_fetched = Column(Integer)
+    # Maintained by Postgres on insert, see /connection-run-logs/search
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"to_tsvector('{SEARCH_CONFIG}', coalesce(message, '') || ' ' || coalesce(stack_trace, ''))",
+        persisted=True,
+    )))
+
+    __table_args__ = (
+        Index('ix_connection_run_logs_run_id_emitted_at', 'run_id', 'emitted_at'),
+        Index('ix_connection_run_logs_connection_id_emitted_at', 'connection_id', 'emitted_at'),
+        Index('ix_connection_run_logs_connection_id_level', 'connection_id', 'level'),
+        Index('ix_connection_run_logs_run_id_stream', 'run_id', 'stream'),
+        Index('ix_connection_run_logs_connection_id_message_type', 'connection_id', 'message_type'),
+        Index('ix_connection_run_logs_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+    __query_patterns__ = (
+        QueryPattern(('connection_id',), ('emitted_at',), 'GET /connection-run-logs/{connection_id}/runs, export'),
+        QueryPattern(('run_id',), ('emitted_at',), 'GET /connection-run-logs/runs/{run_id}, live tail replay'),
+        QueryPattern(('connection_id', 'level'), used_by='GET /connection-run-logs/search'),
+        QueryPattern(('connection_id', 'message_type'), used_by='backfill-stream-states'),
+    )
 
     def __repr__(self):
         return f"<ConnectionRunLogs(id={self.id}, connection_id={self.connection_id}, run_id={self.run_id}, message='{self.message[:20]}...', created_at={self.created_at}, updated_at={self.updated_at})>"
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, BigInteger, ForeignKey
+from app.db_models import Base, QueryPattern, UUIDStr
+
+
+class ConnectionRunStream(Base):
+    '''Per-run, per-stream document counts, maintained as logs are ingested'''
+    __tablename__ = 'connection_run_streams'
+
+    # Run ids are generated by the workers, unique per connection only
+    connection_id = Column(UUIDStr, ForeignKey(
+        'connections.id'), primary_key=True, nullable=False)
+    run_id = Column(String(36), primary_key=True, nullable=False)
+    stream = Column(String(255), primary_key=True, nullable=False)
+    docs_fetched = Column(BigInteger, nullable=False, server_default='0')
+    records_updated = Column(BigInteger, nullable=False, server_default='0')
+    updated_at = Column(DateTime, default=datetime.utcnow,
+                        onupdate=datetime.utcnow)
+
+    __query_patterns__ = (
+        QueryPattern(('connection_id', 'run_id'), ('stream',), 'records_per_stream of /agg-run-logs'),
+    )
+
+    def __repr__(self):
+        return f"<ConnectionRunStream(connection_id='{self.connection_id}', run_id='{self.run_id}', stream='{self.stream}', records_updated={self.records_updated})>"
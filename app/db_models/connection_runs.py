@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, ForeignKey, Enum, Index
+from app.db_models import Base, ModelDict, QueryPattern, UUIDStr
+
+
+class ConnectionRun(Base, ModelDict):
+    '''Per-run rollup of connection_run_logs, maintained as logs are ingested'''
+    __tablename__ = 'connection_runs'
+
+    # Run ids are generated by the workers, unique per connection only
+    connection_id = Column(UUIDStr, ForeignKey(
+        'connections.id'), primary_key=True, nullable=False)
+    run_id = Column(String(36), primary_key=True, nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime)
+    status = Column(Enum('QUEUED', 'RUNNING', 'SUCCESS', 'FAILURE', 'PARTIAL_SUCCESS',
+                         name='connection_runs_status_enum'),
+                    nullable=False, server_default='RUNNING')
+    records_updated = Column(BigInteger, nullable=False, server_default='0')
+    error_count = Column(Integer, nullable=False, server_default='0')
+    log_count = Column(Integer, nullable=False, server_default='0')
+    # Log lines not stored because of the run log ingest policy
+    dropped_count = Column(BigInteger, nullable=False, server_default='0')
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow,
+                        onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Newest-first run pages per connection, see /agg-run-logs
+        Index('ix_connection_runs_connection_id_start_time',
+              'connection_id', 'start_time', 'run_id'),
+    )
+    __query_patterns__ = (
+        QueryPattern(('connection_id',), ('start_time', 'run_id'), 'GET /connection-run-logs/agg-run-logs, run-stats'),
+    )
+
+    def __repr__(self):
+        return f"<ConnectionRun(run_id='{self.run_id}', connection_id='{self.connection_id}', status='{self.status}')>"
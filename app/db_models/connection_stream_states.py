@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from app.db_models import Base, QueryPattern, UUIDStr
+
+
+class ConnectionStreamState(Base):
+    '''Latest STATE checkpoint per connection and stream, upserted as states are ingested'''
+    __tablename__ = 'connection_stream_states'
+
+    connection_id = Column(UUIDStr, ForeignKey(
+        'connections.id'), primary_key=True, nullable=False)
+    stream_name = Column(String(255), primary_key=True, nullable=False)
+    stream_state = Column(JSON, nullable=False)
+    emitted_at = Column(DateTime, nullable=False)
+    run_id = Column(String(36), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow,
+                        onupdate=datetime.utcnow)
+
+    __query_patterns__ = (
+        QueryPattern(('connection_id',), used_by='GET /connection-run-logs/{connection_id}/stream-states'),
+    )
+
+    def __repr__(self):
+        return f"<ConnectionStreamState(connection_id='{self.connection_id}', stream_name='{self.stream_name}', emitted_at={self.emitted_at})>"
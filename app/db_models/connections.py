@@ -1,19 +1,19 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Enum, text
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.db_models import Base, ModelDict
+from app.db_models import Base, ModelDict, QueryPattern, UUIDStr
 from app.db_models.workspaces import Workspace
 
 
 class Connection(Base, ModelDict):
     __tablename__ = 'connections'
 
-    id = Column(String(36), primary_key=True,
+    id = Column(UUIDStr, primary_key=True,
                    nullable=False, server_default=text("uuid_generate_v4()"))
-    workspace_id = Column(String(36), ForeignKey(Workspace.id), nullable=False)
-    source_instance_id = Column(String(36), ForeignKey('actor_instances.id'), nullable=False)
-    generator_instance_id = Column(String(36), ForeignKey('actor_instances.id'), nullable=False)
-    destination_instance_id = Column(String(36), ForeignKey('actor_instances.id'), nullable=False)
+    workspace_id = Column(UUIDStr, ForeignKey(Workspace.id), nullable=False)
+    source_instance_id = Column(UUIDStr, ForeignKey('actor_instances.id'), nullable=False)
+    generator_instance_id = Column(UUIDStr, ForeignKey('actor_instances.id'), nullable=False)
+    destination_instance_id = Column(UUIDStr, ForeignKey('actor_instances.id'), nullable=False)
     name = Column(String(255))
     namespace_format = Column(String(255), default="${SOURCE_NAMESPACE}")
     prefix = Column(String(255))
@@ -29,5 +29,19 @@ class Connection(Base, ModelDict):
     generator_instance = relationship("ActorInstance", foreign_keys=[generator_instance_id])
     destination_instance = relationship("ActorInstance", foreign_keys=[destination_instance_id])
 
+    __table_args__ = (
+        Index('ix_connections_workspace_id_created_at', 'workspace_id', 'created_at'),
+        Index('ix_connections_source_instance_id', 'source_instance_id'),
+        Index('ix_connections_generator_instance_id', 'generator_instance_id'),
+        Index('ix_connections_destination_instance_id', 'destination_instance_id'),
+    )
+    __query_patterns__ = (
+        QueryPattern(('workspace_id',), ('created_at',), 'GET /connections/list'),
+        QueryPattern(('id', 'workspace_id'), used_by='workspace scoped connection lookups'),
+        QueryPattern(('source_instance_id',), used_by='connected connections of an actor instance'),
+        QueryPattern(('generator_instance_id',), used_by='connected connections of an actor instance'),
+        QueryPattern(('destination_instance_id',), used_by='connected connections of an actor instance'),
+    )
+
     def __repr__(self):
         return f"<Connection(id='{self.id}', name='{self.name}', status='{self.status}')>"
@@ -1,13 +1,13 @@
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, text
 from sqlalchemy.sql import func
-from app.db_models import Base
+from app.db_models import Base, UUIDStr
 
 
 class Organization(Base):
     __tablename__ = 'organizations'
 
-    id = Column(String(36), primary_key=True,
-                nullable=False, server_default="uuid_generate_v4()")
+    id = Column(UUIDStr, primary_key=True,
+                nullable=False, server_default=text("uuid_generate_v4()"))
     name = Column(String(50), nullable=False)
     status = Column(Enum('active', 'inactive', name='organizations_status_enum'),
                     server_default='active', nullable=False)
@@ -0,0 +1,35 @@
+from sqlalchemy import (
+    Column, DateTime, Enum, Integer, JSON, ForeignKey, CheckConstraint, text
+)
+from sqlalchemy.sql import func
+from app.db_models import Base, QueryPattern, UUIDStr
+from app.db_models.connection_run_logs import LogLevel
+
+
+class RunLogIngestPolicy(Base):
+    '''Filtering, sampling and per-run budget of run log ingestion for a workspace or a connection'''
+    __tablename__ = 'run_log_ingest_policies'
+
+    id = Column(UUIDStr, primary_key=True,
+                nullable=False, server_default=text("uuid_generate_v4()"))
+    workspace_id = Column(UUIDStr, ForeignKey('workspaces.id'), unique=True)
+    connection_id = Column(UUIDStr, ForeignKey('connections.id'), unique=True)
+    # Lowest level stored; ERROR and FATAL lines are always kept
+    min_level = Column(Enum(*LogLevel.__members__, name='connection_run_logs_level_enum'))
+    # Fraction of the lines of a level that is stored, e.g. {"DEBUG": 0.1}
+    sample_rates = Column(JSON)
+    max_lines_per_run = Column(Integer)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        CheckConstraint('(workspace_id IS NULL) <> (connection_id IS NULL)',
+                        name='ck_run_log_ingest_policies_scope'),
+    )
+    __query_patterns__ = (
+        QueryPattern(('workspace_id',), used_by='run log ingest policy resolution'),
+        QueryPattern(('connection_id',), used_by='run log ingest policy resolution'),
+    )
+
+    def __repr__(self):
+        return f"<RunLogIngestPolicy(id='{self.id}', workspace_id='{self.workspace_id}', connection_id='{self.connection_id}')>"
@@ -1,13 +1,17 @@
 from sqlalchemy import Column, String, DateTime, text
 from sqlalchemy.sql import func
-from app.db_models import Base
+from app.db_models import Base, QueryPattern, UUIDStr
 
 class User(Base):
     __tablename__ = 'users'
 
-    id = Column(String(36), primary_key=True,
+    id = Column(UUIDStr, primary_key=True,
                    nullable=False, server_default=text("uuid_generate_v4()"))
     email = Column(String(255), nullable=False, unique=True)
     password_hash = Column(String(255), nullable=False)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now())
+
+    __query_patterns__ = (
+        QueryPattern(('email',), used_by='POST /users/verify'),
+    )
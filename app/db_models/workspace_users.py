@@ -1,21 +1,30 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime
+from sqlalchemy import Column, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.db_models import Base
+from app.db_models import Base, QueryPattern, UUIDStr
 
 
 class WorkspaceUser(Base):
     __tablename__ = 'workspace_users'
 
-    id = Column(String(36), primary_key=True,
-                nullable=False, server_default="uuid_generate_v4()")
-    workspace_id = Column(String(36), ForeignKey(
+    id = Column(UUIDStr, primary_key=True,
+                nullable=False, server_default=text("uuid_generate_v4()"))
+    workspace_id = Column(UUIDStr, ForeignKey(
         'workspaces.id'), nullable=False)
-    user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
+    user_id = Column(UUIDStr, ForeignKey('users.id'), nullable=False)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
     user = relationship("User", foreign_keys=[user_id])
 
+    __table_args__ = (
+        Index('ix_workspace_users_workspace_id', 'workspace_id'),
+        Index('ix_workspace_users_user_id', 'user_id'),
+    )
+    __query_patterns__ = (
+        QueryPattern(('workspace_id',), used_by='GET /workspace_users/{workspace_id}/list'),
+        QueryPattern(('user_id',), used_by='POST /users/verify'),
+    )
+
     def __repr__(self):
         return f"<WorkspaceUser(id='{self.id}', workspace_id='{self.workspace_id}', user_id='{self.user_id}')>"
@@ -1,8 +1,79 @@
 from fastapi import APIRouter
+from ..common.pool_metrics import pool_stats
+from ..common.sql_metrics import route_sql_stats
+from ..config import DB_STATEMENT_TIMEOUT_MS
+from ..database import (
+    ASYNC_POOL_NAME, REPLICA_POOL_NAMES, REPLICA_SYNC_POOL_NAMES, SYNC_POOL_NAME,
+    async_engine, engine, replica_engines, replica_sync_engines
+)
+from ..services.connection_run_logs import run_log_buffer, parsed_message_cache, ingest_policy_stats
 
 router = APIRouter()
 
 
 @router.post("/")
 async def update_admin():
-    return {"message": "Admin getting schwifty"}
\ No newline at end of file
+    return {"message": "Admin getting schwifty"}
+
+
+@router.get("/run-log-buffer")
+async def run_log_buffer_stats():
+    """
+    Returns queue depth and flush latency counters of the run log write-behind buffer.
+    """
+    if run_log_buffer is None:
+        return {"enabled": False}
+    return run_log_buffer.stats()
+
+
+@router.get("/run-log-parse-cache")
+async def run_log_parse_cache_stats():
+    """
+    Returns size and hit counters of the parsed run log message cache.
+    """
+    return parsed_message_cache.stats()
+
+
+@router.get("/run-log-ingest-policies")
+async def run_log_ingest_policy_stats():
+    """
+    Returns the run log lines kept and dropped by ingest policies, by reason.
+    """
+    return ingest_policy_stats()
+
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    """
+    Returns the live state and checkout latency of this process' database pools.
+
+    Each API replica holds up to `max_overflow + pool_size` connections per pool,
+    which has to fit the Postgres `max_connections` budget across replicas.
+    Read replica pools count against each replica's own budget.
+    """
+    pools = {
+        SYNC_POOL_NAME: pool_stats(engine, SYNC_POOL_NAME),
+        ASYNC_POOL_NAME: pool_stats(async_engine.sync_engine, ASYNC_POOL_NAME),
+    }
+    replica_pools = {
+        name: pool_stats(replica_engine.sync_engine, name)
+        for name, replica_engine in zip(REPLICA_POOL_NAMES, replica_engines)
+    }
+    replica_pools.update(
+        (name, pool_stats(replica_engine, name))
+        for name, replica_engine in zip(REPLICA_SYNC_POOL_NAMES, replica_sync_engines)
+    )
+    return {
+        "pools": {**pools, **replica_pools},
+        "max_connections_per_process": sum(
+            pool["pool_size"] + pool["max_overflow"] for pool in pools.values()),
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS,
+    }
+
+
+@router.get("/sql-stats")
+async def sql_stats():
+    """
+    Returns the queries, DB time and N+1 warnings of each route since startup.
+    """
+    return route_sql_stats.stats()
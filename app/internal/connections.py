@@ -1,11 +1,18 @@
+import time
+from collections import defaultdict
+from threading import Lock
+from typing import Callable, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Path, Query
-from sqlalchemy.orm import joinedload
+from sqlalchemy import Select, select
+from sqlalchemy.orm import aliased
 from dat_core.pydantic_models import ConnectorSpecification
-from ..database import get_db
+from ..config import ORCHESTRA_CONFIG_CACHE_SECONDS
+from ..database import AsyncSessionLocal
 from ..db_models.connections import Connection as ConnectionModel
 from ..db_models.actor_instances import ActorInstance as ActorInstanceModel
 from ..db_models.actors import Actor as ActorModel
 from ..models.connection_model import ConnectionOrchestraResponse
+from ..models.ids import UUIDStr
 
 class APIError(HTTPException):
     def __init__(self, status_code: int, message: str):
@@ -18,54 +25,141 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+ROLES = ("source", "generator", "destination")
+
+
+class OrchestraConfigCache:
+    '''
+    Assembled orchestra configs keyed by connection_id, reused for at most `ttl` seconds.
+
+    Every config is stored with the stamp of the rows it was built from: the
+    updated_at of the connection, of its three actor instances and of their
+    actors. A config is only served after a lookup of the current stamp
+    matches, so updates made by any process are seen on the next read.
+    '''
+
+    def __init__(self, ttl: float = ORCHESTRA_CONFIG_CACHE_SECONDS):
+        self.ttl = ttl
+        self._configs = {}
+        self._connections_of_instance = defaultdict(set)
+        self._lock = Lock()
+
+    def get(self, connection_id: str) -> Optional[Tuple[tuple, ConnectionOrchestraResponse]]:
+        '''The stamp and config cached for a connection, None when absent or expired'''
+        with self._lock:
+            entry = self._configs.get(connection_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1], entry[2]
+
+    def put(self, connection_id: str, stamp: tuple, config: ConnectionOrchestraResponse) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._configs[connection_id] = (time.monotonic() + self.ttl, stamp, config)
+            for role in ROLES:
+                self._connections_of_instance[getattr(config, f"{role}_instance_id")].add(connection_id)
+
+    def invalidate_connection(self, connection_id: str) -> None:
+        with self._lock:
+            self._configs.pop(connection_id, None)
+
+    def invalidate_actor_instance(self, actor_instance_id: str) -> None:
+        '''Invalidates the connections using an actor instance'''
+        with self._lock:
+            for connection_id in self._connections_of_instance.pop(actor_instance_id, ()):
+                self._configs.pop(connection_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._configs.clear()
+            self._connections_of_instance.clear()
+
+
+orchestra_config_cache = OrchestraConfigCache()
+
+
+def _orchestra_query(connection_id: str, entities: Callable) -> Select:
+    '''
+    Selects `entities(instances, actors)` from a connection joined to its actor
+    instances and their actors, aliased per role in ROLES order.
+    '''
+    instances = [aliased(ActorInstanceModel) for _ in ROLES]
+    actors = [aliased(ActorModel) for _ in ROLES]
+    query = select(*entities(instances, actors))
+    for role, instance, actor in zip(ROLES, instances, actors):
+        query = (
+            query
+            .outerjoin(instance, getattr(ConnectionModel, f"{role}_instance_id") == instance.id)
+            .outerjoin(actor, instance.actor_id == actor.id)
+        )
+    return query.filter(ConnectionModel.id == connection_id)
+
+
+def _stamp(rows) -> tuple:
+    return tuple(row.updated_at if row is not None else None for row in rows)
+
+
 async def get_connection_orchestra_response(connection_id: str) -> ConnectionOrchestraResponse:
-    db_session = list(get_db())[0]
+    """
+    The configuration of a connection and its actors, as sent to the workers.
 
-    connection = db_session.query(ConnectionModel).filter_by(id=connection_id).one_or_none()
-    if connection is None:
-        raise HTTPException(status_code=404, detail="Connection not found")
+    Served from `orchestra_config_cache` when the updated_at of its rows are
+    unchanged, which costs one primary key lookup, otherwise read with a
+    single query joining the connection, its three actor instances and their
+    actors. The rows are always read from the primary: a stamp read from a
+    lagging replica would validate a config the primary has moved past.
+
+    Args:
+        connection_id (str): The ID of the connection.
 
-    _source = db_session.query(ActorInstanceModel).filter_by(id=connection.source_instance_id).one_or_none()
-    _generator = db_session.query(ActorInstanceModel).filter_by(id=connection.generator_instance_id).one_or_none()
-    _destination = db_session.query(ActorInstanceModel).filter_by(id=connection.destination_instance_id).one_or_none()
+    Returns:
+        ConnectionOrchestraResponse: The assembled configuration.
+
+    Raises:
+        HTTPException: If the connection or one of its actor instances is not found.
+    """
+    cached = orchestra_config_cache.get(connection_id)
+    async with AsyncSessionLocal() as db:
+        if cached is not None:
+            stamp = (await db.execute(_orchestra_query(connection_id, lambda instances, actors: (
+                ConnectionModel.updated_at,
+                *(instance.updated_at for instance in instances),
+                *(actor.updated_at for actor in actors),
+            )))).one_or_none()
+            if stamp is not None and tuple(stamp) == cached[0]:
+                return cached[1]
+        row = (await db.execute(_orchestra_query(connection_id, lambda instances, actors: (
+            ConnectionModel, *instances, *actors))
+        )).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Connection not found")
 
-    if not _source or not _generator or not _destination:
+    connection, *related = row
+    role_instances = dict(zip(ROLES, related[:len(ROLES)]))
+    role_actors = dict(zip(ROLES, related[len(ROLES):]))
+    if not all(role_instances.values()):
         raise HTTPException(status_code=404, detail="One or more related instances not found")
 
-    # Fetch actors
-    source_actor = db_session.query(ActorModel).get(_source.actor_id)
-    generator_actor = db_session.query(ActorModel).get(_generator.actor_id)
-    destination_actor = db_session.query(ActorModel).get(_destination.actor_id)
-
-    # Prepare actor dictionaries
-    source_actor_dct = {
-        "name": source_actor.name,
-        "module_name": source_actor.module_name,
-        "connection_specification": _source.configuration
-    }
-    generator_actor_dct = {
-        "name": generator_actor.name,
-        "module_name": generator_actor.module_name,
-        "connection_specification": _generator.configuration
-    }
-    destination_actor_dct = {
-        "name": destination_actor.name,
-        "module_name": destination_actor.module_name,
-        "connection_specification": _destination.configuration
-    }
-
-    return ConnectionOrchestraResponse(
+    config = ConnectionOrchestraResponse(
         **connection.to_dict(),
-        source=ConnectorSpecification(**source_actor_dct).model_dump(),
-        generator=ConnectorSpecification(**generator_actor_dct).model_dump(),
-        destination=ConnectorSpecification(**destination_actor_dct).model_dump()
+        **{
+            role: ConnectorSpecification(
+                name=role_actors[role].name,
+                module_name=role_actors[role].module_name,
+                connection_specification=role_instances[role].configuration,
+            ).model_dump()
+            for role in ROLES
+        },
     )
+    orchestra_config_cache.put(connection_id, _stamp(row), config)
+    return config
 
 @router.get("/{connection_id}",
             response_model=ConnectionOrchestraResponse,
             description="Fetch connection configuration for orchestra")
 async def fetch_connection_config(
-    connection_id: str = Path(..., description="The ID of the connection to fetch"),
+    connection_id: UUIDStr = Path(..., description="The ID of the connection to fetch"),
 ) -> ConnectionOrchestraResponse:
     try:
         return await get_connection_orchestra_response(connection_id)
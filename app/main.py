@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 # from .dependencies import get_query_token, get_token_header
@@ -7,11 +9,42 @@ from .routers import (
     actor_instances, users,
     connection_run_logs, workspaces,
     organizations, workspace_users,
+    run_log_ingest_policies,
 )
 from .common.exceptions.exceptions import NotFound, Unauthorized
+from .common.sql_metrics import (
+    QUERY_COUNT_HEADER, QUERY_TIME_HEADER, SLOWEST_QUERY_HEADER,
+    install_sql_instrumentation, sql_metrics_middleware
+)
+from .config import DB_READ_YOUR_WRITES_SECONDS
+from .database import READ_METHODS, READ_PRIMARY_COOKIE, ReplicaSessionLocals
+from .services.connection_run_logs import (
+    flush_dropped_run_logs, run_log_buffer, run_log_pubsub, start_archival, start_partition_maintenance
+)
 # from pydantic import BaseModel
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_log_pubsub.start()
+    if run_log_buffer is not None:
+        await run_log_buffer.start()
+    partition_maintenance = start_partition_maintenance()
+    archival = start_archival()
+    yield
+    if partition_maintenance is not None:
+        partition_maintenance.cancel()
+    if archival is not None:
+        archival.cancel()
+    # Flush queued run logs before the worker exits
+    if run_log_buffer is not None:
+        await run_log_buffer.stop()
+    await asyncio.to_thread(flush_dropped_run_logs)
+    await run_log_pubsub.stop()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     # dependencies=[Depends(get_token_header)]
 )
 
@@ -24,8 +57,24 @@ app.add_middleware(
     allow_credentials=True,  # Adjust as needed
     allow_methods=["*"],  # Adjust as needed
     allow_headers=["*"],  # Adjust as needed
+    expose_headers=[QUERY_COUNT_HEADER, QUERY_TIME_HEADER, SLOWEST_QUERY_HEADER, "Server-Timing"],
 )
 
+install_sql_instrumentation()
+app.middleware("http")(sql_metrics_middleware)
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """
+    Pins a client's reads to the primary for a while after each successful write,
+    so it does not read stale rows from a lagging replica.
+    """
+    response = await call_next(request)
+    if ReplicaSessionLocals and DB_READ_YOUR_WRITES_SECONDS \
+            and request.method not in READ_METHODS and response.status_code < 400:
+        response.set_cookie(READ_PRIMARY_COOKIE, "1", max_age=DB_READ_YOUR_WRITES_SECONDS, httponly=True)
+    return response
+
 @app.exception_handler(NotFound)
 async def not_found_exception_handler(request: Request, exc: NotFound):
     raise HTTPException(
@@ -54,6 +103,7 @@ app.include_router(users.router)
 app.include_router(workspaces.router)
 app.include_router(organizations.router)
 app.include_router(workspace_users.router)
+app.include_router(run_log_ingest_policies.router)
 app.include_router(
     admin.router,
     prefix="/admin",
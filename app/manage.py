@@ -0,0 +1,231 @@
+"""
+Maintenance commands for the dat API.
+
+Usage:
+    python -m app.manage migrate [--revision head]
+    python -m app.manage check-indexes [--database]
+    python -m app.manage backfill-run-log-columns [--connection-id ID]
+    python -m app.manage backfill-connection-runs [--connection-id ID]
+    python -m app.manage backfill-stream-states [--connection-id ID]
+    python -m app.manage prepare-run-log-uuids [--batch-rows N]
+    python -m app.manage partition-run-logs
+    python -m app.manage maintain-run-log-partitions
+    python -m app.manage archive-run-logs [--older-than-days N] [--connection-id ID]
+    python -m app.manage consume-run-logs [--broker-url URL] [--queue NAME] [--batch-rows N]
+"""
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+from app.config import (
+    CELERY_BROKER_URL, RUN_LOG_QUEUE, RUN_LOG_CONSUMER_BATCH_ROWS
+)
+from app.common.index_check import missing_database_indexes, unsupported_query_patterns
+from app.database import SessionLocal, engine
+from app.db_models import Base
+# Register every model so foreign keys resolve outside the FastAPI app
+from app.db_models import (  # pylint: disable=unused-import
+    actors, actor_instances, connections, connection_run_logs, connection_run_streams,
+    connection_runs, connection_stream_states, organizations, run_log_ingest_policies,
+    users, workspace_users, workspaces
+)
+from app.services.connection_run_logs import (
+    backfill_connection_runs, backfill_run_log_columns, backfill_stream_states,
+    convert_to_partitioned, maintain_partitions, archive_run_logs, get_archive_store,
+    consume_run_logs, prepare_uuid_columns, ARCHIVE_MIN_AGE_DAYS
+)
+
+
+def _migrate(args) -> int:
+    from alembic import command
+    from alembic.config import Config
+
+    logging.basicConfig(level=logging.INFO)
+    # Without alembic.ini, which is not shipped in the image
+    config = Config()
+    config.set_main_option("script_location", os.path.join(os.path.dirname(__file__), "migrations"))
+    command.upgrade(config, args.revision)
+    return 0
+
+
+def _check_indexes(args) -> int:
+    problems = unsupported_query_patterns(Base)
+    if args.database:
+        with engine.connect() as connection:
+            problems += missing_database_indexes(connection, Base.metadata)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if problems:
+        return 1
+    print("Every query pattern has a supporting index")
+    return 0
+
+
+def _backfill_run_log_columns(args) -> int:
+    db = SessionLocal()
+    try:
+        updated = backfill_run_log_columns(db, connection_id=args.connection_id)
+    finally:
+        db.close()
+    print(f"Extracted typed columns for {updated} run logs")
+    return 0
+
+
+def _backfill_connection_runs(args) -> int:
+    db = SessionLocal()
+    try:
+        written = backfill_connection_runs(db, connection_id=args.connection_id)
+    finally:
+        db.close()
+    print(f"Backfilled {written} connection runs")
+    return 0
+
+
+def _backfill_stream_states(args) -> int:
+    db = SessionLocal()
+    try:
+        scanned = backfill_stream_states(db, connection_id=args.connection_id)
+    finally:
+        db.close()
+    print(f"Rebuilt stream states from {scanned} STATE messages")
+    return 0
+
+
+def _prepare_run_log_uuids(args) -> int:
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        updated = prepare_uuid_columns(db, batch_rows=args.batch_rows)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    print(f"Backfilled the uuid columns of {updated} run logs, run `migrate` to swap them in")
+    return 0
+
+
+def _partition_run_logs(args) -> int:
+    db = SessionLocal()
+    try:
+        convert_to_partitioned(db)
+        created, _ = maintain_partitions(db)
+    finally:
+        db.close()
+    print(f"connection_run_logs is partitioned, created partitions: {created}")
+    return 0
+
+
+def _maintain_run_log_partitions(args) -> int:
+    db = SessionLocal()
+    try:
+        created, dropped = maintain_partitions(db)
+    finally:
+        db.close()
+    print(f"Created partitions: {created}, dropped partitions: {dropped}")
+    return 0
+
+
+def _archive_run_logs(args) -> int:
+    store = get_archive_store()
+    if store is None:
+        print("No archive store configured, set RUN_LOG_ARCHIVE_DIR or MINIO_ENDPOINT",
+              file=sys.stderr)
+        return 1
+    if args.older_than_days < ARCHIVE_MIN_AGE_DAYS:
+        # Reads of runs younger than that do not look in the archive
+        print(f"Run logs are archived after {ARCHIVE_MIN_AGE_DAYS} days at the earliest, "
+              f"set RUN_LOG_ARCHIVE_AFTER_DAYS to archive sooner", file=sys.stderr)
+        return 1
+    older_than = datetime.utcnow() - timedelta(days=args.older_than_days)
+    db = SessionLocal()
+    try:
+        archived = archive_run_logs(db, store, older_than, connection_id=args.connection_id)
+    finally:
+        db.close()
+    print(f"Archived {archived} run logs created before {older_than:%Y-%m-%d %H:%M:%S}")
+    return 0
+
+
+def _consume_run_logs(args) -> int:
+    logging.basicConfig(level=logging.INFO)
+    consume_run_logs(args.broker_url, queue_name=args.queue, batch_rows=args.batch_rows)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser(
+        "migrate",
+        help="Apply the schema migrations in app/migrations")
+    migrate.add_argument("--revision", default="head", help="Revision to upgrade to")
+    migrate.set_defaults(handler=_migrate)
+
+    check_indexes = commands.add_parser(
+        "check-indexes",
+        help="Fail when a model's query patterns have no supporting index")
+    check_indexes.add_argument("--database", action="store_true",
+                               help="Also fail when the database lacks an index declared by the models")
+    check_indexes.set_defaults(handler=_check_indexes)
+
+    backfill_columns = commands.add_parser(
+        "backfill-run-log-columns",
+        help="Extract the typed columns (emitted_at, level, stream, doc counts) of older run logs")
+    backfill_columns.add_argument("--connection-id", help="Only backfill this connection")
+    backfill_columns.set_defaults(handler=_backfill_run_log_columns)
+
+    backfill = commands.add_parser(
+        "backfill-connection-runs",
+        help="Rebuild the connection_runs rollup from connection_run_logs")
+    backfill.add_argument("--connection-id", help="Only backfill this connection")
+    backfill.set_defaults(handler=_backfill_connection_runs)
+
+    backfill_states = commands.add_parser(
+        "backfill-stream-states",
+        help="Rebuild the connection_stream_states checkpoints from connection_run_logs")
+    backfill_states.add_argument("--connection-id", help="Only backfill this connection")
+    backfill_states.set_defaults(handler=_backfill_stream_states)
+
+    prepare_uuids = commands.add_parser(
+        "prepare-run-log-uuids",
+        help="Backfill uuid copies of the run log ids online, before migration 0010")
+    prepare_uuids.add_argument("--batch-rows", type=int, default=10000,
+                               help="Number of rows backfilled per transaction")
+    prepare_uuids.set_defaults(handler=_prepare_run_log_uuids)
+
+    partition = commands.add_parser(
+        "partition-run-logs",
+        help="Convert connection_run_logs into a table partitioned by month")
+    partition.set_defaults(handler=_partition_run_logs)
+
+    maintain = commands.add_parser(
+        "maintain-run-log-partitions",
+        help="Create upcoming run log partitions and drop expired ones")
+    maintain.set_defaults(handler=_maintain_run_log_partitions)
+
+    archive = commands.add_parser(
+        "archive-run-logs",
+        help="Move old run logs to Parquet objects in the archive store")
+    archive.add_argument("--older-than-days", type=int, default=ARCHIVE_MIN_AGE_DAYS,
+                         help="Archive logs created more than this many days ago")
+    archive.add_argument("--connection-id", help="Only archive this connection")
+    archive.set_defaults(handler=_archive_run_logs)
+
+    consume = commands.add_parser(
+        "consume-run-logs",
+        help="Ingest run logs published to the broker in batches")
+    consume.add_argument("--broker-url", default=CELERY_BROKER_URL, help="Broker URL, memory:// for local runs")
+    consume.add_argument("--queue", default=RUN_LOG_QUEUE, help="Queue to consume")
+    consume.add_argument("--batch-rows", type=int, default=RUN_LOG_CONSUMER_BATCH_ROWS,
+                         help="Maximum number of messages written per transaction")
+    consume.set_defaults(handler=_consume_run_logs)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Alembic environment of the dat API schema.
+
+Migrations inspect the database to stay idempotent (tables created before the
+project had migrations are adopted, not recreated), so they only run online.
+"""
+from alembic import context
+from sqlalchemy import create_engine, pool
+from app.config import DATABASE_URL
+from app.db_models import Base
+# Register every model on Base.metadata for autogenerate
+from app.db_models import (  # pylint: disable=unused-import
+    actors, actor_instances, connections, connection_run_logs, connection_run_streams,
+    connection_runs, connection_stream_states, organizations, run_log_ingest_policies,
+    users, workspace_users, workspaces
+)
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Run log partitions and other tables the models don't map are left alone
+    if type_ == "table" and reflected and compare_to is None:
+        return False
+    return True
+
+
+def run_migrations_online() -> None:
+    # No pool options or statement_timeout: index builds can take a while
+    connectable = create_engine(
+        config.get_main_option("sqlalchemy.url") or DATABASE_URL, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    raise SystemExit("The dat API migrations inspect the database and cannot run with --sql")
+run_migrations_online()
@@ -0,0 +1,72 @@
+"""
+Idempotent schema operations shared by the migrations.
+
+The tables predating the migrations were created by hand on some
+deployments, so the early revisions only create what is missing. Indexes are
+built with CREATE INDEX CONCURRENTLY to keep the tables writable, except on
+a partitioned connection_run_logs, where Postgres does not support it.
+"""
+from typing import Sequence
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def has_column(table: str, column: str) -> bool:
+    return column in {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def is_partitioned(table: str) -> bool:
+    return op.get_bind().execute(sa.text(
+        "SELECT EXISTS (SELECT FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+    ), {"table": table}).scalar()
+
+
+def enum_type(name: str, *values: str) -> postgresql.ENUM:
+    """
+    Creates a Postgres enum type unless it exists.
+
+    Returns:
+        ENUM: The type, for columns that must not create it again.
+    """
+    enum = postgresql.ENUM(*values, name=name, create_type=False)
+    enum.create(op.get_bind(), checkfirst=True)
+    return enum
+
+
+def add_column(table: str, column: sa.Column) -> None:
+    if not has_column(table, column.name):
+        op.add_column(table, column)
+
+
+def create_index_online(name: str, table: str, columns: Sequence[str], **kwargs) -> None:
+    """
+    Creates an index without blocking writes to the table, unless it exists.
+
+    An invalid index left behind by an interrupted concurrent build is dropped
+    and built again.
+    """
+    bind = op.get_bind()
+    invalid = bind.execute(sa.text(
+        "SELECT EXISTS (SELECT FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid)"
+    ), {"name": name}).scalar()
+    if is_partitioned(table):
+        op.create_index(name, table, columns, if_not_exists=True, **kwargs)
+        return
+    with op.get_context().autocommit_block():
+        if invalid:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(name, table, columns, if_not_exists=True,
+                        postgresql_concurrently=True, **kwargs)
+
+
+def drop_index_online(name: str, table: str) -> None:
+    if is_partitioned(table):
+        op.drop_index(name, table_name=table, if_exists=True)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,146 @@
+"""Baseline schema
+
+The tables of the dat API before it had migrations. Databases that already
+have them are adopted as they are; empty databases get them created.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.migrations.helpers import enum_type, has_table
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _id_column() -> sa.Column:
+    return sa.Column('id', sa.String(36), primary_key=True, nullable=False,
+                     server_default=sa.text('uuid_generate_v4()'))
+
+
+def _timestamps() -> list:
+    return [
+        sa.Column('created_at', sa.DateTime, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime, server_default=sa.func.now()),
+    ]
+
+
+def upgrade() -> None:
+    op.execute("""
+        DO $$ BEGIN
+            IF to_regproc('uuid_generate_v4') IS NULL THEN
+                CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+            END IF;
+        END $$
+    """)
+
+    if not has_table('organizations'):
+        op.create_table(
+            'organizations',
+            _id_column(),
+            sa.Column('name', sa.String(50), nullable=False),
+            sa.Column('status', enum_type('organizations_status_enum', 'active', 'inactive'),
+                      server_default='active', nullable=False),
+            *_timestamps(),
+        )
+
+    if not has_table('users'):
+        op.create_table(
+            'users',
+            _id_column(),
+            sa.Column('email', sa.String(255), nullable=False, unique=True),
+            sa.Column('password_hash', sa.String(255), nullable=False),
+            *_timestamps(),
+        )
+
+    if not has_table('workspaces'):
+        op.create_table(
+            'workspaces',
+            _id_column(),
+            sa.Column('organization_id', sa.String(36), sa.ForeignKey('organizations.id'), nullable=False),
+            sa.Column('name', sa.String(50), nullable=False),
+            sa.Column('status', enum_type('workspaces_status_enum', 'active', 'inactive'),
+                      server_default='active', nullable=False),
+            *_timestamps(),
+        )
+
+    if not has_table('workspace_users'):
+        op.create_table(
+            'workspace_users',
+            _id_column(),
+            sa.Column('workspace_id', sa.String(36), sa.ForeignKey('workspaces.id'), nullable=False),
+            sa.Column('user_id', sa.String(36), sa.ForeignKey('users.id'), nullable=False),
+            *_timestamps(),
+        )
+
+    if not has_table('actors'):
+        op.create_table(
+            'actors',
+            _id_column(),
+            sa.Column('name', sa.String(255), nullable=False),
+            sa.Column('module_name', sa.String(255), nullable=False),
+            sa.Column('icon', sa.String(255)),
+            sa.Column('actor_type', enum_type('actor_type_enum', 'source', 'destination', 'generator'),
+                      nullable=False),
+            sa.Column('status', enum_type('actor_status_enum', 'active', 'inactive'), nullable=False),
+            *_timestamps(),
+        )
+
+    if not has_table('actor_instances'):
+        op.create_table(
+            'actor_instances',
+            _id_column(),
+            sa.Column('workspace_id', sa.String(36), sa.ForeignKey('workspaces.id'), nullable=False),
+            sa.Column('actor_id', sa.String(36), sa.ForeignKey('actors.id'), nullable=False),
+            sa.Column('name', sa.String(255)),
+            sa.Column('configuration', sa.JSON),
+            sa.Column('actor_type', enum_type('actor_instances_actor_type_enum',
+                                              'source', 'destination', 'generator'), nullable=False),
+            sa.Column('user_id', sa.String(50)),
+            sa.Column('status', enum_type('actor_instances_status_enum', 'active', 'inactive'),
+                      server_default='active', nullable=False),
+            *_timestamps(),
+        )
+
+    if not has_table('connections'):
+        op.create_table(
+            'connections',
+            _id_column(),
+            sa.Column('workspace_id', sa.String(36), sa.ForeignKey('workspaces.id'), nullable=False),
+            sa.Column('source_instance_id', sa.String(36), sa.ForeignKey('actor_instances.id'), nullable=False),
+            sa.Column('generator_instance_id', sa.String(36), sa.ForeignKey('actor_instances.id'), nullable=False),
+            sa.Column('destination_instance_id', sa.String(36), sa.ForeignKey('actor_instances.id'), nullable=False),
+            sa.Column('name', sa.String(255)),
+            sa.Column('namespace_format', sa.String(255)),
+            sa.Column('prefix', sa.String(255)),
+            sa.Column('configuration', sa.JSON),
+            sa.Column('catalog', sa.JSON),
+            sa.Column('schedule', sa.JSON),
+            sa.Column('schedule_type', enum_type('schedule_type_enum', 'manual', 'scheduled'),
+                      server_default='manual', nullable=False),
+            sa.Column('status', enum_type('connection_status_enum', 'active', 'inactive'),
+                      server_default='active', nullable=False),
+            *_timestamps(),
+        )
+
+    if not has_table('connection_run_logs'):
+        op.create_table(
+            'connection_run_logs',
+            _id_column(),
+            sa.Column('connection_id', sa.String(36), sa.ForeignKey('connections.id'), nullable=False),
+            sa.Column('message', sa.String, nullable=False),
+            sa.Column('stack_trace', sa.Text),
+            sa.Column('created_at', sa.DateTime),
+            sa.Column('updated_at', sa.DateTime),
+            sa.Column('run_id', sa.String(36), nullable=False),
+            sa.Column('message_type', enum_type('messagetype', 'STATE', 'LOG'), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    # The baseline tables predate the migrations and are never dropped by them
+    pass
@@ -0,0 +1,44 @@
+"""Connection run rollup
+
+connection_runs holds one row per run, maintained as its logs are ingested,
+so /agg-run-logs reads a page of runs instead of grouping every log line.
+Run `python -m app.manage backfill-connection-runs` afterwards to fill it
+from the logs already stored.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.migrations.helpers import enum_type, has_table
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+RUN_STATUSES = ('QUEUED', 'RUNNING', 'SUCCESS', 'FAILURE', 'PARTIAL_SUCCESS')
+
+
+def upgrade() -> None:
+    status_enum = enum_type('connection_runs_status_enum', *RUN_STATUSES)
+    if not has_table('connection_runs'):
+        op.create_table(
+            'connection_runs',
+            sa.Column('run_id', sa.String(36), primary_key=True, nullable=False),
+            sa.Column('connection_id', sa.String(36), sa.ForeignKey('connections.id'), nullable=False),
+            sa.Column('start_time', sa.DateTime, nullable=False),
+            sa.Column('end_time', sa.DateTime),
+            sa.Column('status', status_enum, nullable=False, server_default='RUNNING'),
+            sa.Column('records_updated', sa.BigInteger, nullable=False, server_default='0'),
+            sa.Column('error_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('log_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime),
+            sa.Column('updated_at', sa.DateTime),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('connection_runs')
+    op.execute('DROP TYPE IF EXISTS connection_runs_status_enum')
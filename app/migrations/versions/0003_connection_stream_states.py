@@ -0,0 +1,37 @@
+"""Latest stream state checkpoints
+
+connection_stream_states keeps the latest STATE message of each stream of a
+connection, upserted as states are ingested. Run
+`python -m app.manage backfill-stream-states` afterwards to fill it from the
+logs already stored.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.migrations.helpers import has_table
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_table('connection_stream_states'):
+        op.create_table(
+            'connection_stream_states',
+            sa.Column('connection_id', sa.String(36), sa.ForeignKey('connections.id'),
+                      primary_key=True, nullable=False),
+            sa.Column('stream_name', sa.String(255), primary_key=True, nullable=False),
+            sa.Column('stream_state', sa.JSON, nullable=False),
+            sa.Column('emitted_at', sa.DateTime, nullable=False),
+            sa.Column('run_id', sa.String(36), nullable=False),
+            sa.Column('updated_at', sa.DateTime),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('connection_stream_states')
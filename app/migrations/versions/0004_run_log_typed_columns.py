@@ -0,0 +1,48 @@
+"""Typed run log columns
+
+Adds emitted_at, level, stream and n_docs_processed to connection_run_logs,
+extracted from the message at ingest, and the indexes sorting and filtering
+on them. The columns are nullable, so adding them does not rewrite the table;
+the indexes are built concurrently. Run
+`python -m app.manage backfill-run-log-columns` afterwards to fill them for
+older logs.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.migrations.helpers import add_column, create_index_online, drop_index_online, enum_type
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+LOG_LEVELS = ('FATAL', 'ERROR', 'WARN', 'INFO', 'DEBUG', 'TRACE')
+
+RUN_LOG_INDEXES = (
+    ('ix_connection_run_logs_run_id_emitted_at', ['run_id', 'emitted_at']),
+    ('ix_connection_run_logs_connection_id_emitted_at', ['connection_id', 'emitted_at']),
+    ('ix_connection_run_logs_connection_id_level', ['connection_id', 'level']),
+    ('ix_connection_run_logs_run_id_stream', ['run_id', 'stream']),
+)
+
+
+def upgrade() -> None:
+    level_enum = enum_type('connection_run_logs_level_enum', *LOG_LEVELS)
+    add_column('connection_run_logs', sa.Column('emitted_at', sa.DateTime))
+    add_column('connection_run_logs', sa.Column('level', level_enum))
+    add_column('connection_run_logs', sa.Column('stream', sa.String(255)))
+    add_column('connection_run_logs', sa.Column('n_docs_processed', sa.Integer))
+    for name, columns in RUN_LOG_INDEXES:
+        create_index_online(name, 'connection_run_logs', columns)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(RUN_LOG_INDEXES):
+        drop_index_online(name, 'connection_run_logs')
+    for column in ('n_docs_processed', 'stream', 'level', 'emitted_at'):
+        op.drop_column('connection_run_logs', column)
+    op.execute('DROP TYPE IF EXISTS connection_run_logs_level_enum')
@@ -0,0 +1,38 @@
+"""Per-stream run rollup
+
+Adds n_docs_fetched to connection_run_logs and the connection_run_streams
+rollup of the documents fetched and records updated per run and stream. Run
+`python -m app.manage backfill-run-log-columns`, then
+`backfill-connection-runs` afterwards to fill them for older logs.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.migrations.helpers import add_column, has_table
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    add_column('connection_run_logs', sa.Column('n_docs_fetched', sa.Integer))
+    if not has_table('connection_run_streams'):
+        op.create_table(
+            'connection_run_streams',
+            sa.Column('run_id', sa.String(36), primary_key=True, nullable=False),
+            sa.Column('stream', sa.String(255), primary_key=True, nullable=False),
+            sa.Column('connection_id', sa.String(36), sa.ForeignKey('connections.id'), nullable=False),
+            sa.Column('docs_fetched', sa.BigInteger, nullable=False, server_default='0'),
+            sa.Column('records_updated', sa.BigInteger, nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('connection_run_streams')
+    op.drop_column('connection_run_logs', 'n_docs_fetched')
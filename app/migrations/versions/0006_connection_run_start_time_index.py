@@ -0,0 +1,26 @@
+"""Run pages by start time
+
+Indexes connection_runs by (connection_id, start_time, run_id), the order of
+the run pages of /agg-run-logs and the workspace dashboard. Built
+concurrently, without blocking writes.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from app.migrations.helpers import create_index_online, drop_index_online
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+INDEX = 'ix_connection_runs_connection_id_start_time'
+
+
+def upgrade() -> None:
+    create_index_online(INDEX, 'connection_runs', ['connection_id', 'start_time', 'run_id'])
+
+
+def downgrade() -> None:
+    drop_index_online(INDEX, 'connection_runs')
@@ -0,0 +1,33 @@
+"""Run log full-text search
+
+Adds the generated search_vector of connection_run_logs and its GIN index.
+Adding a stored generated column rewrites the table under an exclusive lock;
+plan it for a quiet window on large tables. The index is built concurrently.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from app.migrations.helpers import add_column, create_index_online, drop_index_online
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = "to_tsvector('simple', coalesce(message, '') || ' ' || coalesce(stack_trace, ''))"
+INDEX = 'ix_connection_run_logs_search_vector'
+
+
+def upgrade() -> None:
+    add_column('connection_run_logs', sa.Column(
+        'search_vector', postgresql.TSVECTOR, sa.Computed(SEARCH_VECTOR, persisted=True)))
+    create_index_online(INDEX, 'connection_run_logs', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    drop_index_online(INDEX, 'connection_run_logs')
+    op.drop_column('connection_run_logs', 'search_vector')
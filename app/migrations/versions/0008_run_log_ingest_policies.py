@@ -0,0 +1,47 @@
+"""Run log ingest policies
+
+Adds run_log_ingest_policies, the level filter, sampling rates and line budget
+of a workspace or a connection, and connection_runs.dropped_count, the lines
+of a run the policy did not store.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.migrations.helpers import add_column, enum_type, has_table
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+LOG_LEVELS = ('FATAL', 'ERROR', 'WARN', 'INFO', 'DEBUG', 'TRACE')
+
+
+def upgrade() -> None:
+    level_enum = enum_type('connection_run_logs_level_enum', *LOG_LEVELS)
+    add_column('connection_runs', sa.Column(
+        'dropped_count', sa.BigInteger, nullable=False, server_default='0'))
+
+    if not has_table('run_log_ingest_policies'):
+        op.create_table(
+            'run_log_ingest_policies',
+            sa.Column('id', sa.String(36), primary_key=True, nullable=False,
+                      server_default=sa.text('uuid_generate_v4()')),
+            sa.Column('workspace_id', sa.String(36), sa.ForeignKey('workspaces.id'), unique=True),
+            sa.Column('connection_id', sa.String(36), sa.ForeignKey('connections.id'), unique=True),
+            sa.Column('min_level', level_enum),
+            sa.Column('sample_rates', sa.JSON),
+            sa.Column('max_lines_per_run', sa.Integer),
+            sa.Column('created_at', sa.DateTime, server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime, server_default=sa.func.now()),
+            sa.CheckConstraint('(workspace_id IS NULL) <> (connection_id IS NULL)',
+                               name='ck_run_log_ingest_policies_scope'),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('run_log_ingest_policies')
+    op.drop_column('connection_runs', 'dropped_count')
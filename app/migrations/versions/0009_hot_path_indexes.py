@@ -0,0 +1,45 @@
+"""Indexes of the hot query paths
+
+Composite indexes matching the router filters and sort orders, declared with
+the models' `__query_patterns__`:
+    - connections: workspace listing newest first, and lookups by each actor instance
+    - actor_instances: active instances of a type in a workspace, newest first
+    - workspace_users and workspaces: lookups by workspace, user and organization
+    - connection_run_logs: STATE scans of a connection
+
+All are built concurrently, without blocking writes.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from app.migrations.helpers import create_index_online, drop_index_online
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_connections_workspace_id_created_at', 'connections', ['workspace_id', 'created_at']),
+    ('ix_connections_source_instance_id', 'connections', ['source_instance_id']),
+    ('ix_connections_generator_instance_id', 'connections', ['generator_instance_id']),
+    ('ix_connections_destination_instance_id', 'connections', ['destination_instance_id']),
+    ('ix_actor_instances_workspace_id_actor_type_status_created_at', 'actor_instances',
+     ['workspace_id', 'actor_type', 'status', 'created_at']),
+    ('ix_workspace_users_workspace_id', 'workspace_users', ['workspace_id']),
+    ('ix_workspace_users_user_id', 'workspace_users', ['user_id']),
+    ('ix_workspaces_organization_id', 'workspaces', ['organization_id']),
+    ('ix_connection_run_logs_connection_id_message_type', 'connection_run_logs',
+     ['connection_id', 'message_type']),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        create_index_online(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        drop_index_online(name, table)
@@ -0,0 +1,142 @@
+"""Native uuid ids
+
+Changes the ids and foreign keys of every table from varchar(36) to the
+16-byte uuid type, halving the size of their keys, indexes and join columns.
+Run ids stay text: the workers generate them and they are not always uuids.
+
+The foreign keys are dropped for the conversion and added back NOT VALID, then
+validated without blocking writes. The tables are rewritten under an
+exclusive lock, except connection_run_logs when it was prepared online with
+`python -m app.manage prepare-run-log-uuids`: its backfilled uuid columns are
+then swapped in, which only takes a short lock. Run that command first on
+large deployments.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.migrations.helpers import has_column, is_partitioned
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+UUID_COLUMNS = {
+    'organizations': ('id',),
+    'users': ('id',),
+    'workspaces': ('id', 'organization_id'),
+    'workspace_users': ('id', 'workspace_id', 'user_id'),
+    'actors': ('id',),
+    'actor_instances': ('id', 'workspace_id', 'actor_id'),
+    'connections': ('id', 'workspace_id', 'source_instance_id',
+                    'generator_instance_id', 'destination_instance_id'),
+    'connection_run_logs': ('id', 'connection_id'),
+    'connection_runs': ('connection_id',),
+    'connection_run_streams': ('connection_id',),
+    'connection_stream_states': ('connection_id',),
+    'run_log_ingest_policies': ('id', 'workspace_id', 'connection_id'),
+}
+# Set by `prepare-run-log-uuids`, see app.services.connection_run_logs.uuid_keys
+RUN_LOGS = 'connection_run_logs'
+RUN_LOG_SHADOW_INDEXES = (
+    'ix_connection_run_logs_connection_id_emitted_at',
+    'ix_connection_run_logs_connection_id_level',
+    'ix_connection_run_logs_connection_id_message_type',
+)
+
+
+def _drop_foreign_keys() -> list:
+    '''Drops the foreign keys of the converted tables and returns their definitions'''
+    inspector = sa.inspect(op.get_bind())
+    foreign_keys = []
+    for table in UUID_COLUMNS:
+        for foreign_key in inspector.get_foreign_keys(table):
+            op.drop_constraint(foreign_key['name'], table, type_='foreignkey')
+            foreign_keys.append((table, foreign_key))
+    return foreign_keys
+
+
+def _restore_foreign_keys(foreign_keys: list) -> None:
+    validate = []
+    for table, foreign_key in foreign_keys:
+        # Postgres cannot add a NOT VALID foreign key to a partitioned table
+        not_valid = not is_partitioned(table)
+        op.create_foreign_key(
+            foreign_key['name'], table, foreign_key['referred_table'],
+            foreign_key['constrained_columns'], foreign_key['referred_columns'],
+            postgresql_not_valid=not_valid)
+        if not_valid:
+            validate.append((table, foreign_key['name']))
+    with op.get_context().autocommit_block():
+        for table, name in validate:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def _alter_columns(table: str, columns, type_: str, cast: str) -> None:
+    '''Changes the type of the columns of a table in a single rewrite'''
+    clauses = []
+    for column in columns:
+        if column == 'id':
+            clauses.append("ALTER COLUMN id DROP DEFAULT")
+        clauses.append(f"ALTER COLUMN {column} TYPE {type_} USING {column}::{cast}")
+        if column == 'id':
+            clauses.append("ALTER COLUMN id SET DEFAULT uuid_generate_v4()")
+    op.execute(f"ALTER TABLE {table} {', '.join(clauses)}")
+
+
+def _prepared_run_logs() -> bool:
+    '''Whether prepare-run-log-uuids backfilled connection_run_logs completely'''
+    if not has_column(RUN_LOGS, 'id_uuid'):
+        return False
+    validated = op.get_bind().execute(sa.text(
+        "SELECT count(*) FROM pg_constraint WHERE conrelid = to_regclass(:table) "
+        "AND conname = ANY(:names) AND convalidated"
+    ), {"table": RUN_LOGS, "names": [f'{RUN_LOGS}_id_uuid_not_null', f'{RUN_LOGS}_connection_id_uuid_not_null']}
+    ).scalar()
+    if validated != 2:
+        raise RuntimeError(
+            f"{RUN_LOGS} has partially prepared uuid columns, "
+            f"finish `python -m app.manage prepare-run-log-uuids` before migrating")
+    return True
+
+
+def _swap_run_log_columns() -> None:
+    op.execute(f"LOCK TABLE {RUN_LOGS} IN ACCESS EXCLUSIVE MODE")
+    op.execute(f"DROP TRIGGER IF EXISTS {RUN_LOGS}_uuid_sync ON {RUN_LOGS}")
+    op.execute(f"DROP FUNCTION IF EXISTS {RUN_LOGS}_uuid_sync()")
+    # Drops the primary key and the text indexes along with the columns
+    op.execute(f"ALTER TABLE {RUN_LOGS} DROP COLUMN id, DROP COLUMN connection_id")
+    for column in ('id', 'connection_id'):
+        op.execute(f"ALTER TABLE {RUN_LOGS} RENAME COLUMN {column}_uuid TO {column}")
+    # The validated CHECK constraints let SET NOT NULL skip the table scan
+    op.execute(
+        f"ALTER TABLE {RUN_LOGS} ALTER COLUMN id SET NOT NULL, ALTER COLUMN connection_id SET NOT NULL, "
+        f"ALTER COLUMN id SET DEFAULT uuid_generate_v4()")
+    op.execute(
+        f"ALTER TABLE {RUN_LOGS} DROP CONSTRAINT {RUN_LOGS}_id_uuid_not_null, "
+        f"DROP CONSTRAINT {RUN_LOGS}_connection_id_uuid_not_null")
+    op.execute(
+        f"ALTER TABLE {RUN_LOGS} ADD CONSTRAINT {RUN_LOGS}_pkey PRIMARY KEY USING INDEX {RUN_LOGS}_id_uuid_key")
+    for name in RUN_LOG_SHADOW_INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name}_uuid RENAME TO {name}")
+
+
+def upgrade() -> None:
+    swap_run_logs = not is_partitioned(RUN_LOGS) and _prepared_run_logs()
+    foreign_keys = _drop_foreign_keys()
+    for table, columns in UUID_COLUMNS.items():
+        if table == RUN_LOGS and swap_run_logs:
+            _swap_run_log_columns()
+        else:
+            _alter_columns(table, columns, 'uuid', 'uuid')
+    _restore_foreign_keys(foreign_keys)
+
+
+def downgrade() -> None:
+    foreign_keys = _drop_foreign_keys()
+    for table, columns in UUID_COLUMNS.items():
+        _alter_columns(table, columns, 'varchar(36)', 'text')
+    _restore_foreign_keys(foreign_keys)
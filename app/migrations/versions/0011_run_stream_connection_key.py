@@ -0,0 +1,60 @@
+"""Connection in the key of connection_run_streams
+
+Run ids are generated by the workers and are not unique across connections,
+so the per-stream rollup is keyed by (connection_id, run_id, stream) instead
+of (run_id, stream). The new primary key index is built concurrently and then
+swapped in, which only takes a short lock.
+
+Counts of the same run id and stream in different connections were merged
+into one row before; run `python -m app.manage backfill-connection-runs`
+afterwards to rebuild them from the logs.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+from app.migrations.helpers import create_index_online
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+TABLE = 'connection_run_streams'
+PRIMARY_KEY = f'{TABLE}_pkey'
+# Becomes the primary key, under its name
+PRIMARY_KEY_INDEX = f'{TABLE}_connection_id_run_id_stream_key'
+LEGACY_PRIMARY_KEY_INDEX = f'{TABLE}_run_id_stream_key'
+
+
+def _swap_primary_key(index: str) -> None:
+    op.execute(
+        f"ALTER TABLE {TABLE} DROP CONSTRAINT {PRIMARY_KEY}, "
+        f"ADD CONSTRAINT {PRIMARY_KEY} PRIMARY KEY USING INDEX {index}")
+
+
+def upgrade() -> None:
+    create_index_online(PRIMARY_KEY_INDEX, TABLE, ['connection_id', 'run_id', 'stream'], unique=True)
+    _swap_primary_key(PRIMARY_KEY_INDEX)
+
+
+def downgrade() -> None:
+    # Merge the rows of a run id and stream into the one of the lowest connection id
+    op.execute(f"""
+        UPDATE {TABLE} kept SET docs_fetched = merged.docs_fetched, records_updated = merged.records_updated
+        FROM (
+            SELECT run_id, stream, sum(docs_fetched) AS docs_fetched, sum(records_updated) AS records_updated
+            FROM {TABLE} GROUP BY run_id, stream HAVING count(*) > 1
+        ) merged
+        WHERE kept.run_id = merged.run_id AND kept.stream = merged.stream AND NOT EXISTS (
+            SELECT FROM {TABLE} other WHERE other.run_id = kept.run_id AND other.stream = kept.stream
+            AND other.connection_id < kept.connection_id)
+    """)
+    op.execute(f"""
+        DELETE FROM {TABLE} duplicate USING {TABLE} kept
+        WHERE duplicate.run_id = kept.run_id AND duplicate.stream = kept.stream
+        AND duplicate.connection_id > kept.connection_id
+    """)
+    create_index_online(LEGACY_PRIMARY_KEY_INDEX, TABLE, ['run_id', 'stream'], unique=True)
+    _swap_primary_key(LEGACY_PRIMARY_KEY_INDEX)
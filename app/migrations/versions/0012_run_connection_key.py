@@ -0,0 +1,65 @@
+"""Connection in the key of connection_runs
+
+Run ids are generated by the workers and are not unique across connections,
+so the run rollup is keyed by (connection_id, run_id) instead of run_id. The
+new primary key index is built concurrently and then swapped in, which only
+takes a short lock.
+
+Runs of the same run id in different connections were merged into the row
+of the connection that wrote first; run
+`python -m app.manage backfill-connection-runs` afterwards to rebuild them
+from the logs.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+from alembic import op
+from app.migrations.helpers import create_index_online
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+TABLE = 'connection_runs'
+PRIMARY_KEY = f'{TABLE}_pkey'
+# Becomes the primary key, under its name
+PRIMARY_KEY_INDEX = f'{TABLE}_connection_id_run_id_key'
+LEGACY_PRIMARY_KEY_INDEX = f'{TABLE}_run_id_key'
+
+
+def _swap_primary_key(index: str) -> None:
+    op.execute(
+        f"ALTER TABLE {TABLE} DROP CONSTRAINT {PRIMARY_KEY}, "
+        f"ADD CONSTRAINT {PRIMARY_KEY} PRIMARY KEY USING INDEX {index}")
+
+
+def upgrade() -> None:
+    create_index_online(PRIMARY_KEY_INDEX, TABLE, ['connection_id', 'run_id'], unique=True)
+    _swap_primary_key(PRIMARY_KEY_INDEX)
+
+
+def downgrade() -> None:
+    # Merge the rows of a run id into the one of the lowest connection id
+    op.execute(f"""
+        UPDATE {TABLE} kept SET
+            start_time = merged.start_time, end_time = merged.end_time,
+            records_updated = merged.records_updated, error_count = merged.error_count,
+            log_count = merged.log_count, dropped_count = merged.dropped_count
+        FROM (
+            SELECT run_id, min(start_time) AS start_time, max(end_time) AS end_time,
+                sum(records_updated) AS records_updated, sum(error_count) AS error_count,
+                sum(log_count) AS log_count, sum(dropped_count) AS dropped_count
+            FROM {TABLE} GROUP BY run_id HAVING count(*) > 1
+        ) merged
+        WHERE kept.run_id = merged.run_id AND NOT EXISTS (
+            SELECT FROM {TABLE} other WHERE other.run_id = kept.run_id
+            AND other.connection_id < kept.connection_id)
+    """)
+    op.execute(f"""
+        DELETE FROM {TABLE} duplicate USING {TABLE} kept
+        WHERE duplicate.run_id = kept.run_id AND duplicate.connection_id > kept.connection_id
+    """)
+    create_index_online(LEGACY_PRIMARY_KEY_INDEX, TABLE, ['run_id'], unique=True)
+    _swap_primary_key(LEGACY_PRIMARY_KEY_INDEX)
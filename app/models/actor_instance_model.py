@@ -1,13 +1,14 @@
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel, root_validator
 from ..models.actor_model import ActorResponse
+from .ids import UUIDStr
 
 
 ConnectorSpecificationConnectionSpec = Dict[str, Any]
 
 
 class ActorInstanceBase(BaseModel):
-    actor_id: str
+    actor_id: UUIDStr
     user_id: str
     name: str
     actor_type: str
@@ -20,7 +21,7 @@ class ActorInstancePostRequest(ActorInstanceBase):
 
 
 class ActorInstancePutRequest(BaseModel):
-    actor_id: Optional[str] = None
+    actor_id: Optional[UUIDStr] = None
     user_id: Optional[str] = None
     name: Optional[str] = None
     actor_type: Optional[str] = None
@@ -29,8 +30,8 @@ class ActorInstancePutRequest(BaseModel):
 
 
 class ActorInstanceResponse(ActorInstanceBase):
-    id: str
-    workspace_id: str
+    id: UUIDStr
+    workspace_id: UUIDStr
     actor: ActorResponse = None
     connected_connections: List[object] = []
 
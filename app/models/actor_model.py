@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from .ids import UUIDStr
 
 
 class ActorBase(BaseModel):
@@ -20,4 +21,4 @@ class ActorPutRequest(BaseModel):
     status: str = "active"
 
 class ActorResponse(ActorBase):
-    id: str
\ No newline at end of file
+    id: UUIDStr
\ No newline at end of file
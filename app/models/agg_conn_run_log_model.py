@@ -1,7 +1,8 @@
 import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
+from .ids import UUIDStr
 
 
 class AggConnRunLogRunRecordsPerStream(BaseModel):
@@ -29,15 +30,61 @@ class AggConnRunLogRuns(BaseModel):
     # docs_size_human_readable: str
     # docs_fetched: int
     records_updated: int
-    # records_per_stream: List[AggConnRunLogRunRecordsPerStream]
+    records_per_stream: List[AggConnRunLogRunRecordsPerStream] = []
 
 
 class AggConnRunLogResponse(BaseModel):
 
-    connection_id: str
+    connection_id: UUIDStr
+    total_runs: Optional[int] = None
+    page_size: Optional[int] = None
+    from_datetime: Optional[datetime.datetime] = None
+    to_datetime: Optional[datetime.datetime] = None
+    next_cursor: Optional[str] = None
+    runs: List[AggConnRunLogRuns]
+
+
+class WorkspaceAggConnRunLogConnection(BaseModel):
+
+    connection_id: UUIDStr
+    name: Optional[str] = None
     total_runs: int
-    # current_page: int
-    # page_size: int
-    # from_datetime: datetime.datetime
-    # to_datetime: datetime.datetime
+    status_counts: Dict[str, int]
     runs: List[AggConnRunLogRuns]
+
+
+class WorkspaceAggConnRunLogResponse(BaseModel):
+
+    workspace_id: UUIDStr
+    runs_per_connection: int
+    from_datetime: Optional[datetime.datetime] = None
+    connections: List[WorkspaceAggConnRunLogConnection]
+
+
+class ConnRunStats(BaseModel):
+
+    runs: int
+    finished_runs: int
+    failed_runs: int
+    partial_success_runs: int
+    failure_rate: Optional[float] = None
+    duration_p50: Optional[float] = None
+    duration_p95: Optional[float] = None
+    duration_p99: Optional[float] = None
+    records_updated: int
+    docs_per_second: Optional[float] = None
+
+
+class ConnRunStatsBucket(ConnRunStats):
+
+    bucket_start: datetime.datetime
+
+
+class ConnRunStatsResponse(BaseModel):
+
+    connection_id: UUIDStr
+    from_datetime: datetime.datetime
+    to_datetime: datetime.datetime
+    bucket: str
+    overall: ConnRunStats
+    buckets: List[ConnRunStatsBucket]
@@ -5,6 +5,7 @@ from dat_core.pydantic_models import (
     Connection as ConnectionPdModel
 )
 from .actor_instance_model import ActorInstanceResponse
+from .ids import UUIDStr
 
 class Cron(BaseModel):
     cron_expression: str
@@ -20,9 +21,9 @@ class ConnectionExtraAttributes(BaseModel):
     destination_instance: ActorInstanceResponse
 
 class ConnectionBase(BaseModel):
-    source_instance_id: str
-    generator_instance_id: str
-    destination_instance_id: str
+    source_instance_id: UUIDStr
+    generator_instance_id: UUIDStr
+    destination_instance_id: UUIDStr
     # workspace_id: str
     name: str
     namespace_format: str = "${SOURCE_NAMESPACE}"
@@ -35,14 +36,14 @@ class ConnectionBase(BaseModel):
 
 
 class ConnectionResponse(ConnectionBase, ConnectionExtraAttributes):
-    id: str
-    workspace_id: str
+    id: UUIDStr
+    workspace_id: UUIDStr
 
 class ConnectionPostRequest(ConnectionBase):
     pass
 
 class ConnectionPutRequest(BaseModel):
-    source_instance_id: str # needed to load CatalogClass to validate catalog
+    source_instance_id: UUIDStr # needed to load CatalogClass to validate catalog
     name: Optional[str] = None
     namespace_format: Optional[str] = None
     prefix: Optional[str] = None
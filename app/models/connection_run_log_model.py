@@ -1,13 +1,43 @@
 import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
+from .ids import UUIDStr
 
 class ConnectionRunLogResponse(BaseModel):
 
-    connection_id: str
+    connection_id: UUIDStr
     message: str
     stack_trace: Optional[str] = None
     created_at: datetime.datetime
     updated_at: datetime.datetime
     run_id: str
-    message_type: str
\ No newline at end of file
+    message_type: str
+    emitted_at: Optional[datetime.datetime] = None
+    level: Optional[str] = None
+    stream: Optional[str] = None
+    n_docs_processed: Optional[int] = None
+    n_docs_fetched: Optional[int] = None
+
+class ConnectionRunLogBatchLineResult(BaseModel):
+    line: int
+    accepted: bool
+    error: Optional[str] = None
+
+
+class ConnectionRunLogBatchResponse(BaseModel):
+    connection_id: UUIDStr
+    run_id: str
+    accepted: int
+    rejected: int
+    # Accepted lines not stored because of the run log ingest policy
+    dropped: int = 0
+    results: List[ConnectionRunLogBatchLineResult]
+
+class ConnectionRunLogSearchResult(ConnectionRunLogResponse):
+    id: UUIDStr
+    rank: float
+
+class ConnectionRunLogSearchResponse(BaseModel):
+    query: str
+    results: List[ConnectionRunLogSearchResult]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,23 @@
+from uuid import UUID
+from pydantic_core import core_schema
+
+
+def _canonical_uuid(value: str) -> str:
+    return str(UUID(value))
+
+
+class UUIDStr(str):
+    '''
+    An id of a native uuid column, validated and kept as its canonical string.
+
+    Usable in models and as a path or query parameter: malformed ids are
+    rejected with a 422 before they reach the database.
+    '''
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        return core_schema.no_info_after_validator_function(_canonical_uuid, core_schema.str_schema())
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {**handler(schema), 'format': 'uuid'}
@@ -1,13 +1,14 @@
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel
+from .ids import UUIDStr
 
 class OrganizationBase(BaseModel):
     name: str
     status: str
 
 class OrganizationResponse(OrganizationBase):
-    id: str
+    id: UUIDStr
     created_at: datetime
     updated_at: datetime
 
@@ -0,0 +1,25 @@
+from typing import Annotated, Dict, Literal, Optional
+from pydantic import BaseModel, Field
+from .ids import UUIDStr
+
+
+LogLevelName = Literal['FATAL', 'ERROR', 'WARN', 'INFO', 'DEBUG', 'TRACE']
+SampleRate = Annotated[float, Field(ge=0, le=1)]
+
+
+class RunLogIngestPolicyBase(BaseModel):
+    min_level: Optional[LogLevelName] = None
+    sample_rates: Optional[Dict[LogLevelName, SampleRate]] = None
+    max_lines_per_run: Optional[int] = Field(None, ge=0)
+
+class RunLogIngestPolicyResponse(RunLogIngestPolicyBase):
+    id: UUIDStr
+    workspace_id: Optional[UUIDStr] = None
+    connection_id: Optional[UUIDStr] = None
+
+class RunLogIngestPolicyPostRequest(RunLogIngestPolicyBase):
+    workspace_id: Optional[UUIDStr] = None
+    connection_id: Optional[UUIDStr] = None
+
+class RunLogIngestPolicyPutRequest(RunLogIngestPolicyBase):
+    pass
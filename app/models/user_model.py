@@ -1,6 +1,7 @@
 from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
+from .ids import UUIDStr
 
 class UserBase(BaseModel):
     email: str
@@ -9,4 +10,4 @@ class UserBase(BaseModel):
     updated_at: datetime
 
 class UserResponse(UserBase):
-    id: str
+    id: UUIDStr
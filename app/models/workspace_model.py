@@ -1,19 +1,20 @@
 from pydantic import BaseModel
 from typing import Optional
+from .ids import UUIDStr
 
 
 class WorkspaceBase(BaseModel):
-    organization_id: str
+    organization_id: UUIDStr
     name: str
     status: str
 
 class WorkspaceResponse(WorkspaceBase):
-    id: str
+    id: UUIDStr
 
 class WorkspacePostRequest(WorkspaceBase):
     pass
 
 class WorkspacePutRequest(BaseModel):
-    organization_id: Optional[str] = None
+    organization_id: Optional[UUIDStr] = None
     name: Optional[str] = None
     status: Optional[str] = None
@@ -2,21 +2,22 @@ from pydantic import BaseModel
 from typing import Optional, Dict
 from .user_model import UserResponse
 from .workspace_model import WorkspaceResponse
+from .ids import UUIDStr
 
 
 class WorkspaceUserExtraAttributes(BaseModel):
     user: UserResponse
 
 class WorkspaceUserBase(BaseModel):
-    workspace_id: str
-    user_id: str
+    workspace_id: UUIDStr
+    user_id: UUIDStr
 
 class WorkspaceUserResponse(WorkspaceUserBase, WorkspaceUserExtraAttributes):
-    id: str
+    id: UUIDStr
 
 class WorkspaceUserPostRequest(WorkspaceUserBase):
     pass
 
 class WorkspaceUserPutRequest(BaseModel):
-    workspace_id: Optional[str] = None
-    user_id: Optional[str] = None
+    workspace_id: Optional[UUIDStr] = None
+    user_id: Optional[UUIDStr] = None
@@ -8,6 +8,8 @@ from fastapi import (
 from importlib import import_module
 from typing import List, Optional
 from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from minio import Minio
 from minio.error import S3Error
 from tempfile import NamedTemporaryFile
@@ -15,38 +17,31 @@ from dat_core.pydantic_models.connector_specification import ConnectorSpecificat
 from app.db_models.actors import Actor as ActorModel
 from app.db_models.actor_instances import ActorInstance as ActorInstanceModel
 from app.db_models.connections import Connection as ConnectionModel
-from app.database import get_db
+from app.database import get_async_db
 from app.models.actor_instance_model import (
     ActorInstanceResponse, ActorInstancePostRequest,
     ActorInstancePutRequest, UploadResponse
 )
-
-MINIO_BUCKET_NAME = os.getenv("MINIO_BUCKET_NAME")
-MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT")
-MINIO_ROOT_USER = os.getenv("MINIO_ROOT_USER")
-MINIO_ROOT_PASSWORD = os.getenv("MINIO_ROOT_PASSWORD")
+from app.models.ids import UUIDStr
+from app.internal.connections import orchestra_config_cache
+from app.config import (
+    MINIO_BUCKET_NAME, MINIO_ENDPOINT, MINIO_ROOT_USER, MINIO_ROOT_PASSWORD
+)
 
 router = APIRouter(
     prefix="/actor_instances",
     tags=["actor_instances"],
     responses={404: {"description": "Not found"}},
-    # dependencies=[Depends(get_db)]
+    # dependencies=[Depends(get_async_db)]
 )
 
-def get_actor_instance(db, actor_instance_id: str, workspace_id: str):
-    actor_instance = db.query(ActorInstanceModel).filter_by(
-        id=actor_instance_id, workspace_id=workspace_id  # Scope by workspace_id
-    ).first()
+async def get_actor_instance(db, actor_instance_id: str, workspace_id: str):
+    actor_instance = await get_workspace_actor_instance(db, actor_instance_id, workspace_id)
     if actor_instance is None:
         raise HTTPException(status_code=404, detail="Actor instance not found")
 
-    _actor = db.query(ActorModel).get(actor_instance.actor_id)
-    connected_connections = [
-        connection.to_dict()
-        for connection in db.query(ConnectionModel).filter_by(
-            **{ACTOR_TYPE_ID_MAP[_actor.actor_type]: actor_instance.id}
-        ).all()
-    ]
+    _actor = await db.get(ActorModel, actor_instance.actor_id)
+    connected_connections = await get_connected_connections(db, _actor.actor_type, actor_instance.id)
 
     return ActorInstanceResponse(
         **actor_instance.to_dict(),
@@ -54,6 +49,25 @@ def get_actor_instance(db, actor_instance_id: str, workspace_id: str):
         connected_connections=connected_connections
     )
 
+async def get_workspace_actor_instance(db, actor_instance_id: str, workspace_id: str, *options):
+    '''The actor instance loaded with `options`, None when it is not in the workspace'''
+    return (await db.scalars(
+        select(ActorInstanceModel).filter_by(
+            id=actor_instance_id, workspace_id=workspace_id  # Scope by workspace_id
+        ).options(*options)
+    )).first()
+
+async def get_connected_connections(db, actor_type: str, actor_instance_id: str) -> List[dict]:
+    '''The connections using the actor instance, as dicts'''
+    return [
+        connection.to_dict()
+        for connection in (await db.scalars(
+            select(ConnectionModel).filter_by(
+                **{ACTOR_TYPE_ID_MAP[actor_type]: actor_instance_id}
+            )
+        )).all()
+    ]
+
 ACTOR_TYPE_ID_MAP = {
     "source": "source_instance_id",
     "generator": "generator_instance_id",
@@ -67,8 +81,8 @@ ACTOR_TYPE_ID_MAP = {
 )
 async def fetch_available_actor_instances(
     actor_type: str,
-    workspace_id: str = Query(..., description="The workspace ID to scope the request"),
-    db=Depends(get_db)
+    workspace_id: UUIDStr = Query(..., description="The workspace ID to scope the request"),
+    db=Depends(get_async_db)
 ) -> List[ActorInstanceResponse]:
     """
     Fetches all active actors from the database.
@@ -81,21 +95,18 @@ async def fetch_available_actor_instances(
         A list of active actors with related instances.
     """
     try:
-        actor_instances = db.query(ActorInstanceModel).filter_by(
-            actor_type=actor_type,
-            workspace_id=workspace_id,  # Scope by workspace_id
-            status="active"
-        ).order_by(ActorInstanceModel.created_at.desc()).all()
+        actor_instances = (await db.scalars(
+            select(ActorInstanceModel).filter_by(
+                actor_type=actor_type,
+                workspace_id=workspace_id,  # Scope by workspace_id
+                status="active"
+            ).options(selectinload(ActorInstanceModel.actor))
+            .order_by(ActorInstanceModel.created_at.desc())
+        )).all()
 
         for actor_instance in actor_instances:
-            actor_instance.actor = db.query(ActorModel).get(actor_instance.actor_id)
-            connected_connections = [
-                connection.to_dict()
-                for connection in db.query(ConnectionModel).filter_by(
-                    **{ACTOR_TYPE_ID_MAP[actor_type]: actor_instance.id}
-                ).all()
-            ]
-            actor_instance.connected_connections = connected_connections
+            actor_instance.connected_connections = await get_connected_connections(
+                db, actor_type, actor_instance.id)
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -106,11 +117,11 @@ async def fetch_available_actor_instances(
         response_model=ActorInstanceResponse
 )
 async def read_actor_instance(
-    actor_instance_id: str,
-    workspace_id: str = Query(..., description="The workspace ID to scope the request"),
-    db=Depends(get_db)
+    actor_instance_id: UUIDStr,
+    workspace_id: UUIDStr = Query(..., description="The workspace ID to scope the request"),
+    db=Depends(get_async_db)
 ) -> ActorInstanceResponse:
-    return get_actor_instance(db, actor_instance_id, workspace_id)
+    return await get_actor_instance(db, actor_instance_id, workspace_id)
 
 
 @router.post(
@@ -120,8 +131,8 @@ async def read_actor_instance(
 )
 async def create_actor_instance(
     payload: ActorInstancePostRequest,
-    workspace_id: str = Query(..., description="The workspace ID to scope the request"),
-    db=Depends(get_db)
+    workspace_id: UUIDStr = Query(..., description="The workspace ID to scope the request"),
+    db=Depends(get_async_db)
 ) -> ActorInstanceResponse:
     """
     Create a new actor instance after testing the connection.
@@ -129,7 +140,7 @@ async def create_actor_instance(
     Args:
         payload (ActorInstancePostRequest): The data for the actor instance.
         workspace_id (str): The ID of the workspace.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         ActorInstanceResponse: The created actor instance.
@@ -139,7 +150,7 @@ async def create_actor_instance(
         db.add(db_actor_instance)
 
         # Test the connection
-        actor = db.query(ActorModel).get(db_actor_instance.actor_id)
+        actor = await db.get(ActorModel, db_actor_instance.actor_id)
         if actor is None:
             raise HTTPException(status_code=404, detail="Actor not found")
 
@@ -157,12 +168,12 @@ async def create_actor_instance(
         if check_connection_tpl.status.name != 'SUCCEEDED':
             raise HTTPException(status_code=403, detail=check_connection_tpl.message)
 
-        db.commit()
-        db.refresh(db_actor_instance)
+        await db.commit()
+        await db.refresh(db_actor_instance)
 
         return ActorInstanceResponse(
             **db_actor_instance.to_dict(),
-            actor=db.query(ActorModel).get(db_actor_instance.actor_id).to_dict(),
+            actor=actor.to_dict(),
             connected_connections=[]
         )
 
@@ -177,10 +188,10 @@ async def create_actor_instance(
     response_model=ActorInstanceResponse
 )
 async def update_actor_instance(
-    actor_instance_id: str,
+    actor_instance_id: UUIDStr,
     payload: ActorInstancePutRequest,
-    db = Depends(get_db),
-    workspace_id: str = Query(..., description="The workspace ID to scope the request")
+    db = Depends(get_async_db),
+    workspace_id: UUIDStr = Query(..., description="The workspace ID to scope the request")
 ) -> ActorInstanceResponse:
     """
     Update an existing actor instance within a specific workspace after testing the connection.
@@ -188,7 +199,7 @@ async def update_actor_instance(
     Args:
         actor_instance_id (str): The ID of the actor instance to update.
         payload (ActorInstancePutRequest): The updated data for the actor instance.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         workspace_id (str): The ID of the workspace to which the actor instance belongs.
 
     Returns:
@@ -197,9 +208,7 @@ async def update_actor_instance(
     Raises:
         HTTPException: If the actor instance is not found, or if a validation error or exception occurs.
     """
-    actor_instance = db.query(ActorInstanceModel).filter_by(
-        id=actor_instance_id, workspace_id=workspace_id  # Scope by workspace_id
-    ).first()
+    actor_instance = await get_workspace_actor_instance(db, actor_instance_id, workspace_id)
 
     if actor_instance is None:
         raise HTTPException(status_code=404, detail="Actor instance not found")
@@ -210,7 +219,7 @@ async def update_actor_instance(
             setattr(actor_instance, key, value)
 
         # Test the connection with updated configuration
-        actor = db.query(ActorModel).get(actor_instance.actor_id)
+        actor = await db.get(ActorModel, actor_instance.actor_id)
         if actor is None:
             raise HTTPException(status_code=404, detail="Actor not found")
 
@@ -227,17 +236,14 @@ async def update_actor_instance(
         if check_connection_tpl.status.name != 'SUCCEEDED':
             raise HTTPException(status_code=403, detail=check_connection_tpl.message)
 
-        db.commit()
-        db.refresh(actor_instance)
-        connected_connections = [
-            connection.to_dict()
-            for connection in db.query(ConnectionModel).filter_by(
-                **{ACTOR_TYPE_ID_MAP[actor.actor_type]: actor_instance.id}
-            ).all()
-        ]
+        await db.commit()
+        orchestra_config_cache.invalidate_actor_instance(actor_instance_id)
+        await db.refresh(actor_instance)
+        connected_connections = await get_connected_connections(
+            db, actor.actor_type, actor_instance.id)
         return ActorInstanceResponse(
             **actor_instance.to_dict(),
-            actor=db.query(ActorModel).get(actor_instance.actor_id).to_dict(),
+            actor=actor.to_dict(),
             connected_connections=connected_connections
         )
 
@@ -253,55 +259,53 @@ async def update_actor_instance(
                404: {"description": "Actor instance not found"}}
 )
 async def delete_actor_instance(
-    actor_instance_id: str,
-    db=Depends(get_db),
-    workspace_id: str = Query(..., description="The workspace ID to scope the request")
+    actor_instance_id: UUIDStr,
+    db=Depends(get_async_db),
+    workspace_id: UUIDStr = Query(..., description="The workspace ID to scope the request")
 ) -> None:
     """
     Delete an existing actor instance within a specific workspace.
 
     Args:
         actor_instance_id (str): The ID of the actor instance to delete.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         workspace_id (str): The ID of the workspace to which the actor instance belongs.
 
     Raises:
         HTTPException: If the actor instance is not found or an exception occurs.
     """
-    actor_instance = db.query(ActorInstanceModel).filter_by(
-        id=actor_instance_id, workspace_id=workspace_id  # Scope by workspace_id
-    ).first()
+    actor_instance = await get_workspace_actor_instance(db, actor_instance_id, workspace_id)
 
     if actor_instance is None:
         raise HTTPException(status_code=404, detail="Actor instance not found")
 
     try:
-        db.delete(actor_instance)
-        db.commit()
+        await db.delete(actor_instance)
+        await db.commit()
+        orchestra_config_cache.invalidate_actor_instance(actor_instance_id)
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
 
 
 @router.get("/{actor_instance_uuid}/discover")
 async def call_actor_instance_discover(
-    actor_instance_uuid: str,
-    db=Depends(get_db),
-    workspace_id: str = Query(..., description="The workspace ID to scope the request")
+    actor_instance_uuid: UUIDStr,
+    db=Depends(get_async_db),
+    workspace_id: UUIDStr = Query(..., description="The workspace ID to scope the request")
 ):
     """
     Discover available data or schema for an actor instance within a specific workspace.
 
     Args:
         actor_instance_uuid (str): The UUID of the actor instance to discover.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         workspace_id (str): The ID of the workspace to which the actor instance belongs.
 
     Returns:
         The discovered catalog or data schema for the actor instance.
     """
-    actor_instance = db.query(ActorInstanceModel).filter_by(
-        id=actor_instance_uuid, workspace_id=workspace_id  # Scope by workspace_id
-    ).first()
+    actor_instance = await get_workspace_actor_instance(
+        db, actor_instance_uuid, workspace_id, selectinload(ActorInstanceModel.actor))
 
     if actor_instance is None:
         raise HTTPException(status_code=404, detail="Actor instance not found")
@@ -320,24 +324,23 @@ async def call_actor_instance_discover(
 
 @router.get("/{actor_instance_id}/check")
 async def call_actor_instance_check(
-    actor_instance_id: str,
-    db=Depends(get_db),
-    workspace_id: str = Query(..., description="The workspace ID to scope the request")
+    actor_instance_id: UUIDStr,
+    db=Depends(get_async_db),
+    workspace_id: UUIDStr = Query(..., description="The workspace ID to scope the request")
 ):
     """
     Check the connection for an actor instance within a specific workspace.
 
     Args:
         actor_instance_id (str): The ID of the actor instance to check.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         workspace_id (str): The ID of the workspace to which the actor instance belongs.
 
     Returns:
         The connection status for the actor instance.
     """
-    actor_instance = db.query(ActorInstanceModel).filter_by(
-        id=actor_instance_id, workspace_id=workspace_id  # Scope by workspace_id
-    ).first()
+    actor_instance = await get_workspace_actor_instance(
+        db, actor_instance_id, workspace_id, selectinload(ActorInstanceModel.actor))
 
     if actor_instance is None:
         raise HTTPException(status_code=404, detail="Actor instance not found")
@@ -4,13 +4,16 @@ from fastapi import (
     HTTPException
 )
 import requests
+from sqlalchemy import select
 from importlib import import_module
 from app.models.actor_model import (
     ActorResponse, ActorPostRequest,
     ActorPutRequest
 )
+from app.models.ids import UUIDStr
+from app.internal.connections import orchestra_config_cache
 from app.db_models.actors import Actor as ActorModel
-from app.database import get_db
+from app.database import get_async_db
 from app.config import GITBOOK_SPACE_ID
 
 
@@ -22,7 +25,7 @@ router = APIRouter(
 )
 
 
-def fetch_available_actors_from_db(
+async def fetch_available_actors_from_db(
     actor_type: str = None,
     actor_id: str = None,
     db=None
@@ -41,14 +44,14 @@ def fetch_available_actors_from_db(
         HTTPException: If no actors are found for the specified actor_type.
 
     """
-    query = db.query(ActorModel)
+    query = select(ActorModel)
     if actor_type:
         query = query.filter(ActorModel.actor_type == actor_type)
     if actor_id:
         query = query.filter(ActorModel.id == actor_id)
 
     try:
-        actors = query.all()
+        actors = (await db.scalars(query)).all()
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -65,7 +68,7 @@ def fetch_available_actors_from_db(
 )
 async def fetch_available_actors(
     actor_type: str,
-    db=Depends(get_db)
+    db=Depends(get_async_db)
 ) -> list[ActorResponse]:
     """
     Fetches all active actors of a specific type.
@@ -77,14 +80,14 @@ async def fetch_available_actors(
         list[ActorResponse]: A list of ActorResponse objects representing the available actors.
 
     """
-    return fetch_available_actors_from_db(actor_type, db=db)
+    return await fetch_available_actors_from_db(actor_type, db=db)
 
 
 @router.get("/{actor_id}",
             response_model=ActorResponse)
 async def read_actor(
-    actor_id: str,
-    db=Depends(get_db)
+    actor_id: UUIDStr,
+    db=Depends(get_async_db)
 ) -> ActorResponse:
     """
     Reads an actor based on its ID.
@@ -99,7 +102,7 @@ async def read_actor(
         HTTPException: If the actor with the specified ID is not found.
 
     """
-    matching_actors = fetch_available_actors_from_db(actor_id=actor_id, db=db)
+    matching_actors = await fetch_available_actors_from_db(actor_id=actor_id, db=db)
     if not matching_actors:
         raise HTTPException(status_code=404, detail="actor not found")
     return matching_actors[0]
@@ -108,7 +111,7 @@ async def read_actor(
 @router.post("", response_model=ActorResponse)
 async def create_actor(
     payload: ActorPostRequest,
-    db=Depends(get_db)
+    db=Depends(get_async_db)
 ) -> ActorResponse:
     """
     Creates a new actor.
@@ -126,8 +129,8 @@ async def create_actor(
     try:
         actor_instance = ActorModel(**payload.model_dump())
         db.add(actor_instance)
-        db.commit()
-        db.refresh(actor_instance)
+        await db.commit()
+        await db.refresh(actor_instance)
         return actor_instance
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
@@ -136,9 +139,9 @@ async def create_actor(
 @router.put("/{actor_id}",
             response_model=ActorResponse)
 async def update_actor(
-    actor_id: str,
+    actor_id: UUIDStr,
     payload: ActorPutRequest,
-    db=Depends(get_db)
+    db=Depends(get_async_db)
 ) -> ActorResponse:
     """
     Updates an existing actor.
@@ -155,11 +158,13 @@ async def update_actor(
 
     """
     try:
-        actor_instance = db.query(ActorModel).get(actor_id)
+        actor_instance = await db.get(ActorModel, actor_id)
         for key, value in payload.model_dump(exclude_unset=True).items():
             setattr(actor_instance, key, value)
-        db.commit()
-        db.refresh(actor_instance)
+        await db.commit()
+        # The actor's name and module are in the config of every connection using it
+        orchestra_config_cache.clear()
+        await db.refresh(actor_instance)
         return actor_instance
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
@@ -167,8 +172,8 @@ async def update_actor(
 
 @router.delete("/{actor_id}/mark_inactive")
 async def mark_actor_inactive(
-    actor_id: str,
-    db=Depends(get_db)
+    actor_id: UUIDStr,
+    db=Depends(get_async_db)
 ) -> None:
     """
     Marks an actor as inactive.
@@ -181,18 +186,18 @@ async def mark_actor_inactive(
 
     """
     try:
-        actor_instance = db.query(ActorModel).get(actor_id)
+        actor_instance = await db.get(ActorModel, actor_id)
         actor_instance.status = "inactive"
         db.add(actor_instance)
-        db.commit()
+        await db.commit()
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
 
 
 @router.delete("/{actor_id}")
 async def delete_actor(
-    actor_id: str,
-    db=Depends(get_db)
+    actor_id: UUIDStr,
+    db=Depends(get_async_db)
 ) -> None:
     """
     Deletes an actor.
@@ -205,17 +210,18 @@ async def delete_actor(
 
     """
     try:
-        actor_instance = db.query(ActorModel).get(actor_id)
-        db.delete(actor_instance)
-        db.commit()
+        actor_instance = await db.get(ActorModel, actor_id)
+        await db.delete(actor_instance)
+        await db.commit()
+        orchestra_config_cache.clear()
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
 
 
 @router.get("/{actor_id}/spec")
 async def get_actor_specs(
-    actor_id: str,
-    db=Depends(get_db)
+    actor_id: UUIDStr,
+    db=Depends(get_async_db)
 ):
     """
     Retrieves the specifications of an actor.
@@ -231,7 +237,7 @@ async def get_actor_specs(
 
     """
     matching_actors = [
-        _ for _ in fetch_available_actors_from_db(actor_id=actor_id, db=db)
+        _ for _ in await fetch_available_actors_from_db(actor_id=actor_id, db=db)
         if _.id == actor_id
     ]
     if not matching_actors:
@@ -8,23 +8,52 @@ Classes:
 
 Functions:
     add_connection_run_log: Endpoint for adding a connection run log.
+    add_connection_run_logs_batch: Endpoint for adding a batch of connection run logs.
     get_connection_run_logs: Endpoint for getting all runs for a given connection ID.
+    export_connection_run_logs: Endpoint for exporting run logs as Arrow IPC, Parquet or CSV.
+    search_connection_run_logs: Endpoint for full-text search over run log messages.
     get_connection_runs_by_run_id: Endpoint for getting run logs for a particular run ID.
+    tail_connection_run_logs: Endpoint for following the logs of a run over Server-Sent Events.
+    get_combined_stream_states: Endpoint for getting the latest stream states from their checkpoints.
+    get_agg_run_logs: Endpoint for getting per-run aggregates from the connection_runs rollup.
+    get_connection_run_stats: Endpoint for getting run duration percentiles and throughput of a connection.
+    get_workspace_agg_run_logs: Endpoint for getting the latest runs of every connection in a workspace.
 """
-import json
-from datetime import datetime
-from typing import List, Dict, Optional
-import pydantic_core
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import itertools
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, true, tuple_
+from sqlalchemy.orm import aliased
 from sqlalchemy.exc import StatementError
 from pydantic import BaseModel
-from dat_core.pydantic_models import DatMessage, Type, DatStateMessage, StreamState, DatLogMessage
+from dat_core.pydantic_models import DatMessage, StreamState
 from app.db_models.connection_run_logs import ConnectionRunLogs
-from app.models.connection_run_log_model import ConnectionRunLogResponse
+from app.db_models.connection_runs import ConnectionRun
+from app.db_models.connection_run_streams import ConnectionRunStream
+from app.db_models.connection_stream_states import ConnectionStreamState
+from app.models.connection_run_log_model import (
+    ConnectionRunLogResponse, ConnectionRunLogBatchResponse, ConnectionRunLogSearchResponse)
 from app.models.agg_conn_run_log_model import (
-    AggConnRunLogResponse, AggConnRunLogRuns, AggConnRunLogRunsStatus)
-from app.database import get_db
+    AggConnRunLogResponse, AggConnRunLogRuns, AggConnRunLogRunRecordsPerStream,
+    WorkspaceAggConnRunLogConnection, WorkspaceAggConnRunLogResponse,
+    ConnRunStatsResponse)
+from app.models.ids import UUIDStr
+from app.database import get_async_db, get_stream_session_factory
 from app.db_models.connections import Connection as ConnectionModel
+from app.services.connection_run_logs import (
+    InvalidRunLogMessage, RunLogBufferFull, RunLogBufferClosed,
+    build_run_log_row, insert_run_log_rows, iter_batch_payloads,
+    validate_batch, run_log_buffer, NDJSON_MEDIA_TYPE, stream_run_logs,
+    wants_ndjson, run_log_pubsub, tail_run_logs, decode_run_log_cursor, iter_archived_run_logs,
+    EXPORT_FORMATS, export_run_logs, connection_run_stats, search_run_logs,
+    apply_ingest_policies, pending_dropped_run_logs
+)
+from app.config import RUN_LOG_BATCH_MAX_LINES
+from app.common.utils import encode_cursor, decode_cursor
 
 
 class DatMessageRequest(BaseModel):
@@ -42,10 +71,10 @@ router = APIRouter(
 
 @router.post("/", responses={403: {"description": "Operation forbidden"}},)
 async def add_connection_run_log(
-    connection_id: str,
+    connection_id: UUIDStr,
     dat_message: DatMessage,
     run_id: str,
-    db=Depends(get_db)
+    db=Depends(get_async_db)
 ) -> ConnectionRunLogResponse:
     """
     Endpoint for adding a connection run log.
@@ -57,247 +86,729 @@ async def add_connection_run_log(
 
     Returns:
         ConnectionRunLogResponse: The response containing the added connection run log.
+
+    When the write-behind buffer is enabled the log is acknowledged once it is
+    queued and written later in a group commit. Logs dropped by the run log
+    ingest policy are acknowledged the same way without being stored.
     """
     try:
         # Ensure the connection belongs to the correct workspace
-        connection = db.query(ConnectionModel).filter_by(id=connection_id).one_or_none()
+        connection = await db.get(ConnectionModel, connection_id)
         if connection is None:
             raise HTTPException(status_code=404, detail="Connection not found")
 
-        _msg = dat_message.log if dat_message.type == Type.LOG else dat_message.state
-        connection_run_log = ConnectionRunLogs(
-            connection_id=connection_id,
-            message=_msg.model_dump_json(),
-            run_id=run_id,
-            message_type=dat_message.type.value
-        )
-        db.add(connection_run_log)
-        db.commit()
-        db.refresh(connection_run_log)
+        row = build_run_log_row(connection_id, run_id, dat_message)
+        if run_log_buffer is not None:
+            return ConnectionRunLogResponse(**await run_log_buffer.put(row))
+
+        if not await db.run_sync(apply_ingest_policies, [row], True):
+            # Dropped by the ingest policy, its dropped_count waits in memory
+            if pending_dropped_run_logs.due():
+                await db.run_sync(pending_dropped_run_logs.flush)
+                await db.commit()
+            return ConnectionRunLogResponse(**row)
+        await db.run_sync(pending_dropped_run_logs.flush)
+        connection_run_log, = await db.run_sync(insert_run_log_rows, [row], returning=True)
+        await db.commit()
+        run_log_pubsub.publish([row])
         return connection_run_log
+    except InvalidRunLogMessage as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except RunLogBufferFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "1"})
+    except RunLogBufferClosed as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
     except StatementError as exc:
         raise HTTPException(status_code=500, detail=repr(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail="Something went wrong")
 
 
+@router.post("/batch",
+             response_model=ConnectionRunLogBatchResponse,
+             responses={404: {"description": "Connection not found"},
+                        413: {"description": "Batch too large"}},
+             description="Add a batch of NDJSON or JSON array messages for a run")
+async def add_connection_run_logs_batch(
+    request: Request,
+    connection_id: UUIDStr,
+    run_id: str,
+    db=Depends(get_async_db)
+) -> ConnectionRunLogBatchResponse:
+    """
+    Endpoint for adding a batch of connection run logs for one run.
+
+    The body is either NDJSON (`Content-Type: application/x-ndjson`, one
+    DatMessage per line) or a JSON array of DatMessages. Every line is
+    validated first, then all accepted lines are written with one multi-row
+    INSERT in a single transaction. Accepted lines dropped by the run log
+    ingest policy are counted in `dropped` and not stored.
+
+    Args:
+        request (Request): The incoming request carrying the batch body.
+        connection_id (str): The ID of the connection for which the logs are being added.
+        run_id (str): The ID of the run for which the logs are being added.
+
+    Returns:
+        ConnectionRunLogBatchResponse: Per-line accept/reject results for the batch.
+    """
+    connection = await db.get(ConnectionModel, connection_id)
+    if connection is None:
+        raise HTTPException(status_code=404, detail="Connection not found")
+
+    try:
+        payloads = list(iter_batch_payloads(
+            await request.body(), request.headers.get("content-type")))
+    except (InvalidRunLogMessage, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    if len(payloads) > RUN_LOG_BATCH_MAX_LINES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(payloads)} messages, the limit is {RUN_LOG_BATCH_MAX_LINES}")
+
+    rows, results = validate_batch(connection_id, run_id, payloads)
+    try:
+        stored = await db.run_sync(apply_ingest_policies, rows)
+        await db.run_sync(insert_run_log_rows, stored)
+        await db.commit()
+    except StatementError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=repr(exc))
+    run_log_pubsub.publish(stored)
+
+    return ConnectionRunLogBatchResponse(
+        connection_id=connection_id,
+        run_id=run_id,
+        accepted=len(rows),
+        rejected=len(results) - len(rows),
+        dropped=len(rows) - len(stored),
+        results=results,
+    )
+
+
 @router.get("/{connection_id}/runs",
             response_model=List[ConnectionRunLogResponse],
+            responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
             description="Get all runs for a given connection ID")
 async def get_connection_run_logs(
-    connection_id: str,
-    workspace_id: str = Query(..., description="The workspace ID for scoping the connection"),
-    db=Depends(get_db),
+    request: Request,
+    connection_id: UUIDStr,
+    workspace_id: UUIDStr = Query(..., description="The workspace ID for scoping the connection"),
+    db=Depends(get_async_db),
+    session_factory=Depends(get_stream_session_factory),
 ) -> List[ConnectionRunLogResponse]:
     """
     Endpoint for getting all runs for a given connection ID.
 
+    Clients sending `Accept: application/x-ndjson` get the logs streamed from
+    a server-side cursor, one JSON object per line.
+
     Args:
+        request (Request): The incoming request, used for content negotiation.
         connection_id (str): The ID of the connection for which to retrieve the run logs.
         workspace_id (str): The ID of the workspace for scoping the connection.
 
     Returns:
         List[ConnectionRunLogResponse]: A list of connection run logs for the given connection ID.
     """
+    def build_query(query):
+        return query.filter(ConnectionRunLogs.connection_id == connection_id)
+
     try:
         # Ensure the connection belongs to the correct workspace
-        connection = db.query(ConnectionModel).filter_by(id=connection_id, workspace_id=workspace_id).one_or_none()
+        connection = await get_workspace_connection(db, connection_id, workspace_id)
         if connection is None:
             raise HTTPException(status_code=404, detail="Connection not found")
 
-        run_logs = db.query(ConnectionRunLogs).filter_by(connection_id=connection_id).all()
+        if wants_ndjson(request):
+            return stream_run_logs(build_query, session_factory=session_factory)
+
+        run_logs = (await db.scalars(build_query(select(ConnectionRunLogs)))).all()
         return run_logs
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
 
 
+@router.get("/export",
+            response_class=StreamingResponse,
+            responses={200: {"content": {media_type: {} for media_type, _ in EXPORT_FORMATS.values()}}},
+            description="Export the run logs of a connection or workspace as Arrow IPC, Parquet or CSV")
+async def export_connection_run_logs(
+    workspace_id: UUIDStr = Query(..., description="The workspace whose run logs are exported"),
+    connection_id: Optional[UUIDStr] = Query(None, description="Only export this connection"),
+    export_format: str = Query("arrow", alias="format", pattern="^(arrow|parquet|csv)$",
+                               description="arrow (IPC stream), parquet or csv"),
+    from_datetime: Optional[datetime] = Query(None, description="Only logs emitted at or after this time"),
+    to_datetime: Optional[datetime] = Query(None, description="Only logs emitted before this time"),
+    db=Depends(get_async_db),
+    session_factory=Depends(get_stream_session_factory),
+) -> StreamingResponse:
+    """
+    Endpoint for exporting run logs in a columnar format.
+
+    The logs, with their extracted columns, are streamed from a server-side
+    cursor in record batches ordered by connection and emitted_at. Logs moved
+    to the cold-tier archive are not included, they are already stored as
+    Parquet.
+
+    Args:
+        workspace_id (str): The ID of the workspace whose run logs are exported.
+        connection_id (Optional[str]): Only export the logs of this connection.
+        export_format (str): arrow, parquet or csv.
+        from_datetime (Optional[datetime]): Lower bound (inclusive) on emitted_at.
+        to_datetime (Optional[datetime]): Upper bound (exclusive) on emitted_at.
+
+    Returns:
+        StreamingResponse: The run logs as an attachment in the requested format.
+    """
+    if connection_id is not None:
+        # Ensure the connection belongs to the correct workspace
+        connection = await get_workspace_connection(db, connection_id, workspace_id)
+        if connection is None:
+            raise HTTPException(status_code=404, detail="Connection not found")
+
+    def build_select(statement):
+        if connection_id is not None:
+            statement = statement.where(ConnectionRunLogs.connection_id == connection_id)
+        else:
+            statement = statement.join(
+                ConnectionModel, ConnectionRunLogs.connection_id == ConnectionModel.id
+            ).where(ConnectionModel.workspace_id == workspace_id)
+        if from_datetime is not None:
+            statement = statement.where(ConnectionRunLogs.emitted_at >= from_datetime)
+        if to_datetime is not None:
+            statement = statement.where(ConnectionRunLogs.emitted_at < to_datetime)
+        return statement.order_by(ConnectionRunLogs.connection_id, ConnectionRunLogs.emitted_at)
+
+    return export_run_logs(build_select, export_format, f"run-logs-{connection_id or workspace_id}",
+                           session_factory=session_factory)
+
+
+@router.get("/search",
+            response_model=ConnectionRunLogSearchResponse,
+            description="Full-text search over run log messages and stack traces, best match first")
+async def search_connection_run_logs(
+    q: str = Query(..., min_length=1, description="Search query, supports quoted phrases, or and -"),
+    workspace_id: UUIDStr = Query(..., description="The workspace whose run logs are searched"),
+    connection_id: Optional[UUIDStr] = Query(None, description="Only search this connection"),
+    run_id: Optional[str] = Query(None, description="Only search this run"),
+    level: Optional[str] = Query(None, pattern="^(FATAL|ERROR|WARN|INFO|DEBUG|TRACE)$",
+                                 description="Only search logs of this level"),
+    from_datetime: Optional[datetime] = Query(None, description="Only logs emitted at or after this time"),
+    to_datetime: Optional[datetime] = Query(None, description="Only logs emitted before this time"),
+    page_size: int = Query(50, ge=1, le=500, description="Number of results per page"),
+    cursor: Optional[str] = Query(None, description="The next_cursor of the previous page"),
+    db=Depends(get_async_db),
+) -> ConnectionRunLogSearchResponse:
+    """
+    Endpoint for searching run logs.
+
+    Backed by the GIN index on the search_vector column maintained at ingest;
+    results are ranked with ts_rank_cd and paginated with a (rank, id) cursor.
+
+    Args:
+        q (str): The search query.
+        workspace_id (str): The ID of the workspace whose run logs are searched.
+        connection_id (Optional[str]): Only search the logs of this connection.
+        run_id (Optional[str]): Only search the logs of this run.
+        level (Optional[str]): Only search the logs of this level.
+        from_datetime (Optional[datetime]): Lower bound (inclusive) on emitted_at.
+        to_datetime (Optional[datetime]): Upper bound (exclusive) on emitted_at.
+        page_size (int): Number of results per page.
+        cursor (Optional[str]): Cursor returned as next_cursor by the previous page.
+
+    Returns:
+        ConnectionRunLogSearchResponse: One page of matching run logs with their rank.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+            # (rank, id); bool is an int subclass but never a rank
+            if (len(after) != 2 or isinstance(after[0], bool)
+                    or not isinstance(after[0], (float, int)) or not isinstance(after[1], str)):
+                raise ValueError(f"Invalid cursor {cursor!r}")
+            UUID(after[1])
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+
+    filters = []
+    if connection_id is not None:
+        filters.append(ConnectionRunLogs.connection_id == connection_id)
+    if run_id is not None:
+        filters.append(ConnectionRunLogs.run_id == run_id)
+    if level is not None:
+        filters.append(ConnectionRunLogs.level == level)
+    if from_datetime is not None:
+        filters.append(ConnectionRunLogs.emitted_at >= from_datetime)
+    if to_datetime is not None:
+        filters.append(ConnectionRunLogs.emitted_at < to_datetime)
+
+    try:
+        results, after = await db.run_sync(search_run_logs, workspace_id, q, page_size, after, filters)
+    except StatementError as exc:
+        raise HTTPException(status_code=500, detail=repr(exc))
+    return ConnectionRunLogSearchResponse(
+        query=q,
+        results=results,
+        next_cursor=encode_cursor(*after) if after else None,
+    )
+
+
 @router.get("/runs/{run_id}",
             response_model=List[ConnectionRunLogResponse],
+            responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
             description="Get run logs for a particular run ID")
 async def get_connection_runs_by_run_id(
+    request: Request,
     run_id: str,
-    workspace_id: str = Query(..., description="The workspace ID for scoping the connection"),
-    db=Depends(get_db),
+    workspace_id: UUIDStr = Query(..., description="The workspace ID for scoping the connection"),
+    connection_id: Optional[UUIDStr] = Query(
+        None, description="Only the run of this connection, when connections share the run ID"),
+    db=Depends(get_async_db),
+    session_factory=Depends(get_stream_session_factory),
 ) -> List[ConnectionRunLogResponse]:
     """
     Endpoint for getting run logs for a particular run ID.
 
+    Clients sending `Accept: application/x-ndjson` get the logs streamed from
+    a server-side cursor, one JSON object per line. Logs already moved to the
+    cold-tier archive are read back from it and returned first.
+
     Args:
+        request (Request): The incoming request, used for content negotiation.
         run_id (str): The ID of the run for which to retrieve the run logs.
         workspace_id (str): The ID of the workspace for scoping the connection.
+        connection_id (Optional[str]): The ID of the connection of the run.
 
     Returns:
         List[ConnectionRunLogResponse]: A list of connection run logs for the given run ID.
     """
-    try:
+    def build_query(query):
         # Fetch all logs with a valid run_id that belong to the correct workspace
-        run_logs = (
-            db.query(ConnectionRunLogs)
+        query = (
+            query
             .join(ConnectionModel, ConnectionRunLogs.connection_id == ConnectionModel.id)
             .filter(ConnectionRunLogs.run_id == run_id, ConnectionModel.workspace_id == workspace_id)
-            .all()
+            .order_by(ConnectionRunLogs.emitted_at, ConnectionRunLogs.created_at)
         )
-        run_logs.sort(key=get_emitted_at_from_conn_run_log)
-        return run_logs
+        if connection_id is not None:
+            query = query.filter(ConnectionRunLogs.connection_id == connection_id)
+        return query
+
+    try:
+        # Run ids are unique per connection only, several connections of the
+        # workspace may have run under this one
+        runs_query = (
+            select(ConnectionRun)
+            .join(ConnectionModel, ConnectionRun.connection_id == ConnectionModel.id)
+            .filter(ConnectionRun.run_id == run_id, ConnectionModel.workspace_id == workspace_id)
+            .order_by(ConnectionRun.start_time)
+        )
+        if connection_id is not None:
+            runs_query = runs_query.filter(ConnectionRun.connection_id == connection_id)
+        connection_runs = (await db.scalars(runs_query)).all()
+        archived_rows = itertools.chain.from_iterable(
+            iter_archived_run_logs(
+                connection_run.connection_id, run_id,
+                connection_run.start_time, connection_run.end_time)
+            for connection_run in connection_runs)
+
+        if wants_ndjson(request):
+            return stream_run_logs(build_query, archived_rows=archived_rows, session_factory=session_factory)
+
+        # Reading the archive is blocking object storage I/O
+        archived_rows = await asyncio.to_thread(list, archived_rows)
+        run_logs = (await db.scalars(build_query(select(ConnectionRunLogs)))).all()
+        return [*archived_rows, *run_logs]
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
 
 
+@router.get("/runs/{run_id}/tail",
+            response_class=StreamingResponse,
+            responses={200: {"content": {"text/event-stream": {}}}},
+            description="Live tail of a run's logs as Server-Sent Events")
+async def tail_connection_run_logs(
+    request: Request,
+    run_id: str,
+    workspace_id: UUIDStr = Query(..., description="The workspace ID for scoping the connection"),
+    connection_id: Optional[UUIDStr] = Query(
+        None, description="The connection of the run, needed when connections share the run ID"),
+    cursor: Optional[str] = Query(None, description="Replay logs after this event id"),
+    last_event_id: Optional[str] = Header(None, description="Set by EventSource on reconnect"),
+    db=Depends(get_async_db),
+) -> StreamingResponse:
+    """
+    Endpoint for following the logs of a run as they are ingested.
+
+    Logs stored after the cursor (the `cursor` parameter or the
+    `Last-Event-ID` header) are replayed first, then new logs are pushed as
+    `log` events. The stream ends with an `end` event once the run has ended.
+
+    Args:
+        request (Request): The incoming request, polled for disconnects.
+        run_id (str): The ID of the run to tail.
+        workspace_id (str): The ID of the workspace for scoping the connection.
+        connection_id (Optional[str]): The ID of the connection of the run.
+        cursor (Optional[str]): The id of the last event the client has seen.
+        last_event_id (Optional[str]): The Last-Event-ID header sent by EventSource.
+
+    Returns:
+        StreamingResponse: A text/event-stream of the run's logs.
+    """
+    # Run ids are unique per connection only, the tail follows the logs of one
+    connection_ids = []
+    for table in (ConnectionRun, ConnectionRunLogs):
+        # Logs stored before the connection_runs rollup existed have no row there
+        query = (
+            select(table.connection_id).distinct()
+            .join(ConnectionModel, table.connection_id == ConnectionModel.id)
+            .filter(table.run_id == run_id, ConnectionModel.workspace_id == workspace_id)
+        )
+        if connection_id is not None:
+            query = query.filter(table.connection_id == connection_id)
+        connection_ids = (await db.scalars(query.limit(2))).all()
+        if connection_ids:
+            break
+    if not connection_ids:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if len(connection_ids) > 1:
+        raise HTTPException(status_code=409,
+                            detail="Several connections have this run ID, pass connection_id")
+
+    cursor = cursor or last_event_id
+    if cursor:
+        try:
+            decode_run_log_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+
+    return StreamingResponse(
+        tail_run_logs(request, str(connection_ids[0]), run_id, cursor),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{connection_id}/stream-states",
             response_model=Dict[str, StreamState],
             description="Get the latest stream states for a connection")
 async def get_combined_stream_states(
-    connection_id: str,
-    workspace_id: Optional[str] = Query(None, description="The workspace ID for scoping the connection"),
-    db=Depends(get_db)
+    connection_id: UUIDStr,
+    workspace_id: Optional[UUIDStr] = Query(None, description="The workspace ID for scoping the connection"),
+    db=Depends(get_async_db)
 ) -> Dict[str, StreamState]:
-    combined_states = {}
+    """
+    Endpoint for getting the latest state of every stream of a connection.
+
+    Reads the connection_stream_states checkpoints, which hold the newest
+    STATE message with data per stream and are upserted at ingest.
+
+    Args:
+        connection_id (str): The ID of the connection.
+        workspace_id (Optional[str]): The ID of the workspace for scoping the connection.
+
+    Returns:
+        Dict[str, StreamState]: The latest stream state keyed by stream name.
+    """
     try:
         # Ensure the connection belongs to the correct workspace
-        connection = db.query(ConnectionModel).filter_by(id=connection_id).one_or_none()
+        connection = await db.get(ConnectionModel, connection_id)
         if connection is None:
             raise HTTPException(status_code=404, detail="Connection not found")
 
-        # Fetching state messages
-        state_msgs = db.query(ConnectionRunLogs).filter_by(
-            connection_id=connection_id, message_type='STATE'
-        ).all()
-
-        for _state_msg in state_msgs:
-            _state_msg = DatStateMessage(**json.loads(_state_msg.message))
-            if not _state_msg.stream_state.data:
-                continue
-            if _state_msg.stream.name not in combined_states:
-                combined_states[_state_msg.stream.name] = {
-                    'stream_state': _state_msg.stream_state, 
-                    'emitted_at': _state_msg.emitted_at
-                }
-            elif combined_states[_state_msg.stream.name]['emitted_at'] < _state_msg.emitted_at:
-                combined_states[_state_msg.stream.name] = {
-                    'stream_state': _state_msg.stream_state, 
-                    'emitted_at': _state_msg.emitted_at
-                }
-        return {_k: _v['stream_state'] for _k, _v in combined_states.items()}
+        checkpoints = (await db.execute(select(
+            ConnectionStreamState.stream_name, ConnectionStreamState.stream_state
+        ).filter(ConnectionStreamState.connection_id == connection_id))).all()
+        return {
+            checkpoint.stream_name: StreamState(**checkpoint.stream_state)
+            for checkpoint in checkpoints
+        }
+    except HTTPException:
+        raise
     except StatementError as exc:
         raise HTTPException(status_code=500, detail=repr(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail="Something went wrong")
 
 
-@router.get("/{connection_id}/agg-run-logs")
+@router.get("/{connection_id}/agg-run-logs",
+            response_model=AggConnRunLogResponse,
+            description="Get per-run aggregates for a connection, newest first")
 async def get_agg_run_logs(
-    connection_id: str,
-    workspace_id: str = Query(..., description="The workspace ID for scoping the connection"),
-    db=Depends(get_db)
-):
+    connection_id: UUIDStr,
+    workspace_id: UUIDStr = Query(..., description="The workspace ID for scoping the connection"),
+    page_size: int = Query(50, ge=1, le=500, description="Number of runs per page"),
+    cursor: Optional[str] = Query(None, description="The next_cursor of the previous page"),
+    from_datetime: Optional[datetime] = Query(None, description="Only runs started at or after this time"),
+    to_datetime: Optional[datetime] = Query(None, description="Only runs started before this time"),
+    include_total: bool = Query(True, description="Count all runs matching the time window"),
+    db=Depends(get_async_db)
+) -> AggConnRunLogResponse:
+    """
+    Endpoint for getting the aggregated runs of a connection.
+
+    Served from the connection_runs rollup with keyset pagination on
+    (start_time, run_id), so the cost of a page does not depend on how many
+    runs the connection has accumulated. The per-stream breakdown of the page
+    is read from connection_run_streams in a single query.
+
+    Args:
+        connection_id (str): The ID of the connection for which to aggregate runs.
+        workspace_id (str): The ID of the workspace for scoping the connection.
+        page_size (int): Number of runs per page.
+        cursor (Optional[str]): Cursor returned as next_cursor by the previous page.
+        from_datetime (Optional[datetime]): Lower bound (inclusive) on the run start time.
+        to_datetime (Optional[datetime]): Upper bound (exclusive) on the run start time.
+        include_total (bool): Count all runs in the window into total_runs.
+
+    Returns:
+        AggConnRunLogResponse: One page of runs of the connection, newest first.
+    """
     try:
         # Ensure the connection belongs to the correct workspace
-        connection = db.query(ConnectionModel).filter_by(id=connection_id, workspace_id=workspace_id).one_or_none()
+        connection = await get_workspace_connection(db, connection_id, workspace_id)
         if connection is None:
             raise HTTPException(status_code=404, detail="Connection not found")
 
-        # Fetching and sorting the connection run logs
-        conn_run_logs = db.query(ConnectionRunLogs).filter_by(
-            connection_id=connection_id
-        ).order_by(ConnectionRunLogs.created_at.desc()).all()
-
-        conn_run_logs.sort(key=get_emitted_at_from_conn_run_log, reverse=True)
-
-        _runs_dct = {}
-        runs = []
-
-        for run_log in conn_run_logs:
-            run_id = run_log.run_id
-            if run_id not in _runs_dct:
-                _runs_dct[run_id] = []
-            _runs_dct[run_id].append(run_log)
-
-        for run_id, run_logs in _runs_dct.items():
-            start_time = datetime.fromtimestamp(
-                get_emitted_at_from_conn_run_log(run_logs[-1])
-            )
-            end_time = None
-            duration = None
-            has_job_ended = is_job_ended(run_logs[0])
-            if has_job_ended:
-                end_time = datetime.fromtimestamp(
-                    get_emitted_at_from_conn_run_log(run_logs[0])
-                )
-                duration = (end_time - start_time).seconds
-            records_updated = get_int_from_list(run_logs)
-
-            status = AggConnRunLogRunsStatus.RUNNING
-            if has_job_ended:
-                if has_errors():
-                    if records_updated <= 0:
-                        status = AggConnRunLogRunsStatus.FAILURE
-                    else:
-                        status = AggConnRunLogRunsStatus.PARTIAL_SUCCESS
-                else:
-                    if records_updated <= 0:
-                        status = AggConnRunLogRunsStatus.PARTIAL_SUCCESS
-                    else:
-                        status = AggConnRunLogRunsStatus.SUCCESS
-
-            run_res = AggConnRunLogRuns(
-                id=run_id,
-                start_time=start_time,
-                end_time=end_time,
-                duration=duration,
-                status=status,
-                records_updated=records_updated,
+        query = select(ConnectionRun).filter(ConnectionRun.connection_id == connection_id)
+        if from_datetime is not None:
+            query = query.filter(ConnectionRun.start_time >= from_datetime)
+        if to_datetime is not None:
+            query = query.filter(ConnectionRun.start_time < to_datetime)
+        total_runs = None
+        if include_total:
+            total_runs = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+        if cursor:
+            try:
+                values = decode_cursor(cursor)
+                if len(values) != 2 or not isinstance(values[0], datetime) or not isinstance(values[1], str):
+                    raise ValueError(f"Invalid cursor {cursor!r}")
+            except ValueError as exc:
+                raise HTTPException(status_code=422, detail=str(exc))
+            cursor_start_time, cursor_run_id = values
+            query = query.filter(
+                tuple_(ConnectionRun.start_time, ConnectionRun.run_id)
+                < tuple_(cursor_start_time, cursor_run_id)
             )
-            runs.append(run_res)
 
-        response = AggConnRunLogResponse(
+        connection_runs = (await db.scalars(query.order_by(
+            ConnectionRun.start_time.desc(), ConnectionRun.run_id.desc()
+        ).limit(page_size + 1))).all()
+
+        next_cursor = None
+        if len(connection_runs) > page_size:
+            connection_runs = connection_runs[:page_size]
+            next_cursor = encode_cursor(connection_runs[-1].start_time, connection_runs[-1].run_id)
+
+        records_per_stream = await get_records_per_stream(db, connection_runs)
+        runs = [
+            get_agg_run(connection_run, records_per_stream.get(
+                (connection_run.connection_id, connection_run.run_id), []))
+            for connection_run in connection_runs
+        ]
+        return AggConnRunLogResponse(
             connection_id=connection_id,
-            total_runs=len(_runs_dct.keys()),
+            total_runs=total_runs,
+            page_size=page_size,
+            from_datetime=from_datetime,
+            to_datetime=to_datetime,
+            next_cursor=next_cursor,
             runs=runs,
         )
-        return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def get_int_from_list(run_logs: List) -> int:
-    ''''''
-    rec_upd8d = 0
-    for run_log in run_logs:
-        try:
-            rec_upd8d += json.loads(json.loads(run_log.message).get('message', '{}')).get('n_docs_processed', 0)
-        except (json.decoder.JSONDecodeError, AttributeError):
-            pass
-    return rec_upd8d
+@router.get("/{connection_id}/run-stats",
+            response_model=ConnRunStatsResponse,
+            description="Get run duration percentiles, throughput and failure rate of a connection")
+async def get_connection_run_stats(
+    connection_id: UUIDStr,
+    workspace_id: UUIDStr = Query(..., description="The workspace ID for scoping the connection"),
+    from_datetime: Optional[datetime] = Query(None, description="Only runs started at or after this time, defaults to 30 days ago"),
+    to_datetime: Optional[datetime] = Query(None, description="Only runs started before this time, defaults to now"),
+    bucket: Optional[str] = Query(None, pattern="^(hour|day|week|month)$",
+                                  description="Size of the time buckets, picked from the window when omitted"),
+    db=Depends(get_async_db)
+) -> ConnRunStatsResponse:
+    """
+    Endpoint for the run statistics of a connection.
 
+    Computed in SQL over the connection_runs rollup: p50/p95/p99 run
+    duration in seconds, docs per second and failure rate for the whole
+    window and per time bucket.
+
+    Args:
+        connection_id (str): The ID of the connection.
+        workspace_id (str): The ID of the workspace for scoping the connection.
+        from_datetime (Optional[datetime]): Lower bound (inclusive) on the run start time.
+        to_datetime (Optional[datetime]): Upper bound (exclusive) on the run start time.
+        bucket (Optional[str]): hour, day, week or month.
 
-def get_emitted_at_from_conn_run_log(conn_run_log: ConnectionRunLogs) -> int:
-    '''Will return UNIX timestamp'''
-    # print(f'conn_run_log.message: {conn_run_log.message}')
+    Returns:
+        ConnRunStatsResponse: The statistics of the window and of every bucket with runs.
+    """
     try:
-        return DatLogMessage(**json.loads(conn_run_log.message)).emitted_at
-    except json.decoder.JSONDecodeError:
-        print(f'Unable to parse {conn_run_log.message} as JSON.')
-        return 0
-    except pydantic_core._pydantic_core.ValidationError:
-        try:
-            return json.loads(conn_run_log.message)['emitted_at']
-        except KeyError:
-            print(f'KeyError: {conn_run_log.message}')
-            return 0
-    except Exception as _e:
-        print(f'{_e}: {conn_run_log}')
-        return 0
+        # Ensure the connection belongs to the correct workspace
+        connection = await get_workspace_connection(db, connection_id, workspace_id)
+        if connection is None:
+            raise HTTPException(status_code=404, detail="Connection not found")
 
+        to_datetime = to_datetime or datetime.utcnow()
+        from_datetime = from_datetime or to_datetime - timedelta(days=30)
+        if from_datetime >= to_datetime:
+            raise HTTPException(status_code=422, detail="from_datetime must be before to_datetime")
 
-def is_job_ended(conn_run_log: ConnectionRunLogs) -> bool:
+        bucket, overall, buckets = await db.run_sync(
+            connection_run_stats, connection_id, from_datetime, to_datetime, bucket)
+        return ConnRunStatsResponse(
+            connection_id=connection_id,
+            from_datetime=from_datetime,
+            to_datetime=to_datetime,
+            bucket=bucket,
+            overall=overall,
+            buckets=buckets,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/agg-run-logs",
+            response_model=WorkspaceAggConnRunLogResponse,
+            description="Get the latest runs and run status counts of every connection in a workspace")
+async def get_workspace_agg_run_logs(
+    workspace_id: UUIDStr = Query(..., description="The workspace ID"),
+    runs_per_connection: int = Query(5, ge=1, le=50, description="Number of latest runs per connection"),
+    from_datetime: Optional[datetime] = Query(None, description="Only runs started at or after this time"),
+    include_streams: bool = Query(False, description="Include the per-stream breakdown of the runs"),
+    db=Depends(get_async_db)
+) -> WorkspaceAggConnRunLogResponse:
+    """
+    Endpoint for the run overview of a workspace.
+
+    Answered from the connection_runs rollup with a fixed number of queries,
+    whatever the number of connections: the latest runs of every connection
+    are fetched in one LATERAL join walking each connection's
+    (connection_id, start_time) index, and the status counts in one grouped
+    query.
+
+    Args:
+        workspace_id (str): The ID of the workspace.
+        runs_per_connection (int): Number of latest runs returned per connection.
+        from_datetime (Optional[datetime]): Only consider runs started at or after this time.
+        include_streams (bool): Include records_per_stream in the returned runs.
+
+    Returns:
+        WorkspaceAggConnRunLogResponse: The latest runs and status counts per connection.
+    """
     try:
-        if json.loads(conn_run_log.message)['message'] == 'Job run ended':
-            return True
-    except Exception as _e:
-        print(_e)
-    return False
+        connections = (await db.execute(select(ConnectionModel.id, ConnectionModel.name).filter(
+            ConnectionModel.workspace_id == workspace_id
+        ).order_by(ConnectionModel.name, ConnectionModel.id))).all()
+
+        latest_runs = select(ConnectionRun).where(ConnectionRun.connection_id == ConnectionModel.id)
+        counts = select(
+            ConnectionRun.connection_id, ConnectionRun.status, func.count()
+        ).join(ConnectionModel, ConnectionRun.connection_id == ConnectionModel.id).filter(
+            ConnectionModel.workspace_id == workspace_id
+        )
+        if from_datetime is not None:
+            latest_runs = latest_runs.where(ConnectionRun.start_time >= from_datetime)
+            counts = counts.filter(ConnectionRun.start_time >= from_datetime)
+        latest_runs = latest_runs.order_by(
+            ConnectionRun.start_time.desc(), ConnectionRun.run_id.desc()
+        ).limit(runs_per_connection).lateral('latest_runs')
+
+        connection_runs = (await db.scalars(select(aliased(ConnectionRun, latest_runs)).select_from(
+            ConnectionModel
+        ).join(latest_runs, true()).filter(ConnectionModel.workspace_id == workspace_id))).all()
+
+        status_counts = {}
+        for run_connection_id, status, count in await db.execute(counts.group_by(
+                ConnectionRun.connection_id, ConnectionRun.status)):
+            status_counts.setdefault(run_connection_id, {})[status] = count
+
+        records_per_stream = {}
+        if include_streams:
+            records_per_stream = await get_records_per_stream(db, connection_runs)
+
+        runs = {}
+        for connection_run in sorted(connection_runs, key=lambda run: (run.start_time, run.run_id), reverse=True):
+            runs.setdefault(connection_run.connection_id, []).append(
+                get_agg_run(connection_run, records_per_stream.get(
+                    (connection_run.connection_id, connection_run.run_id), [])))
+
+        return WorkspaceAggConnRunLogResponse(
+            workspace_id=workspace_id,
+            runs_per_connection=runs_per_connection,
+            from_datetime=from_datetime,
+            connections=[
+                WorkspaceAggConnRunLogConnection(
+                    connection_id=connection.id,
+                    name=connection.name,
+                    total_runs=sum(status_counts.get(connection.id, {}).values()),
+                    status_counts=status_counts.get(connection.id, {}),
+                    runs=runs.get(connection.id, []),
+                )
+                for connection in connections
+            ],
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-def has_errors():
-    return False
-    return True
+async def get_workspace_connection(db, connection_id: str, workspace_id: str) -> Optional[ConnectionModel]:
+    '''The connection, None when it does not belong to the workspace'''
+    return (await db.scalars(
+        select(ConnectionModel).filter_by(id=connection_id, workspace_id=workspace_id)
+    )).one_or_none()
+
+
+async def get_records_per_stream(
+    db, connection_runs: List[ConnectionRun],
+) -> Dict[Tuple[str, str], List[AggConnRunLogRunRecordsPerStream]]:
+    '''Per-stream document counts of the given runs, keyed by (connection_id, run_id)'''
+    records_per_stream = {}
+    if not connection_runs:
+        return records_per_stream
+    # Run ids are only unique within a connection
+    run_keys = {(connection_run.connection_id, connection_run.run_id) for connection_run in connection_runs}
+    run_streams = await db.scalars(select(ConnectionRunStream).filter(
+        tuple_(ConnectionRunStream.connection_id, ConnectionRunStream.run_id).in_(run_keys)
+    ).order_by(ConnectionRunStream.connection_id, ConnectionRunStream.run_id, ConnectionRunStream.stream))
+    for run_stream in run_streams:
+        records_per_stream.setdefault((run_stream.connection_id, run_stream.run_id), []).append(
+            AggConnRunLogRunRecordsPerStream(
+                stream=run_stream.stream,
+                docs_fetched=run_stream.docs_fetched,
+                records_updated=run_stream.records_updated,
+            ))
+    return records_per_stream
+
+
+def get_agg_run(connection_run: ConnectionRun,
+                records_per_stream: List[AggConnRunLogRunRecordsPerStream]) -> AggConnRunLogRuns:
+    '''Builds the aggregated run returned by the agg-run-logs endpoints'''
+    return AggConnRunLogRuns(
+        id=connection_run.run_id,
+        start_time=connection_run.start_time,
+        end_time=connection_run.end_time,
+        duration=get_run_duration(connection_run),
+        status=connection_run.status,
+        records_updated=connection_run.records_updated,
+        records_per_stream=records_per_stream,
+    )
+
+
+def get_run_duration(connection_run: ConnectionRun) -> Optional[int]:
+    '''Duration of a finished run in seconds'''
+    if connection_run.end_time is None:
+        return None
+    return (connection_run.end_time - connection_run.start_time).seconds
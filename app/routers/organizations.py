@@ -4,11 +4,12 @@ from fastapi import (
     HTTPException
 )
 from app.db_models.organizations import Organization as OrganizationModel
-from app.database import get_db
+from app.database import get_async_db
 from app.models.organization_model import (
     OrganizationResponse, OrganizationPostRequest,
     OrganizationPutRequest
 )
+from app.models.ids import UUIDStr
 
 router = APIRouter(
     prefix="/organizations",
@@ -21,8 +22,8 @@ router = APIRouter(
     response_model=OrganizationResponse
 )
 async def read_organization(
-    organization_id: str,
-    db=Depends(get_db)
+    organization_id: UUIDStr,
+    db=Depends(get_async_db)
 ) -> OrganizationResponse:
     """
     Retrieves an organization by its ID.
@@ -37,7 +38,7 @@ async def read_organization(
         HTTPException: If the organization is not found.
     """
     try:
-        organization = db.query(OrganizationModel).filter(OrganizationModel.id == organization_id).first()
+        organization = await db.get(OrganizationModel, organization_id)
         if organization:
             return organization
         raise HTTPException(status_code=404, detail="Organization Not Found")
@@ -50,7 +51,7 @@ async def read_organization(
 )
 async def create_organization(
     payload: OrganizationPostRequest,
-    db=Depends(get_db)
+    db=Depends(get_async_db)
 ) -> OrganizationResponse:
     """
     Creates a new organization.
@@ -69,8 +70,8 @@ async def create_organization(
             **payload.model_dump(exclude_unset=True)
         )
         db.add(new_organization)
-        db.commit()
-        db.refresh(new_organization)
+        await db.commit()
+        await db.refresh(new_organization)
         return new_organization
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -80,9 +81,9 @@ async def create_organization(
     response_model=OrganizationResponse
 )
 async def update_organization(
-    organization_id: str,
+    organization_id: UUIDStr,
     payload: OrganizationPutRequest,
-    db=Depends(get_db)
+    db=Depends(get_async_db)
 ) -> OrganizationResponse:
     """
     Updates an organization.
@@ -98,12 +99,12 @@ async def update_organization(
         HTTPException: If the organization cannot be updated.
     """
     try:
-        organization = db.query(OrganizationModel).filter(OrganizationModel.id == organization_id).first()
+        organization = await db.get(OrganizationModel, organization_id)
         if organization:
             for key, value in payload.model_dump(exclude_unset=True).items():
                 setattr(organization, key, value)
-            db.commit()
-            db.refresh(organization)
+            await db.commit()
+            await db.refresh(organization)
             return organization
         raise HTTPException(status_code=404, detail="Organization Not Found")
     except Exception as e:
@@ -113,8 +114,8 @@ async def update_organization(
     "/{organization_id}",
 )
 async def delete_organization(
-    organization_id: str,
-    db=Depends(get_db)
+    organization_id: UUIDStr,
+    db=Depends(get_async_db)
 ) -> None:
     """
     Deletes an organization.
@@ -129,10 +130,10 @@ async def delete_organization(
         HTTPException: If the organization cannot be deleted.
     """
     try:
-        organization = db.query(OrganizationModel).filter(OrganizationModel.id == organization_id).first()
+        organization = await db.get(OrganizationModel, organization_id)
         if organization:
-            db.delete(organization)
-            db.commit()
+            await db.delete(organization)
+            await db.commit()
         raise HTTPException(status_code=404, detail="Organization Not Found")
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,143 @@
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query
+)
+from sqlalchemy import select
+from app.db_models.run_log_ingest_policies import RunLogIngestPolicy as RunLogIngestPolicyModel
+from app.db_models.connections import Connection as ConnectionModel
+from app.database import get_async_db
+from app.models.run_log_ingest_policy_model import (
+    RunLogIngestPolicyResponse, RunLogIngestPolicyPostRequest,
+    RunLogIngestPolicyPutRequest
+)
+from app.models.ids import UUIDStr
+from app.services.connection_run_logs import ingest_policy_cache
+
+
+router = APIRouter(
+    prefix="/run-log-ingest-policies",
+    tags=["run_log_ingest_policies"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get(
+    "/list",
+    response_model=list[RunLogIngestPolicyResponse],
+    description="Fetch the run log ingest policies of a workspace and its connections"
+)
+async def fetch_run_log_ingest_policies(
+    workspace_id: UUIDStr = Query(..., description="The ID of the workspace"),
+    db=Depends(get_async_db)
+) -> list[RunLogIngestPolicyResponse]:
+    """
+    Fetches the workspace policy and the connection policies of a workspace.
+
+    Returns:
+        A list of run log ingest policies.
+    """
+    connection_ids = select(ConnectionModel.id).filter_by(workspace_id=workspace_id)
+    return (await db.scalars(select(RunLogIngestPolicyModel).where(
+        (RunLogIngestPolicyModel.workspace_id == workspace_id)
+        | RunLogIngestPolicyModel.connection_id.in_(connection_ids)
+    ))).all()
+
+@router.get(
+    "/{policy_id}",
+    response_model=RunLogIngestPolicyResponse
+)
+async def read_run_log_ingest_policy(
+    policy_id: UUIDStr,
+    db=Depends(get_async_db)
+) -> RunLogIngestPolicyResponse:
+    """
+    Retrieves a run log ingest policy by its ID.
+
+    Args:
+        policy_id: The ID of the policy.
+
+    Returns:
+        The policy with the specified ID.
+
+    Raises:
+        HTTPException: If the policy is not found.
+    """
+    policy = await db.get(RunLogIngestPolicyModel, policy_id)
+    if policy is None:
+        raise HTTPException(status_code=404, detail="Run log ingest policy not found")
+    return policy
+
+@router.post(
+    "",
+    response_model=RunLogIngestPolicyResponse
+)
+async def create_run_log_ingest_policy(
+    payload: RunLogIngestPolicyPostRequest,
+    db=Depends(get_async_db)
+) -> RunLogIngestPolicyResponse:
+    """
+    Creates a run log ingest policy for either a workspace or a connection.
+
+    Connection policies override the non-null fields of their workspace policy.
+    """
+    if (payload.workspace_id is None) == (payload.connection_id is None):
+        raise HTTPException(
+            status_code=422, detail="Exactly one of workspace_id and connection_id is required")
+    try:
+        policy = RunLogIngestPolicyModel(
+            **payload.model_dump(exclude_unset=True)
+        )
+        db.add(policy)
+        await db.commit()
+        await db.refresh(policy)
+        ingest_policy_cache.clear()
+        return policy
+    except Exception as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+@router.put(
+    "/{policy_id}",
+    response_model=RunLogIngestPolicyResponse
+)
+async def update_run_log_ingest_policy(
+    policy_id: UUIDStr,
+    payload: RunLogIngestPolicyPutRequest,
+    db=Depends(get_async_db)
+) -> RunLogIngestPolicyResponse:
+    """
+    Update a run log ingest policy.
+    """
+    policy = await db.get(RunLogIngestPolicyModel, policy_id)
+    if policy is None:
+        raise HTTPException(status_code=404, detail="Run log ingest policy not found")
+    try:
+        for key, value in payload.model_dump(exclude_unset=True).items():
+            setattr(policy, key, value)
+        await db.commit()
+        await db.refresh(policy)
+        ingest_policy_cache.clear()
+        return policy
+    except Exception as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+@router.delete(
+    "/{policy_id}",
+)
+async def delete_run_log_ingest_policy(
+    policy_id: UUIDStr,
+    db=Depends(get_async_db)
+) -> None:
+    """
+    Delete a run log ingest policy.
+    """
+    policy = await db.get(RunLogIngestPolicyModel, policy_id)
+    if policy is None:
+        raise HTTPException(status_code=404, detail="Run log ingest policy not found")
+    try:
+        await db.delete(policy)
+        await db.commit()
+        ingest_policy_cache.clear()
+    except Exception as e:
+        raise HTTPException(status_code=403, detail=str(e))
@@ -3,6 +3,7 @@ from ..services.users import user_service_dependency
 from ..services.users.users import Users
 from pydantic import BaseModel
 from app.models.user_model import UserResponse
+from app.models.ids import UUIDStr
 
 
 class UserRequestModel(BaseModel):
@@ -29,7 +30,7 @@ async def verify_user(user: UserRequestModel, service: Users = user_service_depe
     Returns:
     - dict or None: Dictionary containing user information if credentials are valid.
     """
-    return service.verify_user(user.email, user.password)
+    return await service.verify_user(user.email, user.password)
 
 @router.get("/list")
 async def fetch_users(service: Users = user_service_dependency):
@@ -42,7 +43,7 @@ async def fetch_users(service: Users = user_service_dependency):
     Returns:
     - list: List of all users.
     """
-    return service.fetch_users()
+    return await service.fetch_users()
 
 @router.post("", response_model=UserResponse,
              description="Create a new user"
@@ -61,7 +62,7 @@ async def create_user(
     Returns:
     - dict: Dictionary containing user information.
     """
-    return service.create_user(user.email, user.password)
+    return await service.create_user(user.email, user.password)
 
 @router.patch(
     "/{user_id}",
@@ -69,7 +70,7 @@ async def create_user(
     description="Update a user"
 )
 async def update_user(
-    user_id: str,
+    user_id: UUIDStr,
     user: UserRequestModel,
     service: Users = user_service_dependency
 ) -> UserResponse:
@@ -84,4 +85,4 @@ async def update_user(
     Returns:
     - dict: Dictionary containing updated user information.
     """
-    return service.update_user(user_id, user.email, user.password)
+    return await service.update_user(user_id, user.email, user.password)
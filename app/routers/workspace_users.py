@@ -3,13 +3,15 @@ from fastapi import (
     Depends,
     HTTPException
 )
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from app.db_models.workspace_users import WorkspaceUser as WorkspaceUserModel
-from app.database import get_db
+from app.database import get_async_db
 from app.models.workspace_user_model import (
     WorkspaceUserResponse, WorkspaceUserPostRequest,
     WorkspaceUserPutRequest
 )
+from app.models.ids import UUIDStr
 
 
 router = APIRouter(
@@ -25,8 +27,8 @@ router = APIRouter(
     description="Fetch all available workspace users"
 )
 async def fetch_available_workspace_users(
-    workspace_id: str,
-    db=Depends(get_db)
+    workspace_id: UUIDStr,
+    db=Depends(get_async_db)
 ) -> list[WorkspaceUserResponse]:
     """
     Fetches all available workspace users from the database.
@@ -38,11 +40,11 @@ async def fetch_available_workspace_users(
         A list of available workspace users.
     """
     try:
-        workspace_users = (
-            db.query(WorkspaceUserModel)
+        workspace_users = (await db.scalars(
+            select(WorkspaceUserModel)
             .filter_by(workspace_id=workspace_id)
-            .all()
-        )
+            .options(selectinload(WorkspaceUserModel.user))
+        )).all()
         return workspace_users
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -55,7 +57,7 @@ async def fetch_available_workspace_users(
 )
 async def create_workspace_user(
     workspace_user: WorkspaceUserPostRequest,
-    db=Depends(get_db)
+    db=Depends(get_async_db)
 ) -> WorkspaceUserResponse:
     """
     Creates a new workspace user.
@@ -70,8 +72,8 @@ async def create_workspace_user(
         new_workspace_user = WorkspaceUserModel(
             **workspace_user.model_dump())
         db.add(new_workspace_user)
-        db.commit()
-        db.refresh(new_workspace_user)
+        await db.commit()
+        await db.refresh(new_workspace_user, attribute_names=["id", "user"])
         return new_workspace_user
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
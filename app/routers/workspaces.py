@@ -4,12 +4,14 @@ from fastapi import (
     HTTPException,
     Query
 )
+from sqlalchemy import select
 from app.db_models.workspaces import Workspace as WorkspaceModel
-from app.database import get_db
+from app.database import get_async_db
 from app.models.workspace_model import (
     WorkspaceResponse, WorkspacePostRequest,
     WorkspacePutRequest
 )
+from app.models.ids import UUIDStr
 
 
 router = APIRouter(
@@ -25,8 +27,8 @@ router = APIRouter(
     description="Fetch all available workspaces" 
 )
 async def fetch_available_workspaces(
-    org_id: str = Query(..., description="The ID of the organization"),
-    db=Depends(get_db)
+    org_id: UUIDStr = Query(..., description="The ID of the organization"),
+    db=Depends(get_async_db)
 ) -> list[WorkspaceResponse]:
     """
     Fetches all available workspaces from the database.
@@ -35,7 +37,8 @@ async def fetch_available_workspaces(
         A list of available workspaces.
     """
     try:
-        workspaces = db.query(WorkspaceModel).filter_by(organization_id=org_id).all()
+        workspaces = (await db.scalars(
+            select(WorkspaceModel).filter_by(organization_id=org_id))).all()
         return workspaces
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -45,8 +48,8 @@ async def fetch_available_workspaces(
     response_model=WorkspaceResponse
 )
 async def read_workspace(
-    workspace_id: str,
-    db=Depends(get_db)
+    workspace_id: UUIDStr,
+    db=Depends(get_async_db)
 ) -> WorkspaceResponse:
     """
     Retrieves a workspace by its ID.
@@ -60,7 +63,7 @@ async def read_workspace(
     Raises:
         HTTPException: If the workspace is not found.
     """
-    workspace = db.query(WorkspaceModel).get(workspace_id)
+    workspace = await db.get(WorkspaceModel, workspace_id)
     if workspace is None:
         raise HTTPException(status_code=404, detail="Workspace not found")
     return workspace
@@ -71,7 +74,7 @@ async def read_workspace(
 )
 async def create_workspace(
     payload: WorkspacePostRequest,
-    db=Depends(get_db)
+    db=Depends(get_async_db)
 ) -> WorkspaceResponse:
     """
     Creates a new workspace.
@@ -81,8 +84,8 @@ async def create_workspace(
             **payload.model_dump(exclude_unset=True)
         )
         db.add(workspace)
-        db.commit()
-        db.refresh(workspace)
+        await db.commit()
+        await db.refresh(workspace)
         return workspace
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
@@ -92,21 +95,21 @@ async def create_workspace(
     response_model=WorkspaceResponse
 )
 async def update_workspace(
-    workspace_id: str,
+    workspace_id: UUIDStr,
     payload: WorkspacePutRequest,
-    db=Depends(get_db)
+    db=Depends(get_async_db)
 ) -> WorkspaceResponse:
     """
     Update a workspace.
     """
-    workspace = db.query(WorkspaceModel).get(workspace_id)
+    workspace = await db.get(WorkspaceModel, workspace_id)
     if workspace is None:
         raise HTTPException(status_code=404, detail="Workspace not found")
     try:
         for key, value in payload.model_dump(exclude_unset=True).items():
             setattr(workspace, key, value)
-        db.commit()
-        db.refresh(workspace)
+        await db.commit()
+        await db.refresh(workspace)
         return workspace
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
@@ -115,17 +118,17 @@ async def update_workspace(
     "/{workspace_id}",
 )
 async def delete_workspace(
-    workspace_id: str,
-    db=Depends(get_db)
+    workspace_id: UUIDStr,
+    db=Depends(get_async_db)
 ) -> None:
     """
     Delete a workspace.
     """
-    workspace = db.query(WorkspaceModel).get(workspace_id)
+    workspace = await db.get(WorkspaceModel, workspace_id)
     if workspace is None:
         raise HTTPException(status_code=404, detail="Workspace not found")
     try:
-        db.delete(workspace)
-        db.commit()
+        await db.delete(workspace)
+        await db.commit()
     except Exception as e:
         raise HTTPException(status_code=403, detail=str(e))
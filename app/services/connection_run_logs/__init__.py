@@ -0,0 +1,103 @@
+from .ingest import (
+    InvalidRunLogMessage,
+    backfill_run_log_columns,
+    build_run_log_row,
+    build_run_log_row_from_payload,
+    insert_run_log_rows,
+    iter_batch_payloads,
+    validate_batch,
+)
+from .messages import (
+    ParsedMessageCache,
+    extract_run_log_fields,
+    is_job_ended_message,
+    parse_message,
+    parsed_message_cache,
+)
+from .rollup import (
+    backfill_connection_runs,
+    record_dropped_run_logs,
+    run_status,
+    summarize_run_logs,
+    update_connection_runs,
+)
+from .policies import (
+    IngestPolicyCache,
+    PendingDroppedRunLogs,
+    apply_ingest_policies,
+    flush_dropped_run_logs,
+    ingest_policy_cache,
+    ingest_policy_stats,
+    pending_dropped_run_logs,
+    resolve_ingest_policy,
+)
+from .stream_states import (
+    backfill_stream_states,
+    latest_stream_states,
+    upsert_stream_states,
+)
+from .partitions import (
+    convert_to_partitioned,
+    maintain_partitions,
+    start_partition_maintenance,
+)
+from .uuid_keys import (
+    prepare_uuid_columns,
+)
+from .search import (
+    search_run_logs,
+)
+from .stats import (
+    auto_bucket,
+    connection_run_stats,
+)
+from .streaming import (
+    NDJSON_MEDIA_TYPE,
+    iter_run_logs_ndjson,
+    serialize_run_log,
+    stream_run_logs,
+    wants_ndjson,
+)
+from .pubsub import (
+    RunLogPubSub,
+    notify_run_logs,
+    run_log_pubsub,
+)
+from .tail import (
+    decode_run_log_cursor,
+    run_log_cursor,
+    tail_run_logs,
+)
+from .buffer import (
+    RunLogBufferClosed,
+    RunLogBufferFull,
+    RunLogWriteBuffer,
+    run_log_buffer,
+)
+from .arrow import (
+    RUN_LOG_COLUMNS,
+    RUN_LOG_SCHEMA,
+    run_logs_to_arrow,
+)
+from .export import (
+    EXPORT_FORMATS,
+    export_run_logs,
+    iter_run_log_export,
+)
+from .archive import (
+    ARCHIVE_MIN_AGE_DAYS,
+    ArchiveStore,
+    FileSystemArchiveStore,
+    MinioArchiveStore,
+    archive_run_logs,
+    get_archive_store,
+    iter_archived_run_logs,
+    may_be_archived,
+    start_archival,
+)
+from .consumer import (
+    RunLogConsumer,
+    consume_run_logs,
+    publish_run_log,
+    run_log_queue,
+)
@@ -0,0 +1,319 @@
+"""
+Cold-tier archival of `connection_run_logs` to zstd-compressed Parquet.
+
+Logs older than `RUN_LOG_ARCHIVE_AFTER_DAYS` are copied into Parquet objects
+laid out by connection and month of `created_at`, then deleted from Postgres:
+
+    connection_run_logs/connection_id=<id>/month=<YYYY-MM>/<first row>.parquet
+
+The objects live in MinIO, or under `RUN_LOG_ARCHIVE_DIR` when it is set.
+Logs are never archived before they are `ARCHIVE_MIN_AGE_DAYS` old, so reads
+of recent runs skip the archive altogether.
+Rollups (connection_runs, connection_run_streams and the stream state
+checkpoints) are not touched, so run aggregates stay served from Postgres and
+only raw log reads of old runs go to the archive.
+"""
+import asyncio
+import io
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from minio import Minio
+from minio.error import S3Error
+from sqlalchemy import delete, func, select, text
+from app.config import (
+    MINIO_ENDPOINT, MINIO_ROOT_USER, MINIO_ROOT_PASSWORD,
+    RUN_LOG_ARCHIVE_AFTER_DAYS, RUN_LOG_ARCHIVE_BUCKET, RUN_LOG_ARCHIVE_DIR,
+    RUN_LOG_ARCHIVE_CHUNK_ROWS, RUN_LOG_ARCHIVE_INTERVAL_HOURS
+)
+from app.database import SessionLocal, engine
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from .arrow import RUN_LOG_COLUMNS, run_logs_to_arrow
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PREFIX = ConnectionRunLogs.__tablename__
+# Serializes archival across API replicas
+ARCHIVE_LOCK_ID = 0x636f6e6172636869
+ROW_GROUP_ROWS = 10000
+# Archival, scheduled or manual, never moves younger logs
+ARCHIVE_MIN_AGE_DAYS = RUN_LOG_ARCHIVE_AFTER_DAYS or 90
+# Logs are stored slightly after they are emitted, allow a day of slack
+ARCHIVE_SLACK = timedelta(days=1)
+
+
+class ArchiveStore(ABC):
+    '''Object storage holding the archived Parquet files'''
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        '''Writes an object, replacing any object with the same key'''
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        '''Reads an object'''
+
+    @abstractmethod
+    def list(self, prefix: str) -> List[str]:
+        '''Keys starting with `prefix`, sorted'''
+
+
+class MinioArchiveStore(ArchiveStore):
+    '''Archive stored in a MinIO bucket, created on first write'''
+
+    def __init__(self, client: Minio, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    def put(self, key: str, data: bytes) -> None:
+        if not self.client.bucket_exists(self.bucket):
+            self.client.make_bucket(self.bucket)
+        self.client.put_object(self.bucket, key, io.BytesIO(data), len(data),
+                               content_type='application/vnd.apache.parquet')
+
+    def get(self, key: str) -> bytes:
+        response = self.client.get_object(self.bucket, key)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def list(self, prefix: str) -> List[str]:
+        try:
+            objects = self.client.list_objects(self.bucket, prefix=prefix, recursive=True)
+            return sorted(obj.object_name for obj in objects)
+        except S3Error as exc:
+            if exc.code == 'NoSuchBucket':
+                return []
+            raise
+
+
+class FileSystemArchiveStore(ArchiveStore):
+    '''Archive stored under a local directory, for development and tests'''
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def put(self, key: str, data: bytes) -> None:
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial object
+        with open(f'{path}.tmp', 'wb') as file:
+            file.write(data)
+        os.replace(f'{path}.tmp', path)
+
+    def get(self, key: str) -> bytes:
+        with open(os.path.join(self.root, key), 'rb') as file:
+            return file.read()
+
+    def list(self, prefix: str) -> List[str]:
+        directory = os.path.join(self.root, os.path.dirname(prefix))
+        if not os.path.isdir(directory):
+            return []
+        keys = []
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                key = os.path.relpath(os.path.join(dirpath, filename), self.root)
+                if key.startswith(prefix) and not key.endswith('.tmp'):
+                    keys.append(key)
+        return sorted(keys)
+
+
+def get_archive_store() -> Optional[ArchiveStore]:
+    '''The configured archive store, or None when no storage is configured'''
+    if RUN_LOG_ARCHIVE_DIR:
+        return FileSystemArchiveStore(RUN_LOG_ARCHIVE_DIR)
+    if MINIO_ENDPOINT:
+        client = Minio(MINIO_ENDPOINT, access_key=MINIO_ROOT_USER,
+                       secret_key=MINIO_ROOT_PASSWORD, secure=False)
+        return MinioArchiveStore(client, RUN_LOG_ARCHIVE_BUCKET)
+    return None
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def archive_prefix(connection_id: str, month: date) -> str:
+    '''Key prefix of the archived logs of a connection for the month starting at `month`'''
+    return f'{ARCHIVE_PREFIX}/connection_id={connection_id}/month={month:%Y-%m}/'
+
+
+def _to_parquet(rows: List) -> bytes:
+    # Sorted by run so row group statistics let readers skip other runs
+    rows = sorted(rows, key=lambda row: (row.run_id, row.emitted_at or row.created_at))
+    table = run_logs_to_arrow(rows)
+    sink = io.BytesIO()
+    pq.write_table(table, sink, compression='zstd', row_group_size=ROW_GROUP_ROWS)
+    return sink.getvalue()
+
+
+def archive_run_logs(db, store: ArchiveStore, older_than: datetime,
+                     connection_id: Optional[str] = None,
+                     chunk_rows: int = RUN_LOG_ARCHIVE_CHUNK_ROWS) -> int:
+    """
+    Moves run logs created before `older_than` to the archive.
+
+    Each chunk is written as one Parquet object and then deleted from
+    Postgres in its own transaction. Object keys are derived from the first
+    row of the chunk, so a chunk re-archived after an interruption between
+    the upload and the delete overwrites its own object instead of
+    duplicating it.
+
+    Args:
+        db (Session): The database session.
+        store (ArchiveStore): Where the Parquet objects are written.
+        older_than (datetime): Archive logs created before this time.
+        connection_id (Optional[str]): Only archive this connection.
+        chunk_rows (int): Maximum number of rows per Parquet object.
+
+    Returns:
+        int: The number of run logs archived.
+    """
+    logs = ConnectionRunLogs.__table__.c
+    month = func.date_trunc('month', logs.created_at)
+    groups = select(logs.connection_id, month).where(logs.created_at < older_than)
+    if connection_id:
+        groups = groups.where(logs.connection_id == connection_id)
+    groups = db.execute(groups.group_by(logs.connection_id, month)
+                        .order_by(logs.connection_id, month)).all()
+
+    archived = 0
+    for group_connection_id, month_start in groups:
+        month_start = month_start.date()
+        month_end = datetime.combine(_month_start(month_start, 1), datetime.min.time())
+        chunk_query = select(*RUN_LOG_COLUMNS).where(
+            logs.connection_id == group_connection_id,
+            logs.created_at >= month_start,
+            logs.created_at < min(month_end, older_than),
+        ).order_by(logs.created_at, logs.id).limit(chunk_rows)
+        while True:
+            rows = db.execute(chunk_query).all()
+            if not rows:
+                break
+            first = rows[0]
+            key = (f"{archive_prefix(group_connection_id, month_start)}"
+                   f"{first.created_at:%Y%m%dT%H%M%S%f}-{first.id}.parquet")
+            store.put(key, _to_parquet(rows))
+            db.execute(delete(ConnectionRunLogs).where(
+                ConnectionRunLogs.id.in_([row.id for row in rows])))
+            db.commit()
+            archived += len(rows)
+            logger.info("Archived %s run logs to %s", len(rows), key)
+    return archived
+
+
+def may_be_archived(start_time: datetime) -> bool:
+    '''Whether logs of a run started at `start_time` can already be in the archive'''
+    return start_time - ARCHIVE_SLACK < datetime.utcnow() - timedelta(days=ARCHIVE_MIN_AGE_DAYS)
+
+
+def archived_run_log_months(start_time: datetime, end_time: Optional[datetime]) -> List[date]:
+    '''Months whose archive can hold logs of a run spanning start_time to end_time'''
+    last = _month_start(((end_time or start_time) + ARCHIVE_SLACK).date())
+    months = [_month_start(start_time.date())]
+    while months[-1] < last:
+        months.append(_month_start(months[-1], 1))
+    return months
+
+
+def read_archived_run_logs(store: ArchiveStore, connection_id: str, run_id: str,
+                           months: List[date]) -> List[dict]:
+    """
+    Reads the archived logs of a run.
+
+    Args:
+        store (ArchiveStore): The archive store.
+        connection_id (str): The connection the run belongs to.
+        run_id (str): The ID of the run.
+        months (List[date]): Months to search, see `archived_run_log_months`.
+
+    Returns:
+        List[dict]: The archived log rows of the run ordered by emitted_at.
+    """
+    rows = []
+    for month in months:
+        for key in store.list(archive_prefix(connection_id, month)):
+            parquet_file = pq.ParquetFile(io.BytesIO(store.get(key)))
+            row_groups = _run_row_groups(parquet_file, run_id)
+            if not row_groups:
+                continue
+            table = parquet_file.read_row_groups(row_groups)
+            rows.extend(table.filter(pc.field('run_id') == run_id).to_pylist())
+    rows.sort(key=lambda row: (row['emitted_at'] or row['created_at'], row['created_at']))
+    return rows
+
+
+def _run_row_groups(parquet_file: pq.ParquetFile, run_id: str) -> List[int]:
+    '''Row groups whose run_id statistics can include the run, from the footer alone'''
+    column = parquet_file.schema_arrow.get_field_index('run_id')
+    row_groups = []
+    for index in range(parquet_file.metadata.num_row_groups):
+        statistics = parquet_file.metadata.row_group(index).column(column).statistics
+        # Objects are sorted by run, so a run spans few row groups
+        if statistics is None or not statistics.has_min_max \
+                or statistics.min <= run_id <= statistics.max:
+            row_groups.append(index)
+    return row_groups
+
+
+def iter_archived_run_logs(connection_id: str, run_id: str, start_time: datetime,
+                           end_time: Optional[datetime]) -> Iterator[dict]:
+    """
+    Lazily yields the archived logs of a run.
+
+    Nothing is read when no archive is configured or the run is too recent
+    to have been archived, see `may_be_archived`.
+    """
+    store = get_archive_store()
+    if store is None or not may_be_archived(start_time):
+        return
+    yield from read_archived_run_logs(
+        store, connection_id, run_id, archived_run_log_months(start_time, end_time))
+
+
+def _run_archival() -> None:
+    store = get_archive_store()
+    if store is None:
+        logger.warning("Run log archival is enabled but no archive store is configured")
+        return
+    older_than = datetime.utcnow() - timedelta(days=RUN_LOG_ARCHIVE_AFTER_DAYS)
+    # The session commits per chunk and may switch pooled connections, so
+    # the advisory lock is held on a connection of its own
+    with engine.connect() as lock_connection:
+        locked = lock_connection.execute(
+            text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": ARCHIVE_LOCK_ID}).scalar()
+        if not locked:
+            return
+        db = SessionLocal()
+        try:
+            archived = archive_run_logs(db, store, older_than)
+            if archived:
+                logger.info("Archived %s run logs created before %s", archived, older_than)
+        finally:
+            db.close()
+            lock_connection.execute(
+                text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": ARCHIVE_LOCK_ID})
+
+
+async def run_archival(interval_hours: float = RUN_LOG_ARCHIVE_INTERVAL_HOURS) -> None:
+    '''Runs archival now and then every `interval_hours`'''
+    while True:
+        try:
+            await asyncio.to_thread(_run_archival)
+        except Exception:
+            logger.exception("Run log archival failed")
+        await asyncio.sleep(interval_hours * 3600)
+
+
+def start_archival() -> Optional[asyncio.Task]:
+    '''Schedules run log archival on the running loop when it is enabled'''
+    if RUN_LOG_ARCHIVE_AFTER_DAYS <= 0:
+        return None
+    return asyncio.create_task(run_archival())
@@ -0,0 +1,33 @@
+"""
+Arrow representation of connection run logs, shared by the Parquet archive
+and the columnar export.
+"""
+from typing import List
+import pyarrow as pa
+from app.db_models.connection_run_logs import ConnectionRunLogs
+
+RUN_LOG_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('connection_id', pa.string()),
+    ('run_id', pa.string()),
+    ('message_type', pa.string()),
+    ('message', pa.string()),
+    ('stack_trace', pa.string()),
+    ('created_at', pa.timestamp('us')),
+    ('updated_at', pa.timestamp('us')),
+    ('emitted_at', pa.timestamp('us')),
+    ('level', pa.string()),
+    ('stream', pa.string()),
+    ('n_docs_processed', pa.int64()),
+    ('n_docs_fetched', pa.int64()),
+])
+RUN_LOG_COLUMNS = [getattr(ConnectionRunLogs, name) for name in RUN_LOG_SCHEMA.names]
+
+
+def run_logs_to_arrow(rows: List) -> pa.Table:
+    '''Builds an Arrow table from rows selected with `RUN_LOG_COLUMNS`'''
+    columns = {
+        name: [getattr(row[index], 'value', row[index]) for row in rows]
+        for index, name in enumerate(RUN_LOG_SCHEMA.names)
+    }
+    return pa.Table.from_pydict(columns, schema=RUN_LOG_SCHEMA)
@@ -0,0 +1,263 @@
+"""
+In-process write-behind buffer for connection run logs.
+
+Messages are acknowledged as soon as they are queued and written to
+`connection_run_logs` in group commits: a flush happens when `max_rows` rows
+are waiting or `flush_interval_ms` after the first queued row, whichever comes
+first. The queue is bounded; when it is full `put` either waits up to
+`block_timeout` seconds or raises `RunLogBufferFull` straight away.
+
+A flush failing on a lost connection or an unavailable database is retried
+with exponential backoff. A flush the database rejects (a row violating a
+constraint or not fitting its column) is split in halves written on their
+own, so only the rejected rows are dropped, not the whole batch.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.exc import DBAPIError, OperationalError
+from app.config import (
+    RUN_LOG_WRITE_BEHIND, RUN_LOG_FLUSH_MAX_ROWS, RUN_LOG_FLUSH_INTERVAL_MS,
+    RUN_LOG_BUFFER_MAX_ROWS, RUN_LOG_BUFFER_BLOCK_TIMEOUT,
+    RUN_LOG_FLUSH_RETRIES, RUN_LOG_FLUSH_RETRY_BACKOFF_MS
+)
+from app.database import SessionLocal
+from .ingest import insert_run_log_rows
+from .policies import apply_ingest_policies
+from .pubsub import run_log_pubsub
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def is_transient_error(exc: Exception) -> bool:
+    '''Whether a failed write may succeed when retried as is'''
+    if isinstance(exc, OperationalError):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+
+class RunLogBufferFull(Exception):
+    '''Raised when the write-behind buffer has no room for another row'''
+
+
+class RunLogBufferClosed(Exception):
+    '''Raised when a row is queued after the buffer was stopped'''
+
+
+class RunLogWriteBuffer:
+    """
+    Bounded queue of connection run log rows flushed in group commits.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        max_rows: int = RUN_LOG_FLUSH_MAX_ROWS,
+        flush_interval_ms: int = RUN_LOG_FLUSH_INTERVAL_MS,
+        max_queue_rows: int = RUN_LOG_BUFFER_MAX_ROWS,
+        block_timeout: float = RUN_LOG_BUFFER_BLOCK_TIMEOUT,
+        max_retries: int = RUN_LOG_FLUSH_RETRIES,
+        retry_backoff_ms: int = RUN_LOG_FLUSH_RETRY_BACKOFF_MS,
+    ):
+        """
+        Args:
+            session_factory: Callable returning a new SQLAlchemy session.
+            max_rows (int): Flush as soon as this many rows are waiting.
+            flush_interval_ms (int): Flush at the latest this long after the first queued row.
+            max_queue_rows (int): Upper bound of rows held in memory.
+            block_timeout (float): Seconds `put` waits for room, 0 to reject immediately.
+            max_retries (int): Retries of a write failing on a transient error.
+            retry_backoff_ms (int): Wait before the first retry, doubled for each next one.
+        """
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue_rows = max_queue_rows
+        self.block_timeout = block_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = True
+
+        self.enqueued_rows = 0
+        self.rejected_rows = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.retries = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    async def start(self) -> None:
+        '''Starts the background flusher on the running event loop'''
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_rows)
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        '''Stops accepting rows and flushes everything still queued'''
+        if self._task is None:
+            return
+        self._closed = True
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def put(self, row: dict) -> dict:
+        """
+        Queues a row for the next group commit.
+
+        Args:
+            row (dict): A row produced by `build_run_log_row`.
+
+        Returns:
+            dict: The queued row, stamped with its receive time.
+
+        Raises:
+            RunLogBufferFull: If there is no room within `block_timeout`.
+            RunLogBufferClosed: If the buffer is not running.
+        """
+        if self._closed:
+            raise RunLogBufferClosed("Run log buffer is not accepting rows")
+        now = datetime.utcnow()
+        row = {**row, "created_at": now, "updated_at": now}
+        try:
+            if self.block_timeout > 0:
+                await asyncio.wait_for(self._queue.put(row), self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except (asyncio.QueueFull, asyncio.TimeoutError) as exc:
+            self.rejected_rows += 1
+            raise RunLogBufferFull(
+                f"Run log buffer is full ({self.max_queue_rows} rows)") from exc
+        self.enqueued_rows += 1
+        return row
+
+    def stats(self) -> dict:
+        '''Returns the buffer counters'''
+        return {
+            "enabled": not self._closed,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_rows": self.max_queue_rows,
+            "enqueued_rows": self.enqueued_rows,
+            "rejected_rows": self.rejected_rows,
+            "flushed_rows": self.flushed_rows,
+            "failed_rows": self.failed_rows,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+        # Drain whatever was queued behind the stop marker
+        remaining = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.max_rows):
+            await self._flush(remaining[start:start + self.max_rows])
+
+    async def _flush(self, rows: List[dict]) -> None:
+        started = time.perf_counter()
+        stored = await self._write_batch(rows)
+        if stored:
+            run_log_pubsub.publish(stored)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.total_flush_ms += elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    async def _write_batch(self, rows: List[dict]) -> List[dict]:
+        """
+        Writes rows in one transaction, isolating the rows the database rejects.
+
+        Returns:
+            List[dict]: The stored rows, without the rejected ones.
+        """
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                stored = await asyncio.to_thread(self._write, rows)
+            except Exception as exc:
+                if is_transient_error(exc):
+                    if attempt < self.max_retries:
+                        self.retries += 1
+                        logger.warning(
+                            "Retrying flush of %s connection run log rows in %.3fs: %s", len(rows), delay, exc)
+                        await asyncio.sleep(delay)
+                        delay *= 2
+                        continue
+                    self.failed_rows += len(rows)
+                    logger.exception(
+                        "Failed to flush %s connection run log rows after %s retries", len(rows), attempt)
+                    return []
+                if len(rows) == 1:
+                    self.failed_rows += 1
+                    logger.exception(
+                        "Dropped connection run log %s of connection %s, run %s",
+                        rows[0].get("id"), rows[0].get("connection_id"), rows[0].get("run_id"))
+                    return []
+                # Bisect until the rejected rows are alone in their batch
+                middle = len(rows) // 2
+                return await self._write_batch(rows[:middle]) + await self._write_batch(rows[middle:])
+            self.flushed_rows += len(rows)
+            return stored
+
+    def _write(self, rows: List[dict]) -> List[dict]:
+        db = self.session_factory()
+        try:
+            rows = apply_ingest_policies(db, rows)
+            insert_run_log_rows(db, rows)
+            db.commit()
+            return rows
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def _build_run_log_buffer() -> Optional[RunLogWriteBuffer]:
+    if not RUN_LOG_WRITE_BEHIND:
+        return None
+    return RunLogWriteBuffer(SessionLocal)
+
+
+run_log_buffer = _build_run_log_buffer()
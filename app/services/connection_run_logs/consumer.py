@@ -0,0 +1,228 @@
+"""
+Broker consumer ingesting connection run logs published by workers.
+
+Workers publish one JSON message per log line to `RUN_LOG_QUEUE` instead of
+calling `POST /connection-run-logs/` for each of them:
+
+    {"connection_id": "...", "run_id": "...", "dat_message": {...}}
+
+The consumer collects up to `RUN_LOG_CONSUMER_BATCH_ROWS` messages or waits
+`RUN_LOG_CONSUMER_FLUSH_INTERVAL_MS`, validates them like the HTTP endpoints
+do, writes the batch with one multi-row INSERT and acknowledges the messages
+only once the transaction has committed. A failed write requeues the whole
+batch; messages that can never be stored (not JSON, not a DatMessage, of an
+unknown connection) are rejected without requeue so the broker can
+dead-letter them.
+
+Live tails on API replicas only see these logs with RUN_LOG_NOTIFY enabled,
+since the consumer runs in its own process.
+"""
+import logging
+import socket
+import time
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+from kombu import Connection, Exchange, Queue
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from app.config import (
+    CELERY_BROKER_URL, RUN_LOG_QUEUE,
+    RUN_LOG_CONSUMER_BATCH_ROWS, RUN_LOG_CONSUMER_FLUSH_INTERVAL_MS
+)
+from app.database import SessionLocal
+from app.db_models.connections import Connection as ConnectionModel
+from .ingest import InvalidRunLogMessage, build_run_log_row_from_payload, insert_run_log_rows
+from .policies import apply_ingest_policies
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before consuming again after a failed write
+FAILURE_BACKOFF_SECONDS = 1.0
+
+
+def run_log_queue(name: str = RUN_LOG_QUEUE) -> Queue:
+    '''The durable queue run logs are published to, routed by its own name'''
+    return Queue(name, Exchange(name, type='direct'), routing_key=name, durable=True)
+
+
+def publish_run_log(connection: Connection, connection_id: str, run_id: str,
+                    dat_message: Any, queue_name: str = RUN_LOG_QUEUE) -> None:
+    """
+    Publishes a run log message for the consumer, as workers do.
+
+    Args:
+        connection (Connection): The broker connection.
+        connection_id (str): The ID of the connection the message belongs to.
+        run_id (str): The ID of the run the message belongs to.
+        dat_message (Any): The DatMessage, as a model or a JSON-compatible dict.
+        queue_name (str): The queue to publish to.
+    """
+    if hasattr(dat_message, 'model_dump'):
+        dat_message = dat_message.model_dump(mode='json')
+    queue = run_log_queue(queue_name)
+    with connection.Producer() as producer:
+        producer.publish(
+            {'connection_id': connection_id, 'run_id': run_id, 'dat_message': dat_message},
+            exchange=queue.exchange, routing_key=queue.routing_key,
+            declare=[queue], serializer='json',
+        )
+
+
+class RunLogConsumer:
+    """
+    Consumes run log messages from the broker and writes them in batches.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        session_factory=SessionLocal,
+        queue_name: str = RUN_LOG_QUEUE,
+        batch_rows: int = RUN_LOG_CONSUMER_BATCH_ROWS,
+        flush_interval_ms: int = RUN_LOG_CONSUMER_FLUSH_INTERVAL_MS,
+    ):
+        """
+        Args:
+            connection (Connection): The broker connection.
+            session_factory: Callable returning a new SQLAlchemy session.
+            queue_name (str): The queue to consume.
+            batch_rows (int): Write as soon as this many messages are pending.
+            flush_interval_ms (int): Write at the latest this long after the first pending message.
+        """
+        self.connection = connection
+        self.session_factory = session_factory
+        self.queue = run_log_queue(queue_name)
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.should_stop = False
+        self._pending = []
+        self._first_pending_at = None
+        self.stats = {'committed': 0, 'rejected': 0, 'requeued': 0, 'batches': 0}
+
+    def _on_message(self, body, message) -> None:
+        if not self._pending:
+            self._first_pending_at = time.monotonic()
+        self._pending.append((body, message))
+
+    def _on_decode_error(self, message, exc: Exception) -> None:
+        # Raising would stop the consumer and redeliver the message forever
+        logger.warning("Rejecting undecodable run log message: %s", exc)
+        message.reject(requeue=False)
+        self.stats['rejected'] += 1
+
+    def _flush_due(self) -> bool:
+        if not self._pending:
+            return False
+        return (len(self._pending) >= self.batch_rows
+                or time.monotonic() - self._first_pending_at >= self.flush_interval)
+
+    def _validate(self, pending: List[Tuple[Any, Any]]) -> Tuple[List[dict], List[Any], List[Any]]:
+        rows, accepted, rejected = [], [], []
+        for body, message in pending:
+            try:
+                if not isinstance(body, dict):
+                    raise InvalidRunLogMessage("Message body must be a JSON object")
+                try:
+                    connection_id, run_id = body['connection_id'], body['run_id']
+                    payload = body['dat_message']
+                except KeyError as exc:
+                    raise InvalidRunLogMessage(f"Message body has no {exc.args[0]}") from exc
+                try:
+                    # Looked up as a uuid below, where a malformed id would fail the batch
+                    connection_id = str(UUID(str(connection_id)))
+                except ValueError as exc:
+                    raise InvalidRunLogMessage(f"Invalid connection_id {connection_id!r}") from exc
+                rows.append(build_run_log_row_from_payload(connection_id, run_id, payload))
+                accepted.append(message)
+            except (ValidationError, InvalidRunLogMessage) as exc:
+                logger.warning("Rejecting run log message: %s", exc)
+                rejected.append(message)
+        return rows, accepted, rejected
+
+    def flush(self) -> int:
+        """
+        Writes the pending messages in one transaction and acknowledges them.
+
+        Returns:
+            int: The number of run logs committed, after ingest policies.
+        """
+        pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        rows, accepted, rejected = self._validate(pending)
+
+        db = self.session_factory()
+        try:
+            # Same check as the HTTP endpoints, so one unknown connection
+            # cannot fail the foreign key of the whole batch
+            connection_ids = {row['connection_id'] for row in rows}
+            known = {connection_id for connection_id, in db.query(ConnectionModel.id).filter(
+                ConnectionModel.id.in_(connection_ids))} if connection_ids else set()
+            if known != connection_ids:
+                kept = []
+                for row, message in zip(rows, accepted):
+                    if row['connection_id'] in known:
+                        kept.append((row, message))
+                    else:
+                        logger.warning("Rejecting run log of unknown connection %s", row['connection_id'])
+                        rejected.append(message)
+                rows = [row for row, _ in kept]
+                accepted = [message for _, message in kept]
+
+            rows = apply_ingest_policies(db, rows)
+            insert_run_log_rows(db, rows)
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            logger.exception("Writing %s run logs failed, requeueing them", len(pending))
+            for _, message in pending:
+                message.requeue()
+            self.stats['requeued'] += len(pending)
+            time.sleep(FAILURE_BACKOFF_SECONDS)
+            return 0
+        finally:
+            db.close()
+
+        for message in accepted:
+            message.ack()
+        for message in rejected:
+            message.reject(requeue=False)
+        self.stats['committed'] += len(rows)
+        self.stats['rejected'] += len(rejected)
+        self.stats['batches'] += 1
+        return len(rows)
+
+    def run(self, max_batches: Optional[int] = None) -> None:
+        """
+        Consumes until `should_stop` is set, or until `max_batches` writes.
+
+        Args:
+            max_batches (Optional[int]): Stop after this many batches, for tests.
+        """
+        with self.connection.Consumer(
+            self.queue, callbacks=[self._on_message], accept=['json'],
+            on_decode_error=self._on_decode_error, prefetch_count=self.batch_rows * 2,
+        ):
+            while not self.should_stop:
+                timeout = self.flush_interval
+                if self._pending:
+                    timeout = max(0, self._first_pending_at + self.flush_interval - time.monotonic())
+                try:
+                    self.connection.drain_events(timeout=timeout)
+                except socket.timeout:
+                    pass
+                if self._flush_due():
+                    self.flush()
+                    if max_batches is not None and self.stats['batches'] >= max_batches:
+                        break
+            self.flush()
+
+
+def consume_run_logs(broker_url: str = CELERY_BROKER_URL, **kwargs) -> None:
+    '''Runs a `RunLogConsumer` against `broker_url` until interrupted'''
+    with Connection(broker_url) as connection:
+        consumer = RunLogConsumer(connection, **kwargs)
+        try:
+            consumer.run()
+        except KeyboardInterrupt:
+            consumer.flush()
@@ -0,0 +1,230 @@
+"""
+Helpers shared by the connection run log ingestion endpoints.
+
+A `DatMessage` posted by a worker is turned into a plain row dictionary for the
+`connection_run_logs` table. Rows are written with a single multi-row INSERT so
+that a batch of messages costs one round trip and one commit. The per-run
+rollup in `connection_runs` and the stream checkpoints in
+`connection_stream_states` are updated in the same transaction.
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Tuple
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from dat_core.pydantic_models import DatMessage, Type
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from app.models.connection_run_log_model import ConnectionRunLogBatchLineResult
+from app.config import RUN_LOG_NOTIFY
+from .messages import extract_run_log_fields
+from .pubsub import notify_run_logs
+from .rollup import update_connection_runs
+from .stream_states import upsert_stream_states
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class InvalidRunLogMessage(ValueError):
+    '''Raised when a DatMessage cannot be stored as a connection run log'''
+
+
+def build_run_log_row(connection_id: str, run_id: str, dat_message: DatMessage) -> dict:
+    """
+    Converts a DatMessage into a row for the connection_run_logs table.
+
+    Args:
+        connection_id (str): The ID of the connection the message belongs to.
+        run_id (str): The ID of the run the message belongs to.
+        dat_message (DatMessage): A LOG or STATE message emitted by a worker.
+
+    Returns:
+        dict: Column values for a ConnectionRunLogs row, including the typed
+        columns extracted from the message.
+
+    Raises:
+        InvalidRunLogMessage: If the message is not a LOG/STATE message or has no payload.
+    """
+    if dat_message.type == Type.LOG:
+        _msg = dat_message.log
+    elif dat_message.type == Type.STATE:
+        _msg = dat_message.state
+    else:
+        raise InvalidRunLogMessage(
+            f"Unsupported message type {dat_message.type.value}, expected LOG or STATE")
+    if _msg is None:
+        raise InvalidRunLogMessage(
+            f"{dat_message.type.value} message has no {dat_message.type.value.lower()} payload")
+
+    message = _msg.model_dump_json()
+    received_at = datetime.utcnow()
+    # Generated here so the row can be published before it is read back
+    log_id = str(uuid.uuid4())
+    return {
+        "id": log_id,
+        "connection_id": connection_id,
+        "message": message,
+        "run_id": run_id,
+        "message_type": dat_message.type.value,
+        "created_at": received_at,
+        "updated_at": received_at,
+        **extract_run_log_fields(dat_message.type.value, message, received_at, log_id),
+    }
+
+
+def iter_batch_payloads(body: bytes, content_type: Optional[str]) -> Iterator[Tuple[int, Any]]:
+    """
+    Splits a batch request body into individual message payloads.
+
+    NDJSON bodies yield one raw string per non-empty line, anything else is
+    parsed as a JSON array and yields its elements.
+
+    Args:
+        body (bytes): The raw request body.
+        content_type (Optional[str]): The Content-Type header of the request.
+
+    Yields:
+        Tuple[int, Any]: The 1-based line (or array index) and its payload.
+
+    Raises:
+        InvalidRunLogMessage: If a JSON body is not an array.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NDJSON_CONTENT_TYPES:
+        for line_no, line in enumerate(body.decode("utf-8").splitlines(), start=1):
+            if line.strip():
+                yield line_no, line
+        return
+
+    try:
+        payloads = orjson.loads(body or b"[]")
+    except orjson.JSONDecodeError as exc:
+        raise InvalidRunLogMessage(f"Unable to parse request body as JSON: {exc}") from exc
+    if not isinstance(payloads, list):
+        raise InvalidRunLogMessage("Request body must be a JSON array of DatMessages")
+    for line_no, payload in enumerate(payloads, start=1):
+        yield line_no, payload
+
+
+def build_run_log_row_from_payload(connection_id: str, run_id: str, payload: Any) -> dict:
+    """
+    Validates a raw DatMessage payload and converts it with `build_run_log_row`.
+
+    Args:
+        connection_id (str): The ID of the connection the message belongs to.
+        run_id (str): The ID of the run the message belongs to.
+        payload (Any): The DatMessage as a JSON string or bytes, or already decoded.
+
+    Returns:
+        dict: Column values for a ConnectionRunLogs row.
+
+    Raises:
+        ValidationError: If the payload is not a valid DatMessage.
+        InvalidRunLogMessage: If the message cannot be stored as a run log.
+    """
+    if isinstance(payload, (str, bytes)):
+        dat_message = DatMessage.model_validate_json(payload)
+    else:
+        dat_message = DatMessage.model_validate(payload)
+    return build_run_log_row(connection_id, run_id, dat_message)
+
+
+def validate_batch(
+    connection_id: str,
+    run_id: str,
+    payloads: Iterator[Tuple[int, Any]],
+) -> Tuple[List[dict], List[ConnectionRunLogBatchLineResult]]:
+    """
+    Validates every payload of a batch before anything is written.
+
+    Args:
+        connection_id (str): The ID of the connection the batch belongs to.
+        run_id (str): The ID of the run the batch belongs to.
+        payloads (Iterator[Tuple[int, Any]]): Output of `iter_batch_payloads`.
+
+    Returns:
+        Tuple[List[dict], List[ConnectionRunLogBatchLineResult]]: The rows to
+        insert and the accept/reject result of every line.
+    """
+    rows = []
+    results = []
+    for line_no, payload in payloads:
+        try:
+            rows.append(build_run_log_row_from_payload(connection_id, run_id, payload))
+        except (ValidationError, InvalidRunLogMessage) as exc:
+            results.append(ConnectionRunLogBatchLineResult(
+                line=line_no, accepted=False, error=str(exc)))
+            continue
+        results.append(ConnectionRunLogBatchLineResult(line=line_no, accepted=True))
+    return rows, results
+
+
+def insert_run_log_rows(db, rows: List[dict], returning: bool = False) -> List[ConnectionRunLogs]:
+    """
+    Writes connection run log rows with one multi-row INSERT, folds them
+    into the connection_runs rollup, upserts STATE checkpoints and, with
+    RUN_LOG_NOTIFY, queues the notifications for live tails.
+
+    The caller owns the transaction and is expected to commit.
+
+    Args:
+        db (Session): The database session.
+        rows (List[dict]): Rows produced by `build_run_log_row`.
+        returning (bool): Return the inserted rows as ConnectionRunLogs objects.
+
+    Returns:
+        List[ConnectionRunLogs]: The inserted rows if `returning` is set, else an empty list.
+    """
+    if not rows:
+        return []
+    inserted = []
+    if returning:
+        inserted = list(db.scalars(insert(ConnectionRunLogs).returning(ConnectionRunLogs), rows))
+    else:
+        db.execute(insert(ConnectionRunLogs), rows)
+    update_connection_runs(db, rows)
+    upsert_stream_states(db, rows)
+    if RUN_LOG_NOTIFY:
+        notify_run_logs(db, rows)
+    return inserted
+
+
+def backfill_run_log_columns(db, connection_id: Optional[str] = None, chunk_size: int = 5000) -> int:
+    """
+    Fills the typed columns of connection run logs written before they existed.
+
+    Rows are processed in chunks, each committed on its own, so the command
+    can be interrupted and resumed.
+
+    Args:
+        db (Session): The database session.
+        connection_id (Optional[str]): Only backfill this connection.
+        chunk_size (int): Number of rows updated per transaction.
+
+    Returns:
+        int: The number of rows updated.
+    """
+    updated = 0
+    while True:
+        query = db.query(
+            ConnectionRunLogs.id,
+            ConnectionRunLogs.message_type,
+            ConnectionRunLogs.message,
+            ConnectionRunLogs.created_at,
+        ).filter(ConnectionRunLogs.emitted_at.is_(None))
+        if connection_id:
+            query = query.filter(ConnectionRunLogs.connection_id == connection_id)
+        logs = query.limit(chunk_size).all()
+        if not logs:
+            return updated
+
+        db.execute(update(ConnectionRunLogs), [
+            {
+                "id": log.id,
+                **extract_run_log_fields(
+                    log.message_type.value, log.message, log.created_at or datetime.utcnow(), log.id),
+            }
+            for log in logs
+        ])
+        db.commit()
+        updated += len(logs)
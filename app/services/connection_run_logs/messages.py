@@ -0,0 +1,160 @@
+"""
+Parsing of stored connection run log messages.
+
+The `message` column holds the JSON dump of a DatLogMessage or DatStateMessage.
+The fields used for sorting and aggregation are extracted from it once, when
+the message is ingested, and persisted as typed columns.
+
+Messages are decoded with orjson through `parse_message`. Log rows are
+immutable, so parsed messages are kept in a bounded LRU keyed by log id and
+the extraction, rollup and checkpoint steps of an ingest share one decode.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Optional
+import orjson
+from app.config import RUN_LOG_PARSE_CACHE_SIZE
+from app.db_models.connection_run_logs import LogLevel
+
+JOB_ENDED_MESSAGE = 'Job run ended'
+
+
+class ParsedMessageCache:
+    '''Thread-safe LRU of parsed messages keyed by log id'''
+
+    def __init__(self, max_size: int = RUN_LOG_PARSE_CACHE_SIZE):
+        self.max_size = max_size
+        self._messages = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, log_id: str) -> Optional[dict]:
+        with self._lock:
+            parsed = self._messages.get(log_id)
+            if parsed is None:
+                self.misses += 1
+                return None
+            self._messages.move_to_end(log_id)
+            self.hits += 1
+            return parsed
+
+    def put(self, log_id: str, parsed: dict) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._messages[log_id] = parsed
+            self._messages.move_to_end(log_id)
+            while len(self._messages) > self.max_size:
+                self._messages.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._messages.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {'size': len(self._messages), 'max_size': self.max_size,
+                'hits': self.hits, 'misses': self.misses}
+
+
+parsed_message_cache = ParsedMessageCache()
+
+
+def _loads(message) -> dict:
+    try:
+        parsed = orjson.loads(message)
+    except (orjson.JSONDecodeError, TypeError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def parse_message(message: str, log_id: Optional[str] = None) -> dict:
+    """
+    Decodes a stored message, at most once per process for a given log id.
+
+    The returned dict is shared with the cache and must not be mutated.
+
+    Args:
+        message (str): The JSON dump of the log or state message.
+        log_id (Optional[str]): The id of the log row; without it the message
+            is decoded without caching.
+
+    Returns:
+        dict: The parsed message, empty when it is not a JSON object.
+    """
+    if log_id is None:
+        return _loads(message)
+    parsed = parsed_message_cache.get(log_id)
+    if parsed is None:
+        parsed = _loads(message)
+        parsed_message_cache.put(log_id, parsed)
+    return parsed
+
+
+def emitted_at_from_message(message: dict, fallback: datetime) -> datetime:
+    '''Reads the UNIX emitted_at timestamp of a parsed message as a datetime'''
+    try:
+        return datetime.utcfromtimestamp(message['emitted_at'])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return fallback
+
+
+def _inner_payload(message: dict) -> dict:
+    '''Workers report counters as a JSON object serialized into the log text'''
+    return _loads(message.get('message', '{}'))
+
+
+def _stream_name(message: dict, payload: dict) -> Optional[str]:
+    stream = message.get('stream') or payload.get('stream')
+    if isinstance(stream, dict):
+        stream = stream.get('name')
+    return stream if isinstance(stream, str) else None
+
+
+def _stack_trace(message: dict) -> Optional[str]:
+    stack_trace = message.get('stack_trace')
+    return stack_trace if isinstance(stack_trace, str) and stack_trace else None
+
+
+def _int_counter(payload: dict, key: str) -> Optional[int]:
+    try:
+        return int(payload[key])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def extract_run_log_fields(message_type: str, message: str, received_at: datetime,
+                           log_id: Optional[str] = None) -> dict:
+    """
+    Extracts the typed columns of a connection run log from its message JSON.
+
+    Args:
+        message_type (str): LOG or STATE.
+        message (str): The JSON dump of the log or state message.
+        received_at (datetime): Used as emitted_at when the message has none.
+        log_id (Optional[str]): The id of the log row, see `parse_message`.
+
+    Returns:
+        dict: emitted_at, level, stream, n_docs_processed, n_docs_fetched
+        and stack_trace column values.
+    """
+    parsed = parse_message(message, log_id)
+    payload = _inner_payload(parsed) if message_type == 'LOG' else {}
+    level = parsed.get('level') if message_type == 'LOG' else None
+    return {
+        'emitted_at': emitted_at_from_message(parsed, received_at),
+        'level': level if level in LogLevel.__members__ else None,
+        'stream': _stream_name(parsed, payload),
+        'n_docs_processed': _int_counter(payload, 'n_docs_processed'),
+        'n_docs_fetched': _int_counter(payload, 'n_docs_fetched'),
+        'stack_trace': _stack_trace(parsed) if message_type == 'LOG' else None,
+    }
+
+
+def is_job_ended_message(message_type: str, message: str, log_id: Optional[str] = None) -> bool:
+    '''Whether a stored message is the worker's end-of-run LOG line'''
+    if message_type != 'LOG' or JOB_ENDED_MESSAGE not in message:
+        return False
+    return parse_message(message, log_id).get('message') == JOB_ENDED_MESSAGE
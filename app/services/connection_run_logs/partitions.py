@@ -0,0 +1,228 @@
+"""
+Monthly range partitioning of `connection_run_logs` by `created_at`.
+
+Once the table has been converted with `convert_to_partitioned`, the API keeps
+`RUN_LOG_PARTITIONS_AHEAD` monthly partitions created ahead of time and drops
+whole partitions older than `RUN_LOG_RETENTION_MONTHS` instead of running
+DELETE. The ORM model and the routers are unaware of partitioning: Postgres
+routes inserts and prunes partitions for queries filtering on created_at.
+"""
+import asyncio
+import logging
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from app.config import (
+    RUN_LOG_PARTITIONING, RUN_LOG_PARTITIONS_AHEAD,
+    RUN_LOG_RETENTION_MONTHS, RUN_LOG_PARTITION_MAINTENANCE_HOURS
+)
+from app.database import SessionLocal
+from app.db_models.connection_run_logs import ConnectionRunLogs
+
+logger = logging.getLogger(__name__)
+
+TABLE = ConnectionRunLogs.__tablename__
+LEGACY_PARTITION = f'{TABLE}_legacy'
+DEFAULT_PARTITION = f'{TABLE}_default'
+# Serializes partition maintenance across API replicas
+MAINTENANCE_LOCK_ID = 0x636f6e6e72756e
+
+_BOUND_RE = re.compile(r"FROM \((?:MINVALUE|'([^']+)')\) TO \((?:MAXVALUE|'([^']+)')\)")
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    '''Name of the partition holding the month starting at `month`'''
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned(db) -> bool:
+    '''Whether connection_run_logs is a partitioned table'''
+    relkind = db.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": TABLE},
+    ).scalar()
+    return relkind == 'p'
+
+
+def list_partitions(db) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+    """
+    Lists the partitions of connection_run_logs with their bounds.
+
+    Returns:
+        List[Tuple[str, Optional[datetime], Optional[datetime]]]: Name, lower
+        and upper bound of every range partition; None stands for MINVALUE or
+        MAXVALUE. The default partition is not listed.
+    """
+    partitions = db.execute(text(
+        "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+        "FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table) "
+        "ORDER BY child.relname"
+    ), {"table": TABLE}).all()
+
+    bounds = []
+    for name, bound in partitions:
+        match = _BOUND_RE.search(bound or '')
+        if match is None:
+            continue
+        lower, upper = match.groups()
+        bounds.append((
+            name,
+            datetime.fromisoformat(lower) if lower else None,
+            datetime.fromisoformat(upper) if upper else None,
+        ))
+    return bounds
+
+
+def convert_to_partitioned(db, today: Optional[date] = None) -> None:
+    """
+    Converts connection_run_logs into a table partitioned by month on created_at.
+
+    The existing table is renamed to connection_run_logs_legacy and attached as
+    the partition holding everything before next month, so no rows are
+    copied. The primary key becomes (id, created_at) because Postgres requires
+    the partition key in unique constraints. The table is locked for the
+    duration of the conversion, which is dominated by the validation scan of
+    the attached legacy partition.
+
+    Args:
+        db (Session): The database session.
+        today (Optional[date]): Reference date, defaults to today.
+    """
+    if is_partitioned(db):
+        return
+    boundary = _month_start(today or date.today(), 1)
+    indexes = sorted(ConnectionRunLogs.__table__.indexes, key=lambda index: index.name)
+
+    db.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+    db.execute(text(
+        f"UPDATE {TABLE} SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL"))
+    db.execute(text(f"ALTER TABLE {TABLE} ALTER COLUMN created_at SET NOT NULL"))
+    db.execute(text(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_PARTITION}"))
+    # A partition cannot keep a primary key of its own, attaching it builds (id, created_at)
+    db.execute(text(f"ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT IF EXISTS {TABLE}_pkey"))
+    # Index names are schema-wide, free them up for the partitioned parent
+    for index in indexes:
+        db.execute(text(f"ALTER INDEX IF EXISTS {index.name} RENAME TO {index.name}_legacy"))
+
+    db.execute(text(
+        f"CREATE TABLE {TABLE} (LIKE {LEGACY_PARTITION} INCLUDING ALL EXCLUDING INDEXES) "
+        f"PARTITION BY RANGE (created_at)"))
+    db.execute(text(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, created_at)"))
+    db.execute(text(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_connection_id_fkey "
+        f"FOREIGN KEY (connection_id) REFERENCES connections (id)"))
+    for index in indexes:
+        index.create(db.connection())
+
+    db.execute(text(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY_PARTITION} "
+        f"FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')"))
+    db.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+    db.commit()
+
+
+def create_partitions(db, months_ahead: int = RUN_LOG_PARTITIONS_AHEAD,
+                      today: Optional[date] = None) -> List[str]:
+    """
+    Creates the monthly partitions from the current month to `months_ahead` months ahead.
+
+    Months already covered by an existing partition are skipped.
+
+    Returns:
+        List[str]: The names of the partitions created.
+    """
+    today = today or date.today()
+    existing = list_partitions(db)
+    created = []
+    for offset in range(months_ahead + 1):
+        lower = datetime.combine(_month_start(today, offset), datetime.min.time())
+        upper = datetime.combine(_month_start(today, offset + 1), datetime.min.time())
+        overlaps = any(
+            (start is None or start < upper) and (end is None or end > lower)
+            for _, start, end in existing
+        )
+        if overlaps:
+            continue
+        name = partition_name(lower.date())
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"))
+        existing.append((name, lower, upper))
+        created.append(name)
+    return created
+
+
+def drop_expired_partitions(db, retention_months: int = RUN_LOG_RETENTION_MONTHS,
+                            today: Optional[date] = None) -> List[str]:
+    """
+    Drops every partition whose rows are all older than the retention window.
+
+    The window starts on the first day of the month `retention_months` months
+    before the current one. Nothing is dropped when `retention_months` is 0.
+
+    Returns:
+        List[str]: The names of the partitions dropped.
+    """
+    if retention_months <= 0:
+        return []
+    cutoff = datetime.combine(_month_start(today or date.today(), -retention_months), datetime.min.time())
+    dropped = []
+    for name, _, upper in list_partitions(db):
+        if upper is not None and upper <= cutoff:
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
+
+
+def maintain_partitions(db, today: Optional[date] = None) -> Tuple[List[str], List[str]]:
+    """
+    Creates upcoming partitions and applies the retention policy.
+
+    Holds a transaction-level advisory lock so concurrent replicas do not race.
+
+    Returns:
+        Tuple[List[str], List[str]]: The partitions created and dropped.
+    """
+    db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID})
+    if not is_partitioned(db):
+        db.rollback()
+        return [], []
+    created = create_partitions(db, today=today)
+    dropped = drop_expired_partitions(db, today=today)
+    db.commit()
+    return created, dropped
+
+
+def _run_maintenance() -> None:
+    db = SessionLocal()
+    try:
+        created, dropped = maintain_partitions(db)
+        if created or dropped:
+            logger.info("Run log partitions created: %s, dropped: %s", created, dropped)
+    finally:
+        db.close()
+
+
+async def run_partition_maintenance(interval_hours: float = RUN_LOG_PARTITION_MAINTENANCE_HOURS) -> None:
+    '''Runs partition maintenance now and then every `interval_hours`'''
+    while True:
+        try:
+            await asyncio.to_thread(_run_maintenance)
+        except Exception:
+            logger.exception("Run log partition maintenance failed")
+        await asyncio.sleep(interval_hours * 3600)
+
+
+def start_partition_maintenance() -> Optional[asyncio.Task]:
+    '''Schedules partition maintenance on the running loop when partitioning is enabled'''
+    if not RUN_LOG_PARTITIONING:
+        return None
+    return asyncio.create_task(run_partition_maintenance())
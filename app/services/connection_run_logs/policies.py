@@ -0,0 +1,264 @@
+"""
+Ingest policies of connection run logs: minimum level, sampling and per-run budgets.
+
+A policy can be set on a workspace and overridden field by field on one of its
+connections. Lines below the minimum level, left out by sampling, or over the
+run's line budget are not stored; they only increment the run's
+`dropped_count` in connection_runs and the in-process counters. STATE
+messages, ERROR/FATAL lines and the end-of-run line are always kept.
+
+Resolved policies are cached per connection for `RUN_LOG_POLICY_CACHE_SECONDS`,
+so ingestion does not query the policies table for every line. Policy writes
+clear the cache of the process serving them; other processes pick the change
+up once their entries expire.
+
+Single-message ingestion counts dropped lines in `pending_dropped_run_logs`
+and writes them with its next stored line, or once they are
+`RUN_LOG_DROPPED_FLUSH_SECONDS` old, rather than with one upsert per line.
+"""
+import logging
+import random
+import time
+from collections import Counter
+from threading import Lock
+from typing import Dict, List, Optional
+from sqlalchemy import or_, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from app.config import RUN_LOG_DROPPED_FLUSH_SECONDS, RUN_LOG_POLICY_CACHE_SECONDS
+from app.database import SessionLocal
+from app.db_models.connection_runs import ConnectionRun
+from app.db_models.connections import Connection as ConnectionModel
+from app.db_models.run_log_ingest_policies import RunLogIngestPolicy
+from .messages import is_job_ended_message
+from .rollup import record_dropped_run_logs
+
+logger = logging.getLogger(__name__)
+
+LEVEL_ORDER = {level: rank for rank, level in enumerate(
+    ('TRACE', 'DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL'))}
+ALWAYS_KEPT_LEVELS = ('ERROR', 'FATAL')
+POLICY_FIELDS = ('min_level', 'sample_rates', 'max_lines_per_run')
+_MISSING = object()
+
+
+class IngestPolicyCache:
+    '''Resolved ingest policies keyed by connection_id, expiring after `ttl` seconds'''
+
+    def __init__(self, ttl: float = RUN_LOG_POLICY_CACHE_SECONDS):
+        self.ttl = ttl
+        self._policies = {}
+        self._lock = Lock()
+
+    def get(self, connection_id: str):
+        '''The cached policy, which may be None, or `_MISSING` when absent or expired'''
+        with self._lock:
+            entry = self._policies.get(connection_id)
+        if entry is None or entry[0] < time.monotonic():
+            return _MISSING
+        return entry[1]
+
+    def put(self, connection_id: str, policy: Optional[dict]) -> None:
+        with self._lock:
+            self._policies[connection_id] = (time.monotonic() + self.ttl, policy)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._policies.clear()
+
+
+ingest_policy_cache = IngestPolicyCache()
+
+
+def _merge_dropped(dropped: Dict[tuple, dict], key: tuple, run: dict) -> None:
+    merged = dropped.setdefault(key, dict(run, dropped_count=0))
+    merged['start_time'] = min(merged['start_time'], run['start_time'])
+    merged['dropped_count'] += run['dropped_count']
+
+
+class PendingDroppedRunLogs:
+    '''Dropped line counts kept in memory until they are written to connection_runs'''
+
+    def __init__(self, max_age: float = RUN_LOG_DROPPED_FLUSH_SECONDS):
+        self.max_age = max_age
+        self._dropped = {}
+        self._since = None
+        self._lock = Lock()
+
+    def add(self, dropped: Dict[tuple, dict]) -> None:
+        with self._lock:
+            for key, run in dropped.items():
+                _merge_dropped(self._dropped, key, run)
+            if self._dropped and self._since is None:
+                self._since = time.monotonic()
+
+    def due(self) -> bool:
+        '''Whether the oldest pending count has waited `max_age` seconds'''
+        with self._lock:
+            return self._since is not None and time.monotonic() - self._since >= self.max_age
+
+    def flush(self, db) -> bool:
+        """
+        Upserts the pending counts in the caller's transaction.
+
+        The upsert runs in a savepoint; counts that cannot be written, e.g.
+        of a connection deleted meanwhile, are logged and discarded so they
+        do not fail every later flush.
+
+        Returns:
+            bool: Whether there was anything to write.
+        """
+        with self._lock:
+            dropped, self._dropped, self._since = self._dropped, {}, None
+        if not dropped:
+            return False
+        try:
+            with db.begin_nested():
+                record_dropped_run_logs(db, dropped)
+        except SQLAlchemyError:
+            logger.warning("Discarding the dropped counts of %d runs", len(dropped), exc_info=True)
+        return True
+
+
+pending_dropped_run_logs = PendingDroppedRunLogs()
+
+
+def flush_dropped_run_logs() -> None:
+    '''Writes the pending dropped counts in a transaction of their own, e.g. at shutdown'''
+    db = SessionLocal()
+    try:
+        if pending_dropped_run_logs.flush(db):
+            db.commit()
+    finally:
+        db.close()
+
+_counters = Counter()
+_counters_lock = Lock()
+
+
+def ingest_policy_stats() -> dict:
+    '''Lines kept and dropped by reason since the process started'''
+    with _counters_lock:
+        return {'kept': _counters['kept'], 'dropped_level': _counters['level'],
+                'dropped_sampled': _counters['sampled'], 'dropped_budget': _counters['budget']}
+
+
+def resolve_ingest_policy(db, connection_id: str) -> Optional[dict]:
+    """
+    Merges the workspace and connection ingest policies of a connection.
+
+    Args:
+        db (Session): The database session.
+        connection_id (str): The ID of the connection.
+
+    Returns:
+        Optional[dict]: min_level, sample_rates and max_lines_per_run, None
+        when neither the connection nor its workspace has a policy.
+    """
+    policy = ingest_policy_cache.get(connection_id)
+    if policy is not _MISSING:
+        return policy
+
+    workspace_id = db.query(ConnectionModel.workspace_id).filter(
+        ConnectionModel.id == connection_id).scalar_subquery()
+    policies = db.query(RunLogIngestPolicy).filter(or_(
+        RunLogIngestPolicy.connection_id == connection_id,
+        RunLogIngestPolicy.workspace_id == workspace_id,
+    )).all()
+    policy = None
+    # Workspace first so the connection's fields override it
+    for scoped in sorted(policies, key=lambda scoped: scoped.connection_id is not None):
+        policy = policy or dict.fromkeys(POLICY_FIELDS)
+        for field in POLICY_FIELDS:
+            if getattr(scoped, field) is not None:
+                policy[field] = getattr(scoped, field)
+    ingest_policy_cache.put(connection_id, policy)
+    return policy
+
+
+def _always_kept(row: dict) -> bool:
+    return (row['message_type'] != 'LOG'
+            or row['level'] in ALWAYS_KEPT_LEVELS
+            or is_job_ended_message(row['message_type'], row['message'], row['id']))
+
+
+def _drop_reason(row: dict, policy: dict) -> Optional[str]:
+    level = row['level']
+    if level is None:
+        return None
+    min_level = policy['min_level']
+    if min_level is not None and LEVEL_ORDER[level] < LEVEL_ORDER[min_level]:
+        return 'level'
+    sample_rate = (policy['sample_rates'] or {}).get(level)
+    if sample_rate is not None and random.random() >= sample_rate:
+        return 'sampled'
+    return None
+
+
+def apply_ingest_policies(db, rows: List[dict], defer_dropped: bool = False) -> List[dict]:
+    """
+    Filters freshly built run log rows through their connection's ingest policy.
+
+    Dropped lines are counted into connection_runs in the caller's
+    transaction. The per-run budget is checked against the stored log_count
+    of the run, so concurrent writers of one run can overshoot it slightly.
+
+    Args:
+        db (Session): The database session.
+        rows (List[dict]): Rows produced by `build_run_log_row`.
+        defer_dropped (bool): Add the dropped counts to `pending_dropped_run_logs`
+            instead, for the caller to flush.
+
+    Returns:
+        List[dict]: The rows to store, in their original order.
+    """
+    policies = {}
+    for row in rows:
+        if row['connection_id'] not in policies:
+            policies[row['connection_id']] = resolve_ingest_policy(db, row['connection_id'])
+    if not any(policies.values()):
+        with _counters_lock:
+            _counters['kept'] += len(rows)
+        return rows
+
+    # Run ids are unique per connection only
+    budgeted_runs = {(row['connection_id'], row['run_id']) for row in rows
+                     if (policies[row['connection_id']] or {}).get('max_lines_per_run') is not None}
+    stored = {}
+    if budgeted_runs:
+        stored = {
+            (str(connection_id), run_id): log_count
+            for connection_id, run_id, log_count in db.query(
+                ConnectionRun.connection_id, ConnectionRun.run_id, ConnectionRun.log_count).filter(
+                tuple_(ConnectionRun.connection_id, ConnectionRun.run_id).in_(budgeted_runs))
+        }
+
+    kept, dropped, reasons = [], {}, Counter()
+    for row in rows:
+        policy = policies[row['connection_id']]
+        run_key = (row['connection_id'], row['run_id'])
+        reason = None
+        if policy is not None and not _always_kept(row):
+            reason = _drop_reason(row, policy)
+            max_lines = policy['max_lines_per_run']
+            if reason is None and max_lines is not None and stored.get(run_key, 0) >= max_lines:
+                reason = 'budget'
+        if reason is None:
+            kept.append(row)
+            stored[run_key] = stored.get(run_key, 0) + 1
+            continue
+        reasons[reason] += 1
+        _merge_dropped(dropped, run_key, {
+            'run_id': row['run_id'],
+            'connection_id': row['connection_id'],
+            'start_time': row['emitted_at'],
+            'dropped_count': 1,
+        })
+
+    if defer_dropped:
+        pending_dropped_run_logs.add(dropped)
+    else:
+        record_dropped_run_logs(db, dropped)
+    with _counters_lock:
+        _counters['kept'] += len(kept)
+        _counters.update(reasons)
+    return kept
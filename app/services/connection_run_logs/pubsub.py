@@ -0,0 +1,196 @@
+"""
+Publish/subscribe of freshly ingested connection run logs for live tails.
+
+Subscribers register per connection and run and receive row dictionaries on
+a bounded asyncio queue; run ids are unique per connection only. Without `RUN_LOG_NOTIFY` rows are published in-process right
+after the ingest commit. With it, every ingest transaction also sends a
+Postgres NOTIFY and each API replica feeds its local subscribers from a
+LISTEN connection, so a tail sees logs ingested by any replica or consumer.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+import psycopg2
+from sqlalchemy import text
+from app.config import RUN_LOG_NOTIFY
+from app.database import DATABASE_URL, SessionLocal
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from .streaming import RESPONSE_COLUMNS, serialize_run_log
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'connection_run_logs'
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_MAX_PAYLOAD = 7900
+SUBSCRIBER_QUEUE_ROWS = 1000
+
+# Put on a subscriber queue that could not keep up; the tail should reconnect
+OVERFLOW = object()
+
+
+class RunLogPubSub:
+    """
+    Fans ingested run log rows out to the live tails of their run.
+    """
+
+    def __init__(self, notify: bool = RUN_LOG_NOTIFY, queue_rows: int = SUBSCRIBER_QUEUE_ROWS):
+        """
+        Args:
+            notify (bool): Deliver through Postgres LISTEN/NOTIFY instead of in-process.
+            queue_rows (int): Rows buffered per subscriber before it is dropped.
+        """
+        self.notify = notify
+        self.queue_rows = queue_rows
+        self._subscribers: Dict[Tuple[str, str], Set[asyncio.Queue]] = defaultdict(set)
+        self._listener = None
+
+    def subscribe(self, connection_id: str, run_id: str) -> asyncio.Queue:
+        '''Registers a subscriber queue for a run of a connection'''
+        queue = asyncio.Queue(maxsize=self.queue_rows)
+        self._subscribers[(connection_id, run_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, connection_id: str, run_id: str, queue: asyncio.Queue) -> None:
+        '''Removes a subscriber queue registered with `subscribe`'''
+        key = (connection_id, run_id)
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[key]
+
+    def has_subscribers(self, connection_id: str, run_id: str) -> bool:
+        return (connection_id, run_id) in self._subscribers
+
+    def publish(self, rows: List[dict]) -> None:
+        """
+        Publishes committed rows to local subscribers.
+
+        Must be called on the event loop after the ingest transaction committed.
+        A no-op in notify mode, where rows arrive through LISTEN instead.
+        """
+        if not self.notify:
+            self.deliver(rows)
+
+    def deliver(self, rows: List[dict]) -> None:
+        '''Hands rows to the subscribers of their connection and run'''
+        for row in rows:
+            connection_id = str(row['connection_id'])
+            for queue in list(self._subscribers.get((connection_id, row['run_id']), ())):
+                try:
+                    queue.put_nowait(row)
+                except asyncio.QueueFull:
+                    # A slow tail must not stall ingestion, it replays from its cursor
+                    self.unsubscribe(connection_id, row['run_id'], queue)
+                    queue.get_nowait()
+                    queue.put_nowait(OVERFLOW)
+
+    async def start(self) -> None:
+        '''Starts listening for notifications when notify mode is enabled'''
+        if not self.notify or self._listener is not None:
+            return
+        self._listener = _NotificationListener(self)
+        await self._listener.start()
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+def notify_run_logs(db, rows: List[dict]) -> None:
+    """
+    Queues a NOTIFY per row in the caller's transaction; Postgres delivers them on commit.
+
+    Rows too large for a NOTIFY payload are sent as a reference and read back
+    by the listening replicas that have subscribers for the run.
+
+    Args:
+        db (Session): The database session.
+        rows (List[dict]): Rows produced by `build_run_log_row`.
+    """
+    payloads = []
+    for row in rows:
+        reference = {'id': row['id'], 'connection_id': str(row['connection_id']), 'run_id': row['run_id']}
+        payload = json.dumps(reference | {'row': serialize_run_log(row)})
+        if len(payload.encode('utf-8')) >= NOTIFY_MAX_PAYLOAD:
+            payload = json.dumps(reference)
+        payloads.append(payload)
+    db.execute(
+        text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+        {'channel': NOTIFY_CHANNEL, 'payloads': payloads},
+    )
+
+
+class _NotificationListener:
+    '''LISTENs on a dedicated psycopg2 connection watched by the event loop'''
+
+    def __init__(self, pubsub: RunLogPubSub):
+        self.pubsub = pubsub
+        self._connection = None
+        self._loop = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._connection = psycopg2.connect(DATABASE_URL)
+        self._connection.set_session(autocommit=True)
+        with self._connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        self._loop.add_reader(self._connection.fileno(), self._on_readable)
+
+    def stop(self) -> None:
+        if self._connection is None:
+            return
+        self._loop.remove_reader(self._connection.fileno())
+        self._connection.close()
+        self._connection = None
+
+    def _on_readable(self) -> None:
+        try:
+            self._connection.poll()
+        except psycopg2.Error:
+            logger.exception("Lost the run log LISTEN connection, live tails fall back to this replica")
+            self.stop()
+            return
+        references = []
+        while self._connection.notifies:
+            notification = self._connection.notifies.pop(0)
+            try:
+                payload = json.loads(notification.payload)
+            except json.decoder.JSONDecodeError:
+                continue
+            if not self.pubsub.has_subscribers(payload['connection_id'], payload['run_id']):
+                continue
+            if 'row' in payload:
+                self.pubsub.deliver([json.loads(payload['row']) | {'id': payload['id']}])
+            else:
+                references.append(payload['id'])
+        if references:
+            self._loop.create_task(self._deliver_references(references))
+
+    async def _deliver_references(self, ids: List[str]) -> None:
+        try:
+            rows = await asyncio.to_thread(_load_run_logs, ids)
+        except Exception:
+            logger.exception("Failed to load %s notified run logs", len(ids))
+            return
+        self.pubsub.deliver(rows)
+
+
+def _load_run_logs(ids: List[str]) -> List[dict]:
+    db = SessionLocal()
+    try:
+        return [
+            row._asdict()
+            for row in db.query(ConnectionRunLogs.id, *RESPONSE_COLUMNS)
+            .filter(ConnectionRunLogs.id.in_(ids))
+            .order_by(ConnectionRunLogs.emitted_at, ConnectionRunLogs.id)
+        ]
+    finally:
+        db.close()
+
+
+run_log_pubsub = RunLogPubSub()
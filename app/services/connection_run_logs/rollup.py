@@ -0,0 +1,282 @@
+"""
+Maintenance of the `connection_runs` and `connection_run_streams` rollup tables.
+
+Every ingested batch of connection run logs is folded into one row per run
+(and one row per run and stream) with an atomic upsert, so `/agg-run-logs`
+can be answered from the rollups in O(runs) without reading raw log rows.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import and_, case, cast, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.db_models.connection_runs import ConnectionRun
+from app.db_models.connection_run_streams import ConnectionRunStream
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from app.models.agg_conn_run_log_model import AggConnRunLogRunsStatus
+from .messages import JOB_ENDED_MESSAGE, is_job_ended_message
+
+ERROR_LEVELS = ('ERROR', 'FATAL')
+
+
+def run_status(ended: bool, records_updated: int, error_count: int) -> AggConnRunLogRunsStatus:
+    '''Derives the status of a run from its rollup counters'''
+    if not ended:
+        return AggConnRunLogRunsStatus.RUNNING
+    if error_count > 0:
+        if records_updated <= 0:
+            return AggConnRunLogRunsStatus.FAILURE
+        return AggConnRunLogRunsStatus.PARTIAL_SUCCESS
+    if records_updated <= 0:
+        return AggConnRunLogRunsStatus.PARTIAL_SUCCESS
+    return AggConnRunLogRunsStatus.SUCCESS
+
+
+def summarize_run_logs(rows: Iterable[dict]) -> Dict[tuple, dict]:
+    """
+    Folds connection run log rows into one summary per run.
+
+    Args:
+        rows (Iterable[dict]): Rows produced by `build_run_log_row`.
+
+    Returns:
+        Dict[tuple, dict]: Rollup values keyed by (connection_id, run_id).
+    """
+    summaries = {}
+    for row in rows:
+        emitted_at = row['emitted_at']
+        key = (row['connection_id'], row['run_id'])
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = {
+                'run_id': row['run_id'],
+                'connection_id': row['connection_id'],
+                'start_time': emitted_at,
+                'end_time': None,
+                'records_updated': 0,
+                'error_count': 0,
+                'log_count': 0,
+            }
+        summary['start_time'] = min(summary['start_time'], emitted_at)
+        summary['log_count'] += 1
+
+        if row['message_type'] != 'LOG':
+            continue
+        if is_job_ended_message(row['message_type'], row['message'], row.get('id')):
+            summary['end_time'] = max(filter(None, (summary['end_time'], emitted_at)))
+        if row['level'] in ERROR_LEVELS:
+            summary['error_count'] += 1
+        summary['records_updated'] += row['n_docs_processed'] or 0
+
+    for summary in summaries.values():
+        summary['status'] = run_status(
+            summary['end_time'] is not None,
+            summary['records_updated'],
+            summary['error_count'],
+        ).value
+    return summaries
+
+
+def summarize_run_streams(rows: Iterable[dict]) -> Dict[tuple, dict]:
+    """
+    Folds connection run log rows into one document count summary per run and stream.
+
+    Only LOG rows carrying a stream and at least one document counter are
+    counted. Workers that do not report `n_docs_fetched` get their fetched
+    count from `n_docs_processed`.
+
+    Args:
+        rows (Iterable[dict]): Rows produced by `build_run_log_row`.
+
+    Returns:
+        Dict[tuple, dict]: Rollup values keyed by (connection_id, run_id, stream).
+    """
+    summaries = {}
+    for row in rows:
+        if row['message_type'] != 'LOG' or not row['stream']:
+            continue
+        processed, fetched = row['n_docs_processed'], row.get('n_docs_fetched')
+        if processed is None and fetched is None:
+            continue
+        key = (row['connection_id'], row['run_id'], row['stream'])
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = {
+                'connection_id': row['connection_id'],
+                'run_id': row['run_id'],
+                'stream': row['stream'],
+                'docs_fetched': 0,
+                'records_updated': 0,
+            }
+        summary['docs_fetched'] += fetched if fetched is not None else processed
+        summary['records_updated'] += processed or 0
+    return summaries
+
+
+def _status_expression(end_time, records_updated, error_count):
+    return cast(case(
+        (end_time.is_(None), AggConnRunLogRunsStatus.RUNNING.value),
+        (and_(error_count > 0, records_updated <= 0), AggConnRunLogRunsStatus.FAILURE.value),
+        (error_count > 0, AggConnRunLogRunsStatus.PARTIAL_SUCCESS.value),
+        (records_updated <= 0, AggConnRunLogRunsStatus.PARTIAL_SUCCESS.value),
+        else_=AggConnRunLogRunsStatus.SUCCESS.value,
+    ), ConnectionRun.__table__.c.status.type)
+
+
+def update_connection_runs(db, rows: List[dict]) -> None:
+    """
+    Folds freshly ingested log rows into the connection_runs rollup.
+
+    Runs the upsert in the caller's transaction so the rollup commits (or
+    rolls back) together with the log rows.
+
+    Args:
+        db (Session): The database session.
+        rows (List[dict]): Rows produced by `build_run_log_row`.
+    """
+    summaries = summarize_run_logs(rows)
+    if not summaries:
+        return
+
+    # Sorted so concurrent flushes lock rollup rows in the same order
+    values = [summaries[key] for key in sorted(summaries)]
+    stmt = pg_insert(ConnectionRun).values(values)
+    excluded = stmt.excluded
+    table = ConnectionRun.__table__.c
+
+    end_time = func.greatest(table.end_time, excluded.end_time)
+    records_updated = table.records_updated + excluded.records_updated
+    error_count = table.error_count + excluded.error_count
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.connection_id, table.run_id],
+        set_={
+            'start_time': func.least(table.start_time, excluded.start_time),
+            'end_time': end_time,
+            'records_updated': records_updated,
+            'error_count': error_count,
+            'log_count': table.log_count + excluded.log_count,
+            'status': _status_expression(end_time, records_updated, error_count),
+            'updated_at': datetime.utcnow(),
+        },
+    )
+    db.execute(stmt)
+    _update_connection_run_streams(db, rows)
+
+
+def _update_connection_run_streams(db, rows: List[dict]) -> None:
+    summaries = summarize_run_streams(rows)
+    if not summaries:
+        return
+
+    values = [summaries[key] for key in sorted(summaries)]
+    stmt = pg_insert(ConnectionRunStream).values(values)
+    table = ConnectionRunStream.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.connection_id, table.run_id, table.stream],
+        set_={
+            'docs_fetched': table.docs_fetched + stmt.excluded.docs_fetched,
+            'records_updated': table.records_updated + stmt.excluded.records_updated,
+            'updated_at': datetime.utcnow(),
+        },
+    )
+    db.execute(stmt)
+
+
+def record_dropped_run_logs(db, dropped: Dict[tuple, dict]) -> None:
+    """
+    Adds log lines dropped by ingest policies to the dropped_count of their runs.
+
+    Args:
+        db (Session): The database session.
+        dropped (Dict[tuple, dict]): run_id, connection_id, start_time and
+            dropped_count of each run, keyed by (connection_id, run_id).
+    """
+    if not dropped:
+        return
+
+    values = [dropped[key] for key in sorted(dropped)]
+    stmt = pg_insert(ConnectionRun).values(values)
+    table = ConnectionRun.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.connection_id, table.run_id],
+        set_={
+            'start_time': func.least(table.start_time, stmt.excluded.start_time),
+            'dropped_count': table.dropped_count + stmt.excluded.dropped_count,
+            'updated_at': datetime.utcnow(),
+        },
+    )
+    db.execute(stmt)
+
+
+def backfill_connection_runs(db, connection_id: Optional[str] = None) -> int:
+    """
+    Rebuilds connection_runs from the typed columns of connection_run_logs.
+
+    The aggregation runs as one INSERT ... SELECT ... GROUP BY connection_id,
+    run_id and overwrites the existing rollup rows of the processed runs; the
+    per-stream rollup is rebuilt the same way, grouped by connection_id,
+    run_id and stream. Logs written before the typed columns existed must be backfilled
+    first with `backfill_run_log_columns`.
+
+    Args:
+        db (Session): The database session.
+        connection_id (Optional[str]): Only backfill this connection.
+
+    Returns:
+        int: The number of runs written.
+    """
+    logs = ConnectionRunLogs.__table__.c
+    ended = and_(logs.message_type == 'LOG',
+                 logs.message.like(f'%"message":"{JOB_ENDED_MESSAGE}"%'))
+    end_time = func.max(logs.emitted_at).filter(ended)
+    records_updated = func.coalesce(func.sum(logs.n_docs_processed), 0)
+    error_count = func.count().filter(logs.level.in_(ERROR_LEVELS))
+
+    select_runs = select(
+        logs.run_id,
+        logs.connection_id,
+        func.coalesce(func.min(logs.emitted_at), func.min(logs.created_at)),
+        end_time,
+        _status_expression(end_time, records_updated, error_count),
+        records_updated,
+        error_count,
+        func.count(),
+    ).group_by(logs.connection_id, logs.run_id)
+    if connection_id:
+        select_runs = select_runs.where(logs.connection_id == connection_id)
+
+    columns = ('run_id', 'connection_id', 'start_time', 'end_time', 'status',
+               'records_updated', 'error_count', 'log_count')
+    stmt = pg_insert(ConnectionRun).from_select(columns, select_runs)
+    table = ConnectionRun.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.connection_id, table.run_id],
+        set_={column: stmt.excluded[column] for column in columns[2:]},
+    )
+    written = db.execute(stmt).rowcount
+    _backfill_connection_run_streams(db, connection_id)
+    db.commit()
+    return written
+
+
+def _backfill_connection_run_streams(db, connection_id: Optional[str] = None) -> None:
+    logs = ConnectionRunLogs.__table__.c
+    counted = and_(logs.message_type == 'LOG', logs.stream.isnot(None),
+                   or_(logs.n_docs_processed.isnot(None), logs.n_docs_fetched.isnot(None)))
+    select_streams = select(
+        logs.connection_id,
+        logs.run_id,
+        logs.stream,
+        func.sum(func.coalesce(logs.n_docs_fetched, logs.n_docs_processed)),
+        func.coalesce(func.sum(logs.n_docs_processed), 0),
+    ).where(counted).group_by(logs.connection_id, logs.run_id, logs.stream)
+    if connection_id:
+        select_streams = select_streams.where(logs.connection_id == connection_id)
+
+    columns = ('connection_id', 'run_id', 'stream', 'docs_fetched', 'records_updated')
+    stmt = pg_insert(ConnectionRunStream).from_select(columns, select_streams)
+    table = ConnectionRunStream.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.connection_id, table.run_id, table.stream],
+        set_={column: stmt.excluded[column] for column in columns[3:]},
+    )
+    db.execute(stmt)
@@ -0,0 +1,53 @@
+"""
+Full-text search over connection run log messages and stack traces.
+
+Matches come from the GIN index on the generated `search_vector` column,
+which Postgres maintains on insert, and are ranked with `ts_rank_cd`. Queries
+use `websearch_to_tsquery` syntax: quoted phrases, `or` and `-` exclusions.
+Logs moved to the cold-tier archive are not searched.
+"""
+from typing import List, Optional, Tuple
+from sqlalchemy import func, literal, tuple_
+from app.db_models.connection_run_logs import ConnectionRunLogs, SEARCH_CONFIG
+from app.db_models.connections import Connection as ConnectionModel
+from .streaming import RESPONSE_COLUMNS
+
+
+def search_run_logs(db, workspace_id: str, query: str, page_size: int,
+                    after: Optional[Tuple[float, str]] = None, filters=()) -> Tuple[List[dict], Optional[Tuple[float, str]]]:
+    """
+    Returns one page of run logs matching a search query, best match first.
+
+    Args:
+        db (Session): The database session.
+        workspace_id (str): Only search the connections of this workspace.
+        query (str): The search query in websearch syntax.
+        page_size (int): Number of results per page.
+        after (Optional[Tuple[float, str]]): (rank, id) of the last result of the previous page.
+        filters: Additional SQLAlchemy criteria on ConnectionRunLogs.
+
+    Returns:
+        Tuple[List[dict], Optional[Tuple[float, str]]]: The results with their
+        id and rank, and the (rank, id) to continue from, None on the last page.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    rank = func.ts_rank_cd(ConnectionRunLogs.search_vector, tsquery).label('rank')
+    search = db.query(ConnectionRunLogs.id, rank, *RESPONSE_COLUMNS).join(
+        ConnectionModel, ConnectionRunLogs.connection_id == ConnectionModel.id
+    ).filter(
+        ConnectionModel.workspace_id == workspace_id,
+        ConnectionRunLogs.search_vector.op('@@')(tsquery),
+        *filters,
+    )
+    if after is not None:
+        after_rank, after_id = after
+        # Typed like the column, asyncpg would send the id as varchar
+        search = search.filter(tuple_(rank, ConnectionRunLogs.id)
+                               < tuple_(after_rank, literal(after_id, ConnectionRunLogs.id.type)))
+    rows = search.order_by(rank.desc(), ConnectionRunLogs.id.desc()).limit(page_size + 1).all()
+
+    after = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        after = (rows[-1].rank, rows[-1].id)
+    return [row._asdict() for row in rows], after
@@ -0,0 +1,96 @@
+"""
+Run duration, throughput and failure statistics over the `connection_runs` rollup.
+
+Percentiles are computed by Postgres with `percentile_cont` over one row per
+run, and the time series is downsampled into `date_trunc` buckets in the same
+pass, so the cost does not depend on how many log lines the runs produced.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import func, literal_column
+from app.db_models.connection_runs import ConnectionRun
+
+BUCKETS = ('hour', 'day', 'week', 'month')
+
+
+def auto_bucket(from_datetime: datetime, to_datetime: datetime) -> str:
+    '''Picks the bucket size keeping a window to at most a few hundred points'''
+    span = to_datetime - from_datetime
+    if span <= timedelta(days=7):
+        return 'hour'
+    if span <= timedelta(days=180):
+        return 'day'
+    if span <= timedelta(days=3 * 365):
+        return 'week'
+    return 'month'
+
+
+def _stats_columns():
+    finished = ConnectionRun.end_time.isnot(None)
+    duration = func.extract('epoch', ConnectionRun.end_time - ConnectionRun.start_time)
+    return (
+        func.count().label('runs'),
+        func.count().filter(finished).label('finished_runs'),
+        func.count().filter(ConnectionRun.status == 'FAILURE').label('failed_runs'),
+        func.count().filter(ConnectionRun.status == 'PARTIAL_SUCCESS').label('partial_success_runs'),
+        func.percentile_cont(0.5).within_group(duration).filter(finished).label('duration_p50'),
+        func.percentile_cont(0.95).within_group(duration).filter(finished).label('duration_p95'),
+        func.percentile_cont(0.99).within_group(duration).filter(finished).label('duration_p99'),
+        func.coalesce(func.sum(ConnectionRun.records_updated).filter(finished), 0).label('records_updated'),
+        func.sum(duration).filter(finished).label('total_duration'),
+    )
+
+
+def _stats(row) -> dict:
+    total_duration = float(row.total_duration or 0)
+    return {
+        'runs': row.runs,
+        'finished_runs': row.finished_runs,
+        'failed_runs': row.failed_runs,
+        'partial_success_runs': row.partial_success_runs,
+        'failure_rate': row.failed_runs / row.finished_runs if row.finished_runs else None,
+        'duration_p50': row.duration_p50,
+        'duration_p95': row.duration_p95,
+        'duration_p99': row.duration_p99,
+        'records_updated': int(row.records_updated),
+        'docs_per_second': int(row.records_updated) / total_duration if total_duration else None,
+    }
+
+
+def connection_run_stats(db, connection_id: str, from_datetime: datetime, to_datetime: datetime,
+                         bucket: Optional[str] = None) -> Tuple[str, dict, list]:
+    """
+    Computes the run statistics of a connection over a time window.
+
+    Durations are in seconds and only finished runs count towards them, the
+    failure rate and the throughput. Throughput is the records updated by the
+    finished runs divided by their total duration.
+
+    Args:
+        db (Session): The database session.
+        connection_id (str): The ID of the connection.
+        from_datetime (datetime): Lower bound (inclusive) on the run start time.
+        to_datetime (datetime): Upper bound (exclusive) on the run start time.
+        bucket (Optional[str]): One of `BUCKETS`, picked from the window when None.
+
+    Returns:
+        Tuple[str, dict, list]: The bucket size, the statistics of the whole
+        window and the statistics per bucket, oldest first.
+    """
+    bucket = bucket or auto_bucket(from_datetime, to_datetime)
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unsupported bucket '{bucket}', expected one of {', '.join(BUCKETS)}")
+    window = (
+        ConnectionRun.connection_id == connection_id,
+        ConnectionRun.start_time >= from_datetime,
+        ConnectionRun.start_time < to_datetime,
+    )
+    overall = db.query(*_stats_columns()).filter(*window).one()
+
+    # Inlined so the GROUP BY expression matches the selected one
+    bucket_start = func.date_trunc(literal_column(f"'{bucket}'"), ConnectionRun.start_time)
+    buckets = db.query(bucket_start.label('bucket_start'), *_stats_columns()).filter(
+        *window).group_by(bucket_start).order_by(bucket_start).all()
+    return bucket, _stats(overall), [
+        {'bucket_start': row.bucket_start, **_stats(row)} for row in buckets
+    ]
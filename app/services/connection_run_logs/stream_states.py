@@ -0,0 +1,116 @@
+"""
+Maintenance of the `connection_stream_states` checkpoint table.
+
+Every ingested STATE message with data is upserted as the checkpoint of its
+(connection_id, stream name) unless a newer checkpoint is already stored, so
+`/stream-states` reads O(streams) rows instead of the whole STATE history.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from app.db_models.connection_stream_states import ConnectionStreamState
+from .messages import parse_message
+
+
+def latest_stream_states(rows: Iterable[dict]) -> Dict[Tuple[str, str], dict]:
+    """
+    Picks the newest STATE message with data per connection and stream.
+
+    Args:
+        rows (Iterable[dict]): Rows with connection_id, run_id, message,
+            message_type, emitted_at and stream.
+
+    Returns:
+        Dict[Tuple[str, str], dict]: Checkpoint values keyed by (connection_id, stream_name).
+    """
+    checkpoints = {}
+    for row in rows:
+        if getattr(row['message_type'], 'value', row['message_type']) != 'STATE' or not row['stream']:
+            continue
+        stream_state = parse_message(row['message'], row.get('id')).get('stream_state')
+        if not isinstance(stream_state, dict) or not stream_state.get('data'):
+            continue
+
+        checkpoint = {
+            'connection_id': row['connection_id'],
+            'stream_name': row['stream'],
+            'stream_state': stream_state,
+            'emitted_at': row['emitted_at'],
+            'run_id': row['run_id'],
+        }
+        key = (row['connection_id'], row['stream'])
+        if key not in checkpoints or checkpoints[key]['emitted_at'] <= checkpoint['emitted_at']:
+            checkpoints[key] = checkpoint
+    return checkpoints
+
+
+def upsert_stream_states(db, rows: List[dict]) -> None:
+    """
+    Upserts the STATE messages among freshly ingested rows as stream checkpoints.
+
+    Runs in the caller's transaction; an older state never overwrites a newer one.
+
+    Args:
+        db (Session): The database session.
+        rows (List[dict]): Rows produced by `build_run_log_row`.
+    """
+    checkpoints = latest_stream_states(rows)
+    if not checkpoints:
+        return
+
+    values = [checkpoints[key] for key in sorted(checkpoints)]
+    stmt = pg_insert(ConnectionStreamState).values(values)
+    table = ConnectionStreamState.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.connection_id, table.stream_name],
+        set_={
+            'stream_state': stmt.excluded.stream_state,
+            'emitted_at': stmt.excluded.emitted_at,
+            'run_id': stmt.excluded.run_id,
+            'updated_at': datetime.utcnow(),
+        },
+        where=stmt.excluded.emitted_at >= table.emitted_at,
+    )
+    db.execute(stmt)
+
+
+def backfill_stream_states(db, connection_id: Optional[str] = None, chunk_size: int = 5000) -> int:
+    """
+    Rebuilds connection_stream_states from the STATE rows in connection_run_logs.
+
+    Logs written before the typed columns existed must be backfilled first
+    with `backfill_run_log_columns`.
+
+    Args:
+        db (Session): The database session.
+        connection_id (Optional[str]): Only backfill this connection.
+        chunk_size (int): Number of log rows fetched per round trip.
+
+    Returns:
+        int: The number of STATE rows scanned.
+    """
+    query = db.query(
+        ConnectionRunLogs.connection_id,
+        ConnectionRunLogs.run_id,
+        ConnectionRunLogs.message,
+        ConnectionRunLogs.message_type,
+        ConnectionRunLogs.stream,
+        func.coalesce(ConnectionRunLogs.emitted_at, ConnectionRunLogs.created_at).label('emitted_at'),
+    ).filter(ConnectionRunLogs.message_type == 'STATE')
+    if connection_id:
+        query = query.filter(ConnectionRunLogs.connection_id == connection_id)
+
+    scanned = 0
+    pending = []
+    for log in query.yield_per(chunk_size):
+        pending.append(log._asdict())
+        if len(pending) >= chunk_size:
+            upsert_stream_states(db, pending)
+            scanned += len(pending)
+            pending = []
+    upsert_stream_states(db, pending)
+    scanned += len(pending)
+    db.commit()
+    return scanned
@@ -0,0 +1,90 @@
+"""
+NDJSON streaming of connection run log listings.
+
+Rows are read through a server-side cursor (`yield_per`) on a session owned by
+the stream and written out as they arrive, so memory stays constant and the
+first bytes go out before the whole result has been read. The session comes
+from the request's `get_stream_session_factory`, a read replica for GET
+requests when replicas are configured.
+"""
+import itertools
+from typing import Callable, Iterable, Iterator
+import orjson
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from app.database import SessionLocal
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from app.models.connection_run_log_model import ConnectionRunLogResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_ROWS = 1000
+
+RESPONSE_FIELDS = list(ConnectionRunLogResponse.model_fields)
+RESPONSE_COLUMNS = [getattr(ConnectionRunLogs, field) for field in RESPONSE_FIELDS]
+
+
+def wants_ndjson(request: Request) -> bool:
+    '''Whether the client asked for an NDJSON stream through its Accept header'''
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dump_run_log(row: dict) -> bytes:
+    return orjson.dumps(
+        {field: row.get(field) for field in RESPONSE_FIELDS},
+        default=_json_default,
+    )
+
+
+def serialize_run_log(row: dict) -> str:
+    '''Serializes a run log row to the JSON of a ConnectionRunLogResponse'''
+    return _dump_run_log(row).decode("utf-8")
+
+
+def iter_run_logs_ndjson(build_query: Callable, chunk_rows: int = STREAM_CHUNK_ROWS,
+                         archived_rows: Iterable[dict] = (),
+                         session_factory: Callable = SessionLocal) -> Iterator[bytes]:
+    """
+    Yields connection run logs as NDJSON, `chunk_rows` lines at a time.
+
+    Args:
+        build_query (Callable): Receives a session and returns the query to
+            stream; it is applied to the response columns only.
+        chunk_rows (int): Rows fetched per round trip and lines per chunk.
+        archived_rows (Iterable[dict]): Rows read from the archive, streamed
+            before the rows still stored in Postgres.
+        session_factory (Callable): Returns the session the rows are read with.
+
+    Yields:
+        bytes: A chunk of NDJSON lines.
+    """
+    db = session_factory()
+    try:
+        query = build_query(db.query(*RESPONSE_COLUMNS)).yield_per(chunk_rows)
+        rows = itertools.chain(archived_rows, (row._asdict() for row in query))
+        lines = []
+        for row in rows:
+            lines.append(_dump_run_log(row))
+            if len(lines) >= chunk_rows:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+    finally:
+        db.close()
+
+
+def stream_run_logs(build_query: Callable, archived_rows: Iterable[dict] = (),
+                    session_factory: Callable = SessionLocal) -> StreamingResponse:
+    '''Wraps `iter_run_logs_ndjson` into an NDJSON StreamingResponse'''
+    return StreamingResponse(
+        iter_run_logs_ndjson(build_query, archived_rows=archived_rows, session_factory=session_factory),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
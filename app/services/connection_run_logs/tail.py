@@ -0,0 +1,141 @@
+"""
+Server-Sent Events live tail of a run's logs.
+
+A tail first replays the logs stored after the client's cursor, in
+(emitted_at, id) order, then pushes rows published by `run_log_pubsub` as
+they are ingested. Every event carries its cursor as the SSE id, so a client
+that reconnects with `Last-Event-ID` resumes where it stopped.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import tuple_
+from app.common.utils import encode_cursor, decode_cursor
+from app.config import RUN_LOG_TAIL_KEEPALIVE_SECONDS
+from app.database import SessionLocal
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from app.db_models.connection_runs import ConnectionRun
+from .messages import is_job_ended_message
+from .pubsub import OVERFLOW, run_log_pubsub
+from .streaming import RESPONSE_COLUMNS, serialize_run_log
+
+REPLAY_PAGE_ROWS = 1000
+# Rows committed around the subscription may be both replayed and published
+DEDUPE_WINDOW = timedelta(minutes=1)
+
+
+def _as_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def run_log_cursor(row: dict) -> str:
+    '''Cursor of a run log row in tail order'''
+    return encode_cursor(_as_datetime(row['emitted_at']), row['id'])
+
+
+def decode_run_log_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """
+    Decodes a cursor produced by `run_log_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed or not a run log cursor.
+    """
+    values = decode_cursor(cursor)
+    if len(values) != 2:
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    emitted_at, log_id = values
+    if not (emitted_at is None or isinstance(emitted_at, datetime)) or not isinstance(log_id, str):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return emitted_at, log_id
+
+
+def _event(row: dict) -> str:
+    return f"id: {run_log_cursor(row)}\nevent: log\ndata: {serialize_run_log(row)}\n\n"
+
+
+def _load_replay_page(connection_id: str, run_id: str, after: Optional[Tuple]) -> Tuple[List[dict], bool]:
+    # Always the primary, never a read replica: logs committed just before the
+    # tail subscribed are only found by this replay, and a lagging replica
+    # would not have them yet
+    db = SessionLocal()
+    try:
+        query = db.query(ConnectionRunLogs.id, *RESPONSE_COLUMNS).filter(
+            ConnectionRunLogs.connection_id == connection_id, ConnectionRunLogs.run_id == run_id)
+        if after is not None:
+            query = query.filter(
+                tuple_(ConnectionRunLogs.emitted_at, ConnectionRunLogs.id) > tuple_(*after))
+        rows = [
+            row._asdict()
+            for row in query.order_by(ConnectionRunLogs.emitted_at, ConnectionRunLogs.id)
+            .limit(REPLAY_PAGE_ROWS)
+        ]
+        ended = db.query(ConnectionRun.end_time).filter(
+            ConnectionRun.connection_id == connection_id,
+            ConnectionRun.run_id == run_id).scalar() is not None
+        return rows, ended
+    finally:
+        db.close()
+
+
+def _ends_run(row: dict) -> bool:
+    message_type = getattr(row['message_type'], 'value', row['message_type'])
+    return is_job_ended_message(message_type, row['message'], row.get('id'))
+
+
+async def tail_run_logs(request: Request, connection_id: str, run_id: str,
+                        cursor: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Yields SSE events for the logs of a run, replayed after `cursor` and then live.
+
+    The stream ends after the run's end-of-job log, or with an `overflow`
+    event when the client could not keep up and should reconnect.
+
+    Args:
+        request (Request): The incoming request, polled for disconnects.
+        connection_id (str): The ID of the connection of the run.
+        run_id (str): The ID of the run to tail, unique per connection only.
+        cursor (Optional[str]): Cursor of the last event the client has seen.
+
+    Yields:
+        str: Server-Sent Events.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    after = decode_run_log_cursor(cursor) if cursor else None
+    queue = run_log_pubsub.subscribe(connection_id, run_id)
+    subscribed_at = datetime.utcnow()
+    try:
+        replayed = set()
+        ended = False
+        while True:
+            rows, ended = await asyncio.to_thread(_load_replay_page, connection_id, run_id, after)
+            for row in rows:
+                if row['created_at'] >= subscribed_at - DEDUPE_WINDOW:
+                    replayed.add(row['id'])
+                yield _event(row)
+            if len(rows) < REPLAY_PAGE_ROWS:
+                break
+            after = (rows[-1]['emitted_at'], rows[-1]['id'])
+        if ended:
+            yield "event: end\ndata: {}\n\n"
+            return
+
+        while not await request.is_disconnected():
+            try:
+                row = await asyncio.wait_for(queue.get(), RUN_LOG_TAIL_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if row is OVERFLOW:
+                yield "event: overflow\ndata: {}\n\n"
+                return
+            if row['id'] in replayed:
+                continue
+            yield _event(row)
+            if _ends_run(row):
+                yield "event: end\ndata: {}\n\n"
+                return
+    finally:
+        run_log_pubsub.unsubscribe(connection_id, run_id, queue)
@@ -0,0 +1,153 @@
+"""
+Online preparation of `connection_run_logs` for native uuid ids.
+
+Migration 0010 changes the text ids of every table to the uuid type. The run
+log table is too large to rewrite under an exclusive lock, so
+`prepare_uuid_columns` does the long work beforehand while the API keeps
+writing:
+    - adds the uuid shadow columns id_uuid and connection_id_uuid
+    - installs a trigger filling them on every insert and update
+    - backfills the existing rows in batches, committing each one
+    - builds the unique and secondary indexes of the shadow columns concurrently
+    - proves they are filled with CHECK constraints validated without blocking writes
+
+The migration then only swaps the columns in, which takes a short lock. It
+converts the table in place when it was not prepared. A partitioned table is
+always converted in place: Postgres cannot build its indexes concurrently.
+"""
+import logging
+from typing import List, Tuple
+from sqlalchemy import text
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from .partitions import TABLE, is_partitioned
+
+logger = logging.getLogger(__name__)
+
+# The columns migrated online, each with its shadow column `{column}_uuid`
+UUID_COLUMNS = ('id', 'connection_id')
+SYNC_FUNCTION = f'{TABLE}_uuid_sync'
+SYNC_TRIGGER = f'{TABLE}_uuid_sync'
+# Becomes the primary key when migration 0010 swaps the columns
+PRIMARY_KEY_INDEX = f'{TABLE}_id_uuid_key'
+
+
+def shadow_column(column: str) -> str:
+    return f'{column}_uuid'
+
+
+def not_null_check(column: str) -> str:
+    '''Name of the CHECK constraint proving a shadow column is filled'''
+    return f'{TABLE}_{shadow_column(column)}_not_null'
+
+
+def _shadow_indexes() -> List[Tuple[str, str]]:
+    '''(name, CREATE INDEX statement) of the model indexes over the uuid columns, on the shadow columns'''
+    statements = []
+    for index in sorted(ConnectionRunLogs.__table__.indexes, key=lambda index: index.name):
+        names = [column.name for column in index.columns]
+        if not set(names) & set(UUID_COLUMNS) or len(names) != len(index.expressions):
+            continue
+        columns = ', '.join(shadow_column(name) if name in UUID_COLUMNS else name for name in names)
+        name = f'{index.name}_uuid'
+        statements.append((name, f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {TABLE} ({columns})"))
+    return statements
+
+
+def _create_index_concurrently(connection, name: str, statement: str) -> None:
+    # An interrupted concurrent build leaves an invalid index behind
+    invalid = connection.execute(text(
+        "SELECT EXISTS (SELECT FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid)"
+    ), {"name": name}).scalar()
+    if invalid:
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    logger.info("Building %s", name)
+    connection.execute(text(statement))
+
+
+def _install_sync_trigger(db) -> None:
+    assignments = ' '.join(
+        f"NEW.{shadow_column(column)} := NEW.{column}::uuid;" for column in UUID_COLUMNS)
+    db.execute(text(
+        f"ALTER TABLE {TABLE} "
+        + ', '.join(f"ADD COLUMN IF NOT EXISTS {shadow_column(column)} uuid" for column in UUID_COLUMNS)))
+    db.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {SYNC_FUNCTION}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            {assignments}
+            RETURN NEW;
+        END $$
+    """))
+    db.execute(text(f"DROP TRIGGER IF EXISTS {SYNC_TRIGGER} ON {TABLE}"))
+    db.execute(text(
+        f"CREATE TRIGGER {SYNC_TRIGGER} BEFORE INSERT OR UPDATE OF {', '.join(UUID_COLUMNS)} "
+        f"ON {TABLE} FOR EACH ROW EXECUTE FUNCTION {SYNC_FUNCTION}()"))
+    db.commit()
+
+
+def _backfill(db, batch_rows: int) -> int:
+    filled = ', '.join(f"{shadow_column(column)} = {column}::uuid" for column in UUID_COLUMNS)
+    missing = ' OR '.join(f"{shadow_column(column)} IS NULL" for column in UUID_COLUMNS)
+    updated, after = 0, ''
+    while True:
+        # Keyset batches over the primary key, each committed on its own
+        last = db.execute(text(
+            f"SELECT max(id) FROM (SELECT id FROM {TABLE} WHERE id > :after ORDER BY id LIMIT :rows) batch"
+        ), {"after": after, "rows": batch_rows}).scalar()
+        if last is None:
+            # End the read transaction, its lock would block the constraints
+            db.commit()
+            return updated
+        updated += db.execute(text(
+            f"UPDATE {TABLE} SET {filled} WHERE id > :after AND id <= :last AND ({missing})"
+        ), {"after": after, "last": last}).rowcount
+        db.commit()
+        after = last
+        logger.info("Backfilled uuid columns of %s run logs, up to id %s", updated, after)
+
+
+def prepare_uuid_columns(db, batch_rows: int = 10000) -> int:
+    """
+    Prepares connection_run_logs for migration 0010 without blocking writes.
+
+    Safe to run again after an interruption; every step resumes or is skipped.
+
+    Args:
+        db (Session): The database session. The indexes and constraints are
+            built on a separate autocommit connection of its engine.
+        batch_rows (int): Number of rows backfilled per transaction.
+
+    Returns:
+        int: The number of rows backfilled.
+
+    Raises:
+        ValueError: If connection_run_logs is partitioned or its ids are
+            already uuids.
+    """
+    if is_partitioned(db):
+        raise ValueError(f"{TABLE} is partitioned, migration 0010 converts it in place")
+    data_type = db.execute(text(
+        "SELECT data_type FROM information_schema.columns WHERE table_name = :table AND column_name = 'id'"
+    ), {"table": TABLE}).scalar()
+    if data_type == 'uuid':
+        raise ValueError(f"{TABLE}.id is already a uuid")
+
+    _install_sync_trigger(db)
+    updated = _backfill(db, batch_rows)
+
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        _create_index_concurrently(
+            connection, PRIMARY_KEY_INDEX,
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {PRIMARY_KEY_INDEX} "
+            f"ON {TABLE} ({shadow_column('id')})")
+        for name, statement in _shadow_indexes():
+            _create_index_concurrently(connection, name, statement)
+
+        for column in UUID_COLUMNS:
+            check = not_null_check(column)
+            # NOT VALID skips the scan; VALIDATE scans without blocking writes
+            connection.execute(text(
+                f"DO $$ BEGIN "
+                f"ALTER TABLE {TABLE} ADD CONSTRAINT {check} CHECK ({shadow_column(column)} IS NOT NULL) NOT VALID; "
+                f"EXCEPTION WHEN duplicate_object THEN NULL; END $$"))
+            connection.execute(text(f"ALTER TABLE {TABLE} VALIDATE CONSTRAINT {check}"))
+    return updated
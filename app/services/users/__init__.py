@@ -1,9 +1,9 @@
-from sqlalchemy.orm import Session
-from ...database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database import get_async_db
 from fastapi import Depends
 from .users import Users
 
-def get_service(db_session: Session = Depends(get_db)):
+def get_service(db_session: AsyncSession = Depends(get_async_db)):
     return Users(db_session)
 
 user_service_dependency = Depends(get_service)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import bcrypt
+from sqlalchemy import select
 from app.db_models.users import User as UserModel
 from app.db_models.workspace_users import WorkspaceUser
 from app.db_models.workspaces import Workspace
@@ -15,11 +16,11 @@ class Users():
         Initializes the Users object with a database session.
 
         Parameters:
-        - db_session: SQLAlchemy database session.
+        - db_session: SQLAlchemy async database session.
         """
         self.db_session = db_session
 
-    def verify_user(self, email, password):
+    async def verify_user(self, email, password):
         """
         Verify user credentials.
 
@@ -34,18 +35,20 @@ class Users():
         - NotFound: If user is not found.
         - Unauthorized: If user email and password do not match
         """
-        user = self.db_session.query(UserModel).filter(UserModel.email == email).first()
+        user = (await self.db_session.scalars(
+            select(UserModel).filter(UserModel.email == email))).first()
         if user:
             if bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8')):
                 # Fetch workspace_id from workspace_users table
-                workspace_user = self.db_session.query(WorkspaceUser).filter(WorkspaceUser.user_id == user.id).first()
+                workspace_user = (await self.db_session.scalars(
+                    select(WorkspaceUser).filter(WorkspaceUser.user_id == user.id))).first()
                 if workspace_user:
                     workspace_id = workspace_user.workspace_id
                 else:
                     workspace_id = None
 
                 if workspace_id:
-                    workspace = self.db_session.query(Workspace).filter(Workspace.id == workspace_id).first()
+                    workspace = await self.db_session.get(Workspace, workspace_id)
                     workspace_name = workspace.name
                     organization_id = workspace.organization_id
 
@@ -61,7 +64,7 @@ class Users():
             raise Unauthorized("Email and Password do not match")
         raise NotFound("User Not Found")
 
-    def fetch_users(self):
+    async def fetch_users(self):
         """
         Fetch all users.
 
@@ -69,12 +72,12 @@ class Users():
         - list: List of all users.
         """
         try:
-            users = self.db_session.query(UserModel).all()
+            users = (await self.db_session.scalars(select(UserModel))).all()
             return users
         except Exception as e:
             raise NotFound(str(e))
 
-    def create_user(self, email, password):
+    async def create_user(self, email, password):
         """
         Create a new user.
 
@@ -88,7 +91,8 @@ class Users():
         hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
         user = UserModel(email=email, password_hash=hashed_password)
         self.db_session.add(user)
-        self.db_session.commit()
+        await self.db_session.commit()
+        await self.db_session.refresh(user)
         return UserResponse(
             id=user.id,
             email=user.email,
@@ -97,7 +101,7 @@ class Users():
             updated_at=user.updated_at
         )
 
-    def update_user(self, user_id, email, password):
+    async def update_user(self, user_id, email, password):
         """
         Update a user.
 
@@ -109,12 +113,13 @@ class Users():
         Returns:
         - dict: Dictionary containing updated user information.
         """
-        user = self.db_session.query(UserModel).filter(UserModel.id == user_id).first()
+        user = await self.db_session.get(UserModel, user_id)
         if user:
             hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
             user.email = email
             user.password_hash = hashed_password
-            self.db_session.commit()
+            await self.db_session.commit()
+            await self.db_session.refresh(user)
             return UserResponse(
                 id=user.id,
                 email=user.email,
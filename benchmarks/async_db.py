@@ -0,0 +1,93 @@
+"""
+Concurrent request throughput of an async route on the sync and async sessions.
+
+Builds a throwaway FastAPI app with two versions of the same endpoint: one
+querying through `SessionLocal` (psycopg2) from an `async def` route, as the
+routers used to, the other through `AsyncSessionLocal` (asyncpg). Each request
+runs a query taking `--query-ms` on the server (pg_sleep), standing in for a
+slow dashboard query. Requests are sent in-process through httpx's ASGI
+transport at increasing concurrency, so the numbers only reflect how the
+event loop and the database sessions behave.
+
+The sync route blocks the loop for the whole query, so its throughput stays
+at about 1000 / query-ms whatever the concurrency; the async route overlaps
+queries up to the size of the connection pool.
+
+Needs the database of DATABASE_URL.
+
+Usage:
+    python -m benchmarks.async_db [--requests 200] [--query-ms 20] [--concurrency 1 8 32]
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from app.database import SessionLocal, async_engine, get_async_db
+
+SLOW_QUERY = text("SELECT pg_sleep(:seconds)")
+
+
+def sync_db():
+    with SessionLocal() as db:
+        yield db
+
+
+def build_app(query_ms: float) -> FastAPI:
+    app = FastAPI()
+    params = {"seconds": query_ms / 1000}
+
+    @app.get("/sync")
+    async def sync_route(db=Depends(sync_db)):
+        db.execute(SLOW_QUERY, params)
+        return {}
+
+    @app.get("/async")
+    async def async_route(db=Depends(get_async_db)):
+        await db.execute(SLOW_QUERY, params)
+        return {}
+
+    return app
+
+
+async def throughput(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def run(args) -> None:
+    app = build_app(args.query_ms)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # Open the pools' connections before timing
+        await throughput(client, "/sync", 1, 1)
+        await throughput(client, "/async", max(args.concurrency), max(args.concurrency))
+
+        print(f"{'concurrency':>11}{'sync req/s':>14}{'async req/s':>14}{'speedup':>10}")
+        for concurrency in args.concurrency:
+            sync_rate = await throughput(client, "/sync", args.requests, concurrency)
+            async_rate = await throughput(client, "/async", args.requests, concurrency)
+            print(f"{concurrency:>11}{sync_rate:>14,.1f}{async_rate:>14,.1f}{async_rate / sync_rate:>9.1f}x")
+    await async_engine.dispose()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Sync vs async session throughput benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--query-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
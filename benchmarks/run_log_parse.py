@@ -0,0 +1,84 @@
+"""
+Micro-benchmark of run log message parsing on a single 100k-row run.
+
+Compares the per-request decoding the run log endpoints used to do (json.loads
+of every message in is_job_ended, get_int_from_list and
+get_emitted_at_from_conn_run_log, plus DatLogMessage validation) with the
+orjson parse layer in app.services.connection_run_logs.messages, cold and with
+the parsed message cache warm.
+
+Usage:
+    python -m benchmarks.run_log_parse [--rows 100000] [--repeat 3]
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+from dat_core.pydantic_models import DatLogMessage
+from app.services.connection_run_logs.messages import (
+    extract_run_log_fields, is_job_ended_message, parse_message, parsed_message_cache
+)
+
+
+def make_rows(count: int) -> list:
+    rows = []
+    for i in range(count):
+        payload = json.dumps({'stream': f'stream_{i % 7}', 'n_docs_processed': i % 50})
+        message = json.dumps({
+            'level': 'ERROR' if i % 97 == 0 else 'INFO',
+            'message': 'Job run ended' if i == count - 1 else payload,
+            'stack_trace': None,
+            'emitted_at': 1700000000 + i,
+        })
+        rows.append({'id': str(uuid.uuid4()), 'message_type': 'LOG', 'message': message})
+    return rows
+
+
+def legacy(rows: list) -> None:
+    for row in rows:
+        json.loads(row['message']).get('message') == 'Job run ended'
+        try:
+            int(json.loads(json.loads(row['message'])['message'])['n_docs_processed'])
+        except (ValueError, KeyError, TypeError):
+            pass
+        DatLogMessage(**json.loads(row['message'])).emitted_at
+
+
+def parse_layer(rows: list) -> None:
+    received_at = datetime.utcnow()
+    for row in rows:
+        is_job_ended_message(row['message_type'], row['message'], row['id'])
+        extract_run_log_fields(row['message_type'], row['message'], received_at, row['id'])
+        parse_message(row['message'], row['id']).get('emitted_at')
+
+
+def timed(label: str, func, rows: list, repeat: int, before=None) -> float:
+    best = None
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        func(rows)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<28}{best * 1000:>10.1f} ms{len(rows) / best:>14,.0f} rows/s")
+    return best
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run log message parsing benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.rows)
+    parsed_message_cache.max_size = args.rows
+    baseline = timed("json.loads + DatLogMessage", legacy, rows, args.repeat)
+    cold = timed("orjson, cold cache", parse_layer, rows, args.repeat, parsed_message_cache.clear)
+    warm = timed("orjson, warm cache", parse_layer, rows, args.repeat)
+    print(f"speedup: {baseline / cold:.1f}x cold, {baseline / warm:.1f}x warm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Index size and join speed of varchar(36) ids against native uuid ids.
+
+Builds two copies of the same synthetic data, shaped like connections,
+connection_run_logs and connection_runs: one keyed by varchar(36) as before
+migration 0010, one by uuid. Each has the primary keys and the
+(connection_id, emitted_at) and (run_id, emitted_at) indexes of the run log
+table. Reports the size of every index and the timing of:
+    - run: the join of GET /connection-run-logs/runs/{run_id}, logs of one run
+      joined to their connection to check its workspace
+    - connection: count of the logs of one connection, by connection_id
+    - workspace: count of the logs of a workspace, a hash join over every log
+
+Run ids are text in both copies, as in the schema. The queries are timed
+wrapped in count(*), so the numbers are the database's work, without sending
+and decoding the rows. The tables are created in the database of DATABASE_URL
+and dropped afterwards.
+
+Usage:
+    python -m benchmarks.uuid_keys [--rows 500000] [--connections 200] [--queries 200]
+"""
+import argparse
+import random
+import time
+from sqlalchemy import text
+from app.database import engine
+
+KINDS = {"text": "varchar(36)", "uuid": "uuid"}
+INDEXES = ("connections_pkey", "run_logs_pkey", "run_logs_connection_id_emitted_at",
+           "run_logs_run_id_emitted_at", "runs_pkey")
+QUERIES = {
+    "run": (
+        "SELECT l.id, l.message FROM {kind}_run_logs l JOIN {kind}_connections c ON l.connection_id = c.id "
+        "WHERE l.run_id = :run_id AND c.workspace_id = :workspace_id ORDER BY l.emitted_at"
+    ),
+    "connection": "SELECT count(*) FROM {kind}_run_logs WHERE connection_id = :connection_id",
+    "workspace": (
+        "SELECT count(*) FROM {kind}_run_logs l JOIN {kind}_connections c ON l.connection_id = c.id "
+        "WHERE c.workspace_id = :workspace_id"
+    ),
+}
+
+
+def table(kind: str, name: str) -> str:
+    return f"bench_{kind}_{name}"
+
+
+def create_tables(connection, args) -> None:
+    for kind, id_type in KINDS.items():
+        connections, run_logs, runs = (table(kind, name) for name in ("connections", "run_logs", "runs"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {run_logs}, {runs}, {connections}"))
+        connection.execute(text(
+            f"CREATE TABLE {connections} (id {id_type} CONSTRAINT {connections}_pkey PRIMARY KEY, "
+            f"workspace_id {id_type} NOT NULL)"))
+        connection.execute(text(
+            f"CREATE TABLE {run_logs} (id {id_type} CONSTRAINT {run_logs}_pkey PRIMARY KEY, "
+            f"connection_id {id_type} NOT NULL, run_id varchar(36) NOT NULL, "
+            f"emitted_at timestamp NOT NULL, message text NOT NULL)"))
+        connection.execute(text(
+            f"CREATE TABLE {runs} (run_id varchar(36) CONSTRAINT {runs}_pkey PRIMARY KEY, "
+            f"connection_id {id_type} NOT NULL)"))
+
+    uuid_connections, uuid_run_logs, uuid_runs = (
+        table("uuid", name) for name in ("connections", "run_logs", "runs"))
+    connection.execute(text(
+        f"INSERT INTO {uuid_connections} "
+        f"SELECT gen_random_uuid(), workspace.id FROM generate_series(1, :connections) g "
+        f"JOIN (SELECT n, gen_random_uuid() AS id FROM generate_series(0, 9) n) workspace ON workspace.n = g % 10"
+    ), {"connections": args.connections})
+    connection.execute(text(
+        f"INSERT INTO {uuid_runs} SELECT gen_random_uuid()::text, c.id "
+        f"FROM {uuid_connections} c, generate_series(1, :runs_per_connection)"
+    ), {"runs_per_connection": args.runs_per_connection})
+    connection.execute(text(
+        f"INSERT INTO {uuid_run_logs} "
+        f"SELECT gen_random_uuid(), r.connection_id, r.run_id, now() - g * interval '1 second', 'log line ' || g "
+        f"FROM generate_series(1, :rows) g "
+        f"JOIN (SELECT row_number() OVER () - 1 AS n, run_id, connection_id FROM {uuid_runs}) r "
+        f"ON r.n = g % :runs"
+    ), {"rows": args.rows, "runs": args.connections * args.runs_per_connection})
+
+    # The same rows with their ids as text
+    connection.execute(text(
+        f"INSERT INTO {table('text', 'connections')} SELECT id::text, workspace_id::text FROM {uuid_connections}"))
+    connection.execute(text(
+        f"INSERT INTO {table('text', 'runs')} SELECT run_id, connection_id::text FROM {uuid_runs}"))
+    connection.execute(text(
+        f"INSERT INTO {table('text', 'run_logs')} "
+        f"SELECT id::text, connection_id::text, run_id, emitted_at, message FROM {uuid_run_logs}"))
+
+    for kind in KINDS:
+        run_logs = table(kind, "run_logs")
+        connection.execute(text(
+            f"CREATE INDEX {run_logs}_connection_id_emitted_at ON {run_logs} (connection_id, emitted_at)"))
+        connection.execute(text(
+            f"CREATE INDEX {run_logs}_run_id_emitted_at ON {run_logs} (run_id, emitted_at)"))
+        for name in ("connections", "run_logs", "runs"):
+            connection.execute(text(f"VACUUM ANALYZE {table(kind, name)}"))
+
+
+def index_sizes(connection) -> None:
+    print(f"{'index':<36}{'varchar(36)':>14}{'uuid':>14}{'ratio':>8}")
+    for index in INDEXES:
+        sizes = [
+            connection.execute(text("SELECT pg_relation_size(to_regclass(:name))"),
+                               {"name": f"bench_{kind}_{index}"}).scalar()
+            for kind in KINDS
+        ]
+        print(f"{index:<36}{sizes[0] / 2 ** 20:>11,.1f} MB{sizes[1] / 2 ** 20:>11,.1f} MB"
+              f"{sizes[1] / sizes[0]:>8.2f}")
+
+
+def timings(connection, args) -> None:
+    uuid_connections = table("uuid", "connections")
+    samples = {
+        "run": [
+            {"run_id": run_id, "workspace_id": str(workspace_id)}
+            for run_id, workspace_id in connection.execute(text(
+                f"SELECT r.run_id, c.workspace_id FROM {table('uuid', 'runs')} r "
+                f"JOIN {uuid_connections} c ON c.id = r.connection_id"))
+        ],
+        "connection": [
+            {"connection_id": str(connection_id)}
+            for connection_id, in connection.execute(text(f"SELECT id FROM {uuid_connections}"))
+        ],
+        "workspace": [
+            {"workspace_id": str(workspace_id)}
+            for workspace_id, in connection.execute(text(f"SELECT DISTINCT workspace_id FROM {uuid_connections}"))
+        ],
+    }
+    print(f"\n{'query':<14}{'varchar(36) ms':>16}{'uuid ms':>12}{'speedup':>10}")
+    for name, query in QUERIES.items():
+        count = args.queries if name != "workspace" else max(args.queries // 20, 5)
+        params = random.Random(0).choices(samples[name], k=count)
+        elapsed = {}
+        for kind in KINDS:
+            statement = text(f"SELECT count(*) FROM ({query.format(kind=f'bench_{kind}')}) q")
+            # Warm the cache before timing
+            for values in params[:10]:
+                connection.execute(statement, values).scalar()
+            start = time.perf_counter()
+            for values in params:
+                connection.execute(statement, values).scalar()
+            elapsed[kind] = (time.perf_counter() - start) * 1000 / count
+        print(f"{name:<14}{elapsed['text']:>16.3f}{elapsed['uuid']:>12.3f}"
+              f"{elapsed['text'] / elapsed['uuid']:>9.2f}x")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="varchar(36) vs uuid keys benchmark")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--runs-per-connection", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark tables")
+    args = parser.parse_args(argv)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        create_tables(connection, args)
+        try:
+            index_sizes(connection)
+            timings(connection, args)
+        finally:
+            if not args.keep:
+                for kind in KINDS:
+                    connection.execute(text(
+                        f"DROP TABLE {table(kind, 'run_logs')}, {table(kind, 'runs')}, {table(kind, 'connections')}"))
+
+
+if __name__ == "__main__":
+    main()
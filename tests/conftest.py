@@ -0,0 +1,76 @@
+"""
+Shared fixtures.
+
+Tests touching Postgres run against the database of TEST_DATABASE_URL, which
+is migrated to head and emptied after every test, and are skipped without it.
+Point it at a disposable database.
+"""
+import os
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # app.database binds its engines when it is first imported
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+
+@pytest.fixture(scope="session")
+def migrated_database():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from app.manage import main
+    assert main(["migrate"]) == 0
+
+
+@pytest.fixture
+def db(migrated_database):
+    from sqlalchemy import text
+    from app.database import SessionLocal, engine
+    from app.db_models import Base
+
+    session = SessionLocal()
+    yield session
+    session.close()
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {', '.join(Base.metadata.tables)} CASCADE"))
+
+
+@pytest.fixture
+def connection(db):
+    '''A connection of a new workspace, with the actor instances it needs'''
+    from app.db_models.actors import Actor
+    from app.db_models.actor_instances import ActorInstance
+    from app.db_models.connections import Connection
+    from app.db_models.organizations import Organization
+    from app.db_models.workspaces import Workspace
+
+    organization = Organization(name="organization")
+    db.add(organization)
+    db.flush()
+    workspace = Workspace(organization_id=organization.id, name="workspace")
+    actor = Actor(name="actor", module_name="actor", actor_type="source", status="active")
+    db.add_all([workspace, actor])
+    db.flush()
+    instance = ActorInstance(workspace_id=workspace.id, actor_id=actor.id, name="instance",
+                             configuration={}, actor_type="source")
+    db.add(instance)
+    db.flush()
+    connection = Connection(
+        workspace_id=workspace.id, name="connection", source_instance_id=instance.id,
+        generator_instance_id=instance.id, destination_instance_id=instance.id)
+    db.add(connection)
+    db.commit()
+    return connection
+
+
+@pytest.fixture
+def client(migrated_database):
+    from fastapi.testclient import TestClient
+    from app.database import async_engine
+    from app.main import app
+
+    # Entered once so every request runs on the loop the async pool is bound to
+    with TestClient(app) as client:
+        yield client
+        # The pooled connections belong to this loop, the next test has its own
+        client.portal.call(async_engine.dispose)
@@ -0,0 +1,19 @@
+from app.db_models.actor_instances import ActorInstance
+from app.internal.connections import orchestra_config_cache
+
+
+def test_cached_config_sees_updates_made_through_another_session(db, connection, client):
+    orchestra_config_cache.clear()
+    url = f"/internal/connections/{connection.id}"
+    assert client.get(url).json()["source"]["connection_specification"] == {}
+    assert orchestra_config_cache.get(str(connection.id)) is not None
+
+    # As another process would, without invalidating this one's cache
+    instance = db.get(ActorInstance, connection.source_instance_id)
+    instance.configuration = {"api_key": "rotated"}
+    db.commit()
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.json()["source"]["connection_specification"] == {"api_key": "rotated"}
+    assert client.get(url).json()["source"]["connection_specification"] == {"api_key": "rotated"}
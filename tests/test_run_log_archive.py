@@ -0,0 +1,82 @@
+import io
+from datetime import datetime, timedelta
+import pyarrow.parquet as pq
+import pytest
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from app.db_models.connection_runs import ConnectionRun
+from app.services.connection_run_logs import archive
+from app.services.connection_run_logs.archive import FileSystemArchiveStore, archive_run_logs
+
+OLD = datetime.utcnow() - timedelta(days=200)
+
+
+class UnavailableArchiveStore(FileSystemArchiveStore):
+    def put(self, key: str, data: bytes) -> None:
+        raise OSError("archive store unavailable")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "RUN_LOG_ARCHIVE_DIR", str(tmp_path))
+    return FileSystemArchiveStore(str(tmp_path))
+
+
+def add_logs(db, connection, run_id, start, count, prefix="line"):
+    logs = []
+    for index in range(count):
+        at = start + timedelta(minutes=index)
+        logs.append(ConnectionRunLogs(
+            connection_id=connection.id, run_id=run_id, message=f"{prefix} {index}",
+            message_type="LOG", level="INFO", emitted_at=at, created_at=at, updated_at=at))
+    db.add_all(logs)
+    db.commit()
+    return logs
+
+
+def live_log_ids(db, connection):
+    return {log_id for log_id, in db.query(ConnectionRunLogs.id).filter(
+        ConnectionRunLogs.connection_id == connection.id)}
+
+
+def test_archive_moves_a_chunk_out_of_postgres(db, connection, store):
+    old = add_logs(db, connection, "old-run", OLD, 5)
+    recent = add_logs(db, connection, "recent-run", datetime.utcnow(), 2)
+    old_ids = {log.id for log in old}
+
+    archived = archive_run_logs(db, store, datetime.utcnow() - timedelta(days=90), chunk_rows=10)
+
+    assert archived == 5
+    keys = store.list(f"{archive.ARCHIVE_PREFIX}/connection_id={connection.id}/")
+    assert len(keys) == 1
+    table = pq.read_table(io.BytesIO(store.get(keys[0])))
+    assert set(table.column("id").to_pylist()) == old_ids
+    db.rollback()
+    assert live_log_ids(db, connection) == {log.id for log in recent}
+
+
+def test_failed_put_keeps_the_logs_in_postgres(db, connection, tmp_path):
+    old = add_logs(db, connection, "old-run", OLD, 5)
+
+    with pytest.raises(OSError):
+        archive_run_logs(db, UnavailableArchiveStore(str(tmp_path)), datetime.utcnow() - timedelta(days=90))
+
+    db.rollback()
+    assert live_log_ids(db, connection) == {log.id for log in old}
+    assert FileSystemArchiveStore(str(tmp_path)).list(archive.ARCHIVE_PREFIX) == []
+
+
+def test_run_logs_combine_archived_and_live_rows(db, connection, store, client):
+    # A run that was still logging when its first logs were archived
+    add_logs(db, connection, "run", OLD, 3, prefix="archived")
+    db.add(ConnectionRun(run_id="run", connection_id=connection.id, start_time=OLD,
+                         end_time=OLD + timedelta(days=2), status="SUCCESS"))
+    db.commit()
+    archive_run_logs(db, store, OLD + timedelta(days=1))
+    add_logs(db, connection, "run", OLD + timedelta(days=2), 2, prefix="live")
+    add_logs(db, connection, "other-run", OLD, 1, prefix="other")
+
+    response = client.get("/connection-run-logs/runs/run", params={"workspace_id": connection.workspace_id})
+
+    assert response.status_code == 200
+    assert [log["message"] for log in response.json()] == [
+        "archived 0", "archived 1", "archived 2", "live 0", "live 1"]
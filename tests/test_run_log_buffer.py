@@ -0,0 +1,100 @@
+import asyncio
+from sqlalchemy.exc import DataError, OperationalError
+from app.services.connection_run_logs import buffer as buffer_module
+from app.services.connection_run_logs.buffer import RunLogWriteBuffer
+
+POISON = "\x00"
+
+
+class FakeDatabase:
+    '''Stands in for Postgres: rejects any INSERT carrying a poisoned row'''
+
+    def __init__(self, outages: int = 0):
+        self.rows = []
+        self.outages = outages
+        self.inserts = 0
+
+    def insert(self, db, rows):
+        self.inserts += 1
+        if self.outages:
+            self.outages -= 1
+            raise OperationalError("INSERT", {}, Exception("server closed the connection unexpectedly"))
+        if any(row["message"] == POISON for row in rows):
+            raise DataError("INSERT", {}, Exception("invalid byte sequence for encoding \"UTF8\": 0x00"))
+        db.pending.extend(rows)
+
+
+class FakeSession:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.pending = []
+
+    def commit(self):
+        self.database.rows.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+    def close(self):
+        pass
+
+
+def make_buffer(monkeypatch, database: FakeDatabase, **options) -> RunLogWriteBuffer:
+    published = []
+    monkeypatch.setattr(buffer_module, "apply_ingest_policies", lambda db, rows: rows)
+    monkeypatch.setattr(buffer_module, "insert_run_log_rows", database.insert)
+    monkeypatch.setattr(buffer_module.run_log_pubsub, "publish", published.extend)
+    buffer = RunLogWriteBuffer(
+        lambda: FakeSession(database), max_rows=100, flush_interval_ms=10_000, retry_backoff_ms=0, **options)
+    buffer.published = published
+    return buffer
+
+
+def write(buffer: RunLogWriteBuffer, messages) -> None:
+    async def run():
+        await buffer.start()
+        for index, message in enumerate(messages):
+            await buffer.put({"id": str(index), "connection_id": "c", "run_id": "r", "message": message})
+        await buffer.stop()
+
+    asyncio.run(run())
+
+
+def test_poisoned_row_does_not_drop_the_batch(monkeypatch):
+    database = FakeDatabase()
+    buffer = make_buffer(monkeypatch, database)
+    messages = [f"line {index}" for index in range(16)]
+    messages[11] = POISON
+
+    write(buffer, messages)
+
+    assert [row["message"] for row in database.rows] == messages[:11] + messages[12:]
+    assert [row["id"] for row in buffer.published] == [row["id"] for row in database.rows]
+    assert buffer.flushed_rows == 15
+    assert buffer.failed_rows == 1
+    # One failed batch, then halves down to the poisoned row: 2 * log2(16) + 1 inserts
+    assert database.inserts == 9
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    database = FakeDatabase(outages=2)
+    buffer = make_buffer(monkeypatch, database, max_retries=3)
+
+    write(buffer, ["a", "b", "c"])
+
+    assert [row["message"] for row in database.rows] == ["a", "b", "c"]
+    assert buffer.retries == 2
+    assert buffer.failed_rows == 0
+
+
+def test_batch_fails_once_retries_are_exhausted(monkeypatch):
+    database = FakeDatabase(outages=5)
+    buffer = make_buffer(monkeypatch, database, max_retries=2)
+
+    write(buffer, ["a", "b", "c"])
+
+    assert database.rows == []
+    assert database.inserts == 3
+    assert buffer.failed_rows == 3
+    assert buffer.flushed_rows == 0
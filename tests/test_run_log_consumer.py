@@ -0,0 +1,110 @@
+import json
+import uuid
+import pytest
+from kombu import Connection
+from kombu.message import Message
+from sqlalchemy.exc import OperationalError
+from app.database import SessionLocal
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from app.services.connection_run_logs import consumer as consumer_module
+from app.services.connection_run_logs.consumer import RunLogConsumer, publish_run_log, run_log_queue
+
+
+def log_message(text: str) -> dict:
+    return {"type": "LOG", "log": {"level": "INFO", "message": text}}
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    monkeypatch.setattr(consumer_module, "FAILURE_BACKOFF_SECONDS", 0)
+    # A queue of its own per test, the memory transport is shared by the process
+    queue_name = f"run-logs-{uuid.uuid4()}"
+    with Connection("memory://") as connection:
+        yield connection, queue_name
+
+
+def make_consumer(broker, session_factory=SessionLocal) -> RunLogConsumer:
+    connection, queue_name = broker
+    return RunLogConsumer(connection, session_factory=session_factory, queue_name=queue_name,
+                          batch_rows=100, flush_interval_ms=50)
+
+
+def queued_messages(broker) -> int:
+    connection, queue_name = broker
+    return run_log_queue(queue_name)(connection.default_channel).queue_declare(passive=True).message_count
+
+
+def stored_messages(db, run_id: str) -> list:
+    db.rollback()
+    return sorted(json.loads(message)["message"] for message, in db.query(ConnectionRunLogs.message).filter(
+        ConnectionRunLogs.run_id == run_id))
+
+
+def test_messages_are_acked_after_commit(db, connection, broker, monkeypatch):
+    events = []
+
+    def session_factory():
+        session = SessionLocal()
+        commit = session.commit
+        session.commit = lambda: (commit(), events.append("commit"))
+        return session
+
+    ack = Message.ack
+    monkeypatch.setattr(Message, "ack", lambda message, *args, **kwargs: (
+        events.append("ack"), ack(message, *args, **kwargs)))
+    for index in range(3):
+        publish_run_log(broker[0], connection.id, "run", log_message(f"line {index}"), queue_name=broker[1])
+
+    make_consumer(broker, session_factory).run(max_batches=1)
+
+    assert events == ["commit", "ack", "ack", "ack"]
+    assert stored_messages(db, "run") == ["line 0", "line 1", "line 2"]
+    assert queued_messages(broker) == 0
+
+
+def test_failed_write_requeues_the_batch(db, connection, broker):
+    failing = None
+
+    def failing_session_factory():
+        session = SessionLocal()
+
+        def commit():
+            failing.should_stop = True
+            raise OperationalError("COMMIT", {}, Exception("server closed the connection unexpectedly"))
+
+        session.commit = commit
+        return session
+
+    for index in range(3):
+        publish_run_log(broker[0], connection.id, "run", log_message(f"line {index}"), queue_name=broker[1])
+
+    failing = make_consumer(broker, failing_session_factory)
+    failing.run()
+
+    assert failing.stats["requeued"] == 3
+    assert stored_messages(db, "run") == []
+    consumer = make_consumer(broker)
+    consumer.run(max_batches=1)
+    assert consumer.stats["committed"] == 3
+    assert stored_messages(db, "run") == ["line 0", "line 1", "line 2"]
+
+
+def test_malformed_messages_are_rejected(db, connection, broker):
+    connection_, queue_name = broker
+    queue = run_log_queue(queue_name)
+    with connection_.Producer() as producer:
+        producer.publish(b"{not json", exchange=queue.exchange, routing_key=queue.routing_key,
+                         declare=[queue], content_type="application/json", content_encoding="utf-8")
+    publish_run_log(connection_, connection.id, "run", {"type": "LOG"}, queue_name=queue_name)
+    publish_run_log(connection_, "not-a-uuid", "run", log_message("bad connection"), queue_name=queue_name)
+    publish_run_log(connection_, str(uuid.uuid4()), "run", log_message("unknown connection"), queue_name=queue_name)
+    publish_run_log(connection_, connection.id, "run", log_message("valid"), queue_name=queue_name)
+
+    consumer = make_consumer(broker)
+    consumer.run(max_batches=1)
+
+    assert consumer.stats["rejected"] == 4
+    assert consumer.stats["committed"] == 1
+    assert stored_messages(db, "run") == ["valid"]
+    # Rejected without requeue, nothing is delivered again
+    assert queued_messages(broker) == 0
@@ -0,0 +1,122 @@
+import uuid
+from datetime import datetime
+from app.common.utils import encode_cursor
+from app.db_models.connection_run_streams import ConnectionRunStream
+from app.db_models.connection_runs import ConnectionRun
+from app.db_models.connections import Connection
+from app.db_models.run_log_ingest_policies import RunLogIngestPolicy
+from app.services.connection_run_logs import backfill_connection_runs, insert_run_log_rows
+from app.services.connection_run_logs.policies import (
+    apply_ingest_policies, ingest_policy_cache, pending_dropped_run_logs)
+
+
+def log_row(connection_id: str, run_id: str, stream: str, n_docs: int) -> dict:
+    now = datetime.utcnow()
+    return {
+        "id": str(uuid.uuid4()), "connection_id": connection_id, "run_id": run_id,
+        "message": f'{{"message": "{n_docs} docs"}}', "message_type": "LOG", "level": "INFO",
+        "stream": stream, "n_docs_processed": n_docs, "n_docs_fetched": None,
+        "emitted_at": now, "created_at": now, "updated_at": now,
+    }
+
+
+def run_streams(db) -> dict:
+    db.rollback()
+    return {
+        (run_stream.connection_id, run_stream.run_id, run_stream.stream): run_stream.records_updated
+        for run_stream in db.query(ConnectionRunStream)
+    }
+
+
+def runs(db) -> dict:
+    db.rollback()
+    return {
+        (run.connection_id, run.run_id): (run.records_updated, run.log_count)
+        for run in db.query(ConnectionRun)
+    }
+
+
+def test_stream_rollup_is_kept_per_connection(db, connection, client):
+    other = Connection(workspace_id=connection.workspace_id, name="other",
+                       source_instance_id=connection.source_instance_id,
+                       generator_instance_id=connection.generator_instance_id,
+                       destination_instance_id=connection.destination_instance_id)
+    db.add(other)
+    db.commit()
+    # Workers of both connections picked the same run id
+    insert_run_log_rows(db, [log_row(connection.id, "run", "users", 3), log_row(other.id, "run", "users", 5)])
+    insert_run_log_rows(db, [log_row(connection.id, "run", "users", 4)])
+    db.commit()
+
+    expected = {(connection.id, "run", "users"): 7, (other.id, "run", "users"): 5}
+    expected_runs = {(connection.id, "run"): (7, 2), (other.id, "run"): (5, 1)}
+    assert run_streams(db) == expected
+    assert runs(db) == expected_runs
+    backfill_connection_runs(db)
+    assert run_streams(db) == expected
+    assert runs(db) == expected_runs
+
+    response = client.get(f"/connection-run-logs/{connection.id}/agg-run-logs",
+                          params={"workspace_id": connection.workspace_id})
+    assert response.status_code == 200
+    [run] = response.json()["runs"]
+    assert run["records_updated"] == 7
+    assert [(stream["stream"], stream["records_updated"]) for stream in run["records_per_stream"]] == [("users", 7)]
+
+    response = client.get("/connection-run-logs/runs/run", params={"workspace_id": connection.workspace_id})
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    response = client.get("/connection-run-logs/runs/run",
+                          params={"workspace_id": connection.workspace_id, "connection_id": other.id})
+    assert response.status_code == 200
+    assert [log["connection_id"] for log in response.json()] == [str(other.id)]
+
+
+def test_run_budget_is_kept_per_connection(db, connection):
+    other = Connection(workspace_id=connection.workspace_id, name="other",
+                       source_instance_id=connection.source_instance_id,
+                       generator_instance_id=connection.generator_instance_id,
+                       destination_instance_id=connection.destination_instance_id)
+    db.add_all([other, RunLogIngestPolicy(workspace_id=connection.workspace_id, max_lines_per_run=2)])
+    db.commit()
+    ingest_policy_cache.clear()
+    insert_run_log_rows(db, [log_row(connection.id, "run", "users", 1), log_row(connection.id, "run", "users", 1)])
+    db.commit()
+
+    rows = [log_row(str(connection.id), "run", "users", 1), log_row(str(other.id), "run", "users", 1)]
+    kept = apply_ingest_policies(db, rows)
+    db.commit()
+    assert [row["connection_id"] for row in kept] == [str(other.id)]
+    assert {(run.connection_id, run.run_id): run.dropped_count for run in db.query(ConnectionRun)} == {
+        (connection.id, "run"): 1}
+
+
+def test_single_messages_write_dropped_counts_with_the_next_stored_line(db, connection, client):
+    db.add(RunLogIngestPolicy(connection_id=connection.id, min_level="INFO"))
+    db.commit()
+    ingest_policy_cache.clear()
+
+    def post(level):
+        response = client.post("/connection-run-logs/", params={"connection_id": connection.id, "run_id": "run"},
+                               json={"type": "LOG", "log": {"level": level, "message": "line"}})
+        assert response.status_code == 200
+
+    post("DEBUG")
+    post("DEBUG")
+    # Nothing written for the dropped lines yet
+    assert runs(db) == {}
+    post("INFO")
+    db.rollback()
+    assert [(run.log_count, run.dropped_count) for run in db.query(ConnectionRun)] == [(1, 2)]
+    assert not pending_dropped_run_logs.due()
+
+
+def test_agg_run_logs_rejects_cursors_of_another_shape(connection, client):
+    now = datetime.utcnow()
+    for cursor in (encode_cursor(now), encode_cursor("run", now), encode_cursor(now, 1), encode_cursor(now, "run", 1)):
+        response = client.get(f"/connection-run-logs/{connection.id}/agg-run-logs",
+                              params={"workspace_id": connection.workspace_id, "cursor": cursor})
+        assert response.status_code == 422
+    response = client.get(f"/connection-run-logs/{connection.id}/agg-run-logs",
+                          params={"workspace_id": connection.workspace_id, "cursor": encode_cursor(now, "run")})
+    assert response.status_code == 200
@@ -0,0 +1,39 @@
+import uuid
+from datetime import datetime
+from app.common.utils import encode_cursor
+from app.db_models.connection_run_logs import ConnectionRunLogs
+
+
+def test_search_rejects_cursors_of_another_shape(connection, client):
+    log_id = str(uuid.uuid4())
+    for cursor in (encode_cursor(0.5), encode_cursor(log_id, 0.5), encode_cursor(True, log_id),
+                   encode_cursor(0.5, 1), encode_cursor(0.5, "id"), encode_cursor(0.5, log_id, 1)):
+        response = client.get("/connection-run-logs/search",
+                              params={"q": "line", "workspace_id": connection.workspace_id, "cursor": cursor})
+        assert response.status_code == 422
+
+    for cursor in (encode_cursor(0.5, log_id), encode_cursor(1, log_id)):
+        response = client.get("/connection-run-logs/search",
+                              params={"q": "line", "workspace_id": connection.workspace_id, "cursor": cursor})
+        assert response.status_code == 200
+
+
+def test_search_pages_follow_the_cursor(db, connection, client):
+    now = datetime.utcnow()
+    db.add_all([
+        ConnectionRunLogs(connection_id=connection.id, run_id="run", message=f'{{"message": "line {i}"}}',
+                          message_type="LOG", emitted_at=now, created_at=now, updated_at=now)
+        for i in range(3)
+    ])
+    db.commit()
+
+    ids, cursor = [], None
+    while True:
+        params = {"q": "line", "workspace_id": connection.workspace_id, "page_size": 2}
+        response = client.get("/connection-run-logs/search", params=params | ({"cursor": cursor} if cursor else {}))
+        assert response.status_code == 200
+        ids += [result["id"] for result in response.json()["results"]]
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert len(set(ids)) == len(ids) == 3
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime
+from app.common.utils import encode_cursor
+from app.db_models.connection_run_logs import ConnectionRunLogs
+from app.db_models.connections import Connection
+from app.db_models.workspaces import Workspace
+from app.routers import connection_run_logs as router_module
+from app.services.connection_run_logs.pubsub import RunLogPubSub
+from app.services.connection_run_logs.tail import _load_replay_page
+
+
+async def finite_tail(request, connection_id, run_id, cursor):
+    # The real tail waits for live logs until the client disconnects
+    yield f"event: end\ndata: {run_id}\n\n"
+
+
+def log(connection_id, run_id, message):
+    now = datetime.utcnow()
+    return ConnectionRunLogs(connection_id=connection_id, run_id=run_id, message=message,
+                             message_type="LOG", emitted_at=now, created_at=now, updated_at=now)
+
+
+def test_tail_checks_the_workspace_through_the_logs_without_a_rollup_row(db, connection, client, monkeypatch):
+    monkeypatch.setattr(router_module, "tail_run_logs", finite_tail)
+    now = datetime.utcnow()
+    db.add(ConnectionRunLogs(connection_id=connection.id, run_id="run", message='{"message": "line"}',
+                             message_type="LOG", emitted_at=now, created_at=now, updated_at=now))
+    db.commit()
+
+    response = client.get("/connection-run-logs/runs/run/tail", params={"workspace_id": connection.workspace_id})
+    assert response.status_code == 200
+    assert response.text == "event: end\ndata: run\n\n"
+
+    other_workspace = client.get("/connection-run-logs/runs/run/tail",
+                                 params={"workspace_id": connection.source_instance_id})
+    assert other_workspace.status_code == 404
+
+
+def test_tail_rejects_cursors_of_another_shape(db, connection, client):
+    now = datetime.utcnow()
+    db.add(ConnectionRunLogs(connection_id=connection.id, run_id="run", message='{"message": "line"}',
+                             message_type="LOG", emitted_at=now, created_at=now, updated_at=now))
+    db.commit()
+
+    for cursor in (encode_cursor(now), encode_cursor(now, "id", 1), encode_cursor("id", now)):
+        response = client.get("/connection-run-logs/runs/run/tail",
+                              params={"workspace_id": connection.workspace_id, "cursor": cursor})
+        assert response.status_code == 422
+
+
+def test_tail_is_scoped_to_the_connection_of_the_workspace(db, connection, client, monkeypatch):
+    workspace = Workspace(organization_id=db.get(Workspace, connection.workspace_id).organization_id,
+                          name="other workspace")
+    db.add(workspace)
+    db.flush()
+    other = Connection(workspace_id=workspace.id, name="other", source_instance_id=connection.source_instance_id,
+                       generator_instance_id=connection.generator_instance_id,
+                       destination_instance_id=connection.destination_instance_id)
+    db.add(other)
+    db.flush()
+    # Workers of both workspaces picked the same run id
+    db.add_all([log(connection.id, "run", '{"message": "mine"}'), log(other.id, "run", '{"message": "theirs"}')])
+    db.commit()
+
+    tailed = []
+
+    async def recording_tail(request, connection_id, run_id, cursor):
+        tailed.append(connection_id)
+        yield "event: end\ndata: {}\n\n"
+
+    monkeypatch.setattr(router_module, "tail_run_logs", recording_tail)
+    response = client.get("/connection-run-logs/runs/run/tail", params={"workspace_id": connection.workspace_id})
+    assert response.status_code == 200
+    assert tailed == [str(connection.id)]
+    foreign = client.get("/connection-run-logs/runs/run/tail",
+                         params={"workspace_id": connection.workspace_id, "connection_id": other.id})
+    assert foreign.status_code == 404
+
+    rows, _ = _load_replay_page(str(connection.id), "run", None)
+    assert [row["message"] for row in rows] == ['{"message": "mine"}']
+
+    async def publish():
+        pubsub = RunLogPubSub()
+        mine = pubsub.subscribe(str(connection.id), "run")
+        theirs = pubsub.subscribe(str(other.id), "run")
+        pubsub.deliver([{"id": "log", "connection_id": str(other.id), "run_id": "run"}])
+        return mine.qsize(), theirs.qsize()
+
+    assert asyncio.run(publish()) == (0, 1)